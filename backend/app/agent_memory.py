@@ -0,0 +1,188 @@
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from phi.storage.agent.postgres import PgAgentStorage
+
+logger = logging.getLogger("remote_logger")
+
+
+class MemoryWorker:
+    """
+    Runs user-memory extraction and session summarization after the response is sent.
+
+    Turns are queued with submit(); a background thread waits up to `batch_window`
+    seconds (or `batch_size` turns) and then coalesces the batch: each user gets one
+    `update_memories(user_id, messages)` call covering all of their new messages and
+    each session one `update_summary(session_id)` call, however many turns it had.
+    """
+
+    def __init__(self, update_memories, update_summary, batch_size=32, batch_window=2.0, max_queue=10_000):
+        self.update_memories = update_memories
+        self.update_summary = update_summary
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.memory_updates = 0
+        self.summary_updates = 0
+        self.failed = 0
+        self.last_batch_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._thread = threading.Thread(target=self._loop, name="memory-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, session_id, message):
+        """Queue one finished turn; never blocks the request (full queue drops the turn)."""
+        try:
+            self._queue.put_nowait((time.time(), user_id, session_id, message))
+            with self._lock:
+                self.submitted += 1
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Memory queue full; skipped memory update for session {session_id}")
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            started = time.time()
+            messages = {}
+            sessions = {}
+            for _, user_id, session_id, message in batch:
+                messages.setdefault(user_id, []).append(message)
+                sessions[session_id] = user_id
+
+            for user_id, user_messages in messages.items():
+                self._apply(self.update_memories, "memory", user_id, user_messages)
+            for session_id in sessions:
+                self._apply(self.update_summary, "summary", session_id)
+
+            with self._lock:
+                self.batches += 1
+                self.last_batch_seconds = time.time() - started
+                self.max_lag_seconds = max(self.max_lag_seconds, time.time() - min(item[0] for item in batch))
+
+    def _apply(self, func, kind, *args):
+        try:
+            func(*args)
+            with self._lock:
+                if kind == "memory":
+                    self.memory_updates += 1
+                else:
+                    self.summary_updates += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.error(f"Background {kind} update for {args[0]} failed: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "memory_updates": self.memory_updates,
+                "summary_updates": self.summary_updates,
+                "failed": self.failed,
+                "last_batch_seconds": self.last_batch_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+            }
+
+
+class WindowedAgentStorage(PgAgentStorage):
+    """
+    PgAgentStorage that keeps only a bounded window of each session and caches it.
+
+    Sessions are trimmed to their last `max_runs` runs and `max_messages` messages
+    (system messages are kept) before they are written, so loading history costs
+    the same on the hundredth turn as on the third. Up to `cache_size` sessions are
+    served from memory, least-recently-used first; writes go through the cache. The
+    cache is per process, so with several workers per host use sticky sessions or
+    set cache_size=0.
+    """
+
+    def __init__(self, *args, max_runs=20, max_messages=200, cache_size=1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_runs = max_runs
+        self.max_messages = max_messages
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _trim(self, session):
+        memory = session.memory
+        if not memory:
+            return session
+        if len(memory.get("runs") or []) > self.max_runs:
+            memory["runs"] = memory["runs"][-self.max_runs:]
+        messages = memory.get("messages") or []
+        if len(messages) > self.max_messages:
+            system = [message for message in messages if message.get("role") == "system"]
+            others = [message for message in messages if message.get("role") != "system"]
+            memory["messages"] = system + others[-self.max_messages:]
+        return session
+
+    def _remember(self, session):
+        if self.cache_size <= 0 or session is None:
+            return
+        with self._cache_lock:
+            self._cache[session.session_id] = session.model_copy(deep=True)
+            self._cache.move_to_end(session.session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def read(self, session_id, user_id=None):
+        with self._cache_lock:
+            cached = self._cache.get(session_id)
+            if cached is not None and (user_id is None or cached.user_id == user_id):
+                self._cache.move_to_end(session_id)
+                self.hits += 1
+                return cached.model_copy(deep=True)
+            self.misses += 1
+        session = super().read(session_id, user_id)
+        if session is not None:
+            self._remember(self._trim(session))
+        return session
+
+    def upsert(self, session, create_and_retry=True):
+        # Cached before writing so the read-back at the end of PgAgentStorage.upsert skips the database
+        self._remember(self._trim(session))
+        stored = super().upsert(session, create_and_retry)
+        if stored is None:
+            with self._cache_lock:
+                self._cache.pop(session.session_id, None)
+        return stored
+
+    def stats(self):
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "sessions": len(self._cache),
+                "cache_size": self.cache_size,
+                "max_runs": self.max_runs,
+                "max_messages": self.max_messages,
+            }
@@ -0,0 +1,188 @@
+import time
+import asyncio
+import weakref
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import timed
+
+
+# Marks the end of a streamed turn on its queue
+_END = object()
+
+
+class AgentPoolBusy(Exception):
+    """Raised when a request is refused by admission control."""
+
+
+class AgentPool:
+    """
+    Runs agent turns on a bounded worker pool with admission control.
+
+    A fresh agent is built for every turn by `factory(user_id, session_id, context)`,
+    so no per-session state (ids, context, chat memory) is ever shared between
+    concurrent requests; the factory is expected to reuse the expensive clients
+    (model client, memory DB, storage). At most `max_concurrency` turns run at
+    once, at most `max_waiting` more may queue for up to `wait_timeout` seconds,
+    and turns of the same session run one after another.
+    """
+
+    def __init__(self, factory, max_concurrency=8, max_waiting=32, wait_timeout=30.0):
+        self.factory = factory
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent")
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._session_locks = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def _session_lock(self, session_id):
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    def _reject(self, reason):
+        with self._lock:
+            self.rejected += 1
+        raise AgentPoolBusy(reason)
+
+    async def _admit(self, session_lock):
+        """Wait for the session and then a worker slot, within wait_timeout in total."""
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                full = True
+            else:
+                full = False
+                self.waiting += 1
+        if full:
+            self._reject(f"{self.waiting} requests already waiting for an agent")
+
+        async def acquire():
+            await session_lock.acquire()
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                session_lock.release()
+                raise
+
+        try:
+            await asyncio.wait_for(acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            self._reject(f"No agent became free within {self.wait_timeout}s")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def _release(self, session_lock, failed):
+        with self._lock:
+            self.running -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self._slots.release()
+        session_lock.release()
+
+    async def run(self, user_id, session_id, message, context=None, timings=None):
+        """
+        Run one agent turn for (user_id, session_id) without blocking the event loop.
+        If given, `timings` receives the seconds spent waiting for admission ('queue') and running ('agent').
+        """
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        session_lock = self._session_lock(session_id)
+        await self._admit(session_lock)
+        timings["queue"] = time.perf_counter() - started
+        with self._lock:
+            self.running += 1
+        failed = True
+        try:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            # The copied context carries the request's trace id and stage timings into the worker
+            response = await loop.run_in_executor(
+                self.executor, contextvars.copy_context().run, self._run, user_id, session_id, message, context
+            )
+            timings["agent"] = time.perf_counter() - started
+            failed = False
+            return response
+        finally:
+            self._release(session_lock, failed)
+
+    def _run(self, user_id, session_id, message, context):
+        agent = self.factory(user_id, session_id, context)
+        with timed("agent_run"):
+            return agent.run(message)
+
+    async def stream(self, user_id, session_id, message, context=None, timings=None):
+        """
+        Admit one streamed agent turn and return an async iterator over its RunResponse chunks.
+
+        AgentPoolBusy is raised here, before anything is streamed. The agent runs
+        on a pool thread that hands chunks to the event loop as phidata yields them;
+        its worker slot and session stay held until that thread is done, even when
+        the consumer stops early (the run is then abandoned at the next chunk).
+        If given, `timings` receives the admission wait as 'queue'.
+        """
+        started = time.perf_counter()
+        session_lock = self._session_lock(session_id)
+        await self._admit(session_lock)
+        if timings is not None:
+            timings["queue"] = time.perf_counter() - started
+        with self._lock:
+            self.running += 1
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        future = loop.run_in_executor(
+            self.executor, contextvars.copy_context().run,
+            self._stream, user_id, session_id, message, context, loop, queue, stop
+        )
+        future.add_done_callback(lambda done: self._release(session_lock, done.exception() is not None))
+        return self._drain(queue, stop)
+
+    def _stream(self, user_id, session_id, message, context, loop, queue, stop):
+        try:
+            agent = self.factory(user_id, session_id, context)
+            with timed("agent_run"):
+                for chunk in agent.run(message, stream=True, stream_intermediate_steps=True):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+            raise
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    async def _drain(self, queue, stop):
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _END:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_waiting": self.max_waiting,
+                "running": self.running,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
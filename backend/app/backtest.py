@@ -0,0 +1,255 @@
+import itertools
+import numpy as np
+import pandas as pd
+from features import TRADING_DAYS
+from parallel import run_chunks
+
+# name -> function(close, **params) -> target weights (same shape as close, rows decided at that day's close)
+STRATEGIES = {}
+
+REBALANCE_FREQUENCIES = ('D', 'W', 'M', 'Q', 'never')
+
+
+def register_strategy(name):
+    """Register a vectorized signal function under `name` so requests can refer to it."""
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+def _normalize_rows(scores):
+    values = scores.to_numpy(dtype=float)
+    totals = values.sum(axis=1, keepdims=True)
+    weights = np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+    return pd.DataFrame(weights, index=scores.index, columns=scores.columns)
+
+
+@register_strategy('equal_weight')
+def equal_weight(close):
+    return _normalize_rows(close.notna().astype(float))
+
+
+@register_strategy('buy_and_hold')
+def buy_and_hold(close):
+    # Same targets as equal_weight; run it with rebalance='never' to let weights drift
+    return equal_weight(close)
+
+
+@register_strategy('fixed')
+def fixed(close, weights=None):
+    targets = pd.DataFrame(0.0, index=close.index, columns=close.columns)
+    for ticker, weight in (weights or {}).items():
+        targets[ticker] = float(weight)
+    return targets.where(close.notna(), 0.0)
+
+
+@register_strategy('momentum')
+def momentum(close, lookback=126, skip=21, top_k=5):
+    """Equal weights in the top_k tickers by return from t-lookback to t-skip."""
+    past = (close.shift(skip) / close.shift(lookback) - 1).to_numpy()
+    scores = np.where(np.isnan(past), -np.inf, past)
+    top = np.argsort(-scores, axis=1, kind='stable')[:, :top_k]
+    selected = np.zeros_like(scores)
+    np.put_along_axis(selected, top, 1.0, axis=1)
+    selected[np.isinf(scores)] = 0.0
+    return _normalize_rows(pd.DataFrame(selected, index=close.index, columns=close.columns))
+
+
+@register_strategy('inverse_volatility')
+def inverse_volatility(close, lookback=63):
+    volatility = close.pct_change(fill_method=None).rolling(lookback, min_periods=lookback).std()
+    return _normalize_rows((1.0 / volatility).replace([np.inf, -np.inf], np.nan).fillna(0.0))
+
+
+@register_strategy('moving_average')
+def moving_average(close, fast=50, slow=200):
+    """Equal weights in the tickers whose fast moving average is above the slow one."""
+    signal = close.rolling(fast, min_periods=fast).mean() > close.rolling(slow, min_periods=slow).mean()
+    return _normalize_rows(signal.astype(float))
+
+
+def rebalance_mask(index, rebalance):
+    """Boolean array marking the days whose close triggers a rebalance.
+
+    Args:
+        index (pd.DatetimeIndex): Trading days.
+        rebalance (str or int): 'D', 'W', 'M', 'Q', 'never' or a number of trading days.
+    """
+    mask = np.zeros(len(index), dtype=bool)
+    if isinstance(rebalance, (int, np.integer)):
+        mask[::max(int(rebalance), 1)] = True
+    elif rebalance == 'D':
+        mask[:] = True
+    elif rebalance in ('W', 'M', 'Q'):
+        periods = index.to_period(rebalance).asi8
+        # Last trading day of each period, so the new weights apply from the next period's first day
+        mask[:-1] = periods[1:] != periods[:-1]
+    elif rebalance != 'never':
+        raise ValueError(f"Unknown rebalance frequency {rebalance}; use one of {list(REBALANCE_FREQUENCIES)} or a number of days")
+    mask[0] = True
+    return mask
+
+
+def simulate(close, targets, rebalance='M', cost_bps=0.0):
+    """Vectorized portfolio simulation with drifting weights between rebalances.
+
+    Weights set at the close of a rebalance day s apply to returns from s + 1. Between
+    rebalances holdings drift with prices: with growth index G = cumprod(1 + r) and
+    anchor a(t) the last rebalance before t, each asset is worth w_a * G_t / G_a, so
+    every day's return, turnover and cost comes from whole-matrix operations.
+
+    Args:
+        close (pd.DataFrame): Close prices, one column per ticker.
+        targets (pd.DataFrame): Target weights aligned with close; un-invested weight is cash.
+        rebalance (str or int): See rebalance_mask.
+        cost_bps (float): Transaction cost in basis points of traded value.
+
+    Returns:
+        dict: 'returns' (pd.Series of net daily returns), 'turnover' (pd.Series, rebalance days
+            only) and 'weights' (pd.DataFrame of targets on rebalance days).
+    """
+    prices = close.ffill().to_numpy(dtype=float)
+    listed = ~np.isnan(prices)
+    returns = np.zeros_like(prices)
+    returns[1:] = np.where(listed[1:] & listed[:-1], prices[1:] / np.where(listed[:-1], prices[:-1], 1.0) - 1, 0.0)
+    growth = np.cumprod(1 + returns, axis=0)
+
+    weights = np.nan_to_num(targets.reindex_like(close).to_numpy(dtype=float)) * listed
+    mask = rebalance_mask(close.index, rebalance)
+    rebalance_days = np.flatnonzero(mask)
+    # anchor[t]: last rebalance day strictly before t (day 0 anchors itself)
+    anchor = rebalance_days[np.maximum(np.searchsorted(rebalance_days, np.arange(len(prices)), side='left') - 1, 0)]
+
+    held = weights[anchor]
+    cash = 1.0 - held.sum(axis=1)
+    relative = growth / growth[anchor]
+    previous = np.vstack([growth[:1], growth[:-1]]) / growth[anchor]
+    value_now = cash + np.sum(held * relative, axis=1)
+    value_before = cash + np.sum(held * previous, axis=1)
+    gross = value_now / value_before - 1
+    gross[0] = 0.0
+
+    # Drifted weights just before each rebalance, versus the new targets
+    drifted = held[rebalance_days] * relative[rebalance_days] / value_now[rebalance_days, None]
+    drifted[0] = 0.0
+    turnover = np.abs(weights[rebalance_days] - drifted).sum(axis=1)
+    net = gross.copy()
+    net[rebalance_days] = (1 + gross[rebalance_days]) * (1 - turnover * cost_bps / 10_000) - 1
+
+    return {
+        'returns': pd.Series(net, index=close.index),
+        'turnover': pd.Series(turnover, index=close.index[rebalance_days]),
+        'weights': pd.DataFrame(weights[rebalance_days], index=close.index[rebalance_days], columns=close.columns),
+    }
+
+
+def performance_stats(returns, turnover=None, cost_bps=0.0):
+    """Summary statistics of a daily return series."""
+    equity = (1 + returns).cumprod()
+    years = max(len(returns) - 1, 1) / TRADING_DAYS
+    total = float(equity.iloc[-1] - 1)
+    volatility = float(returns.std() * np.sqrt(TRADING_DAYS))
+    downside = float(returns[returns < 0].std() * np.sqrt(TRADING_DAYS)) if (returns < 0).any() else 0.0
+    annual = float(returns.mean() * TRADING_DAYS)
+    drawdown = equity / equity.cummax() - 1
+    max_drawdown = float(drawdown.min())
+    cagr = float(equity.iloc[-1] ** (1 / years) - 1) if equity.iloc[-1] > 0 else -1.0
+    stats = {
+        'total_return': total,
+        'cagr': cagr,
+        'volatility': volatility,
+        'sharpe': annual / volatility if volatility > 0 else None,
+        'sortino': annual / downside if downside > 0 else None,
+        'max_drawdown': max_drawdown,
+        'calmar': cagr / -max_drawdown if max_drawdown < 0 else None,
+    }
+    if turnover is not None:
+        stats['annual_turnover'] = float(turnover.iloc[1:].sum() / years)
+        stats['cost_drag'] = float(turnover.sum() * cost_bps / 10_000 / years)
+    return stats
+
+
+def run_variant(close, variant, start=0):
+    """Simulate one {'strategy', 'params', 'rebalance', 'cost_bps'} variant on `close`.
+
+    Signals are computed on the whole of `close` but trading starts at row `start`,
+    so lookback windows are already filled on the first traded day.
+    """
+    name = variant.get('strategy', 'equal_weight')
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {name}; available: {sorted(STRATEGIES)}")
+    targets = STRATEGIES[name](close, **variant.get('params', {}))
+    rebalance = variant.get('rebalance', 'never' if name == 'buy_and_hold' else 'M')
+    cost_bps = variant.get('cost_bps', 0.0)
+    return simulate(close.iloc[start:], targets.iloc[start:], rebalance=rebalance, cost_bps=cost_bps)
+
+
+def _run_variant_chunk(task):
+    """Stats (and optionally daily returns) for a chunk of variants; runs in a worker process."""
+    close, variants, keep_returns = task
+    results = []
+    for variant in variants:
+        simulated = run_variant(close, variant)
+        results.append({
+            'stats': performance_stats(simulated['returns'], simulated['turnover'], variant.get('cost_bps', 0.0)),
+            'returns': simulated['returns'] if keep_returns else None,
+        })
+    return results
+
+
+def run_variants(close, variants, chunk_size=25, keep_returns=False):
+    """Run many strategy variants over the same close matrix, in chunks on the process pool."""
+    chunks = [(close, variants[i:i + chunk_size], keep_returns) for i in range(0, len(variants), chunk_size)]
+    return [result for chunk in run_chunks(_run_variant_chunk, chunks) for result in chunk]
+
+
+def expand_grid(strategy, grid, rebalance='M', cost_bps=0.0):
+    """Variants for every combination of the parameter lists in `grid`."""
+    names = list(grid)
+    return [
+        {'strategy': strategy, 'params': dict(zip(names, values)), 'rebalance': rebalance, 'cost_bps': cost_bps}
+        for values in itertools.product(*(grid[name] for name in names))
+    ] or [{'strategy': strategy, 'params': {}, 'rebalance': rebalance, 'cost_bps': cost_bps}]
+
+
+def _walk_forward_window(task):
+    """Pick the best variant by in-sample Sharpe and return its out-of-sample returns."""
+    close, variants, train, test = task
+    best, best_sharpe = None, -np.inf
+    for variant in variants:
+        returns = run_variant(close.iloc[:train[1]], variant, start=train[0])['returns']
+        sharpe = performance_stats(returns)['sharpe']
+        if sharpe is not None and sharpe > best_sharpe:
+            best, best_sharpe = variant, sharpe
+    best = best or variants[0]
+    # Enter at the close of the last training day so the first test day earns a return
+    returns = run_variant(close.iloc[:test[1]], best, start=train[1] - 1)['returns'].iloc[1:]
+    return {
+        'train': [str(close.index[train[0]].date()), str(close.index[train[1] - 1].date())],
+        'test': [str(close.index[test[0]].date()), str(close.index[test[1] - 1].date())],
+        'variant': best,
+        'in_sample_sharpe': None if best_sharpe == -np.inf else float(best_sharpe),
+        'returns': returns,
+    }
+
+
+def walk_forward(close, variants, train_days=504, test_days=126):
+    """Rolling walk-forward validation, one window per process-pool task.
+
+    Each window selects the variant with the best Sharpe on `train_days` and
+    trades it for the following `test_days`; the test slices are chained into
+    one out-of-sample return series.
+
+    Returns:
+        dict: 'windows' (selection per window), 'returns' (out-of-sample daily returns) and 'stats'.
+    """
+    bounds = [
+        ((start, start + train_days), (start + train_days, min(start + train_days + test_days, len(close))))
+        for start in range(0, len(close) - train_days - 1, test_days)
+    ]
+    if not bounds:
+        raise ValueError(f"Need more than {train_days + 1} days of history for walk-forward, got {len(close)}")
+    windows = run_chunks(_walk_forward_window, [(close, variants, train, test) for train, test in bounds])
+    returns = pd.concat([window.pop('returns') for window in windows])
+    return {'windows': windows, 'returns': returns, 'stats': performance_stats(returns)}
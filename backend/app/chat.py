@@ -1,19 +1,36 @@
 import os
+import json
+import time
 import uuid
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Union
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from phi.agent import Agent, AgentMemory
+from phi.run.response import RunEvent
 from phi.model.openai import OpenAIChat
+from phi.memory.agent import AgentRun
+from phi.memory.classifier import MemoryClassifier
+from phi.memory.manager import MemoryManager
+from phi.memory.summarizer import MemorySummarizer
 from phi.memory.db.postgres import PgMemoryDb
-from phi.storage.agent.postgres import PgAgentStorage
+from openai import OpenAI
+from sqlalchemy import create_engine
 from set_prompts import get_prompts
 from remote_log_handler import RemoteLogHandler
 from tools import *
+from incremental_features import IncrementalFeatureState
+from jobs import JobQueue, JobStore
+from agent_pool import AgentPool, AgentPoolBusy
+from agent_memory import MemoryWorker, WindowedAgentStorage
+from response_cache import ToolCache, SemanticCache, tickers_in
+from http_client import http_client, async_http_client
+from instrumentation import instrument_app, in_context, timed, timed_function, TraceFilter
 
 # Load environment variables
 load_dotenv()
@@ -24,81 +41,429 @@ DB_URL = os.getenv("DB_URL", "")
 DATA_SERVICE_URL = os.getenv("DATA_SERVICE_URL", "")
 LOG_URL = os.getenv("LOG_URL", "")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+RAW_DATA_CHUNK_SIZE = int(os.getenv("RAW_DATA_CHUNK_SIZE", "1000"))
+CALCULATION_CONCURRENCY = int(os.getenv("CALCULATION_CONCURRENCY", "8"))
+WATCHLIST_FILE = os.getenv("WATCHLIST_FILE", "")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "1.0"))
+# Seconds a worker process may go silent before another one takes over its jobs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "8"))
+AGENT_MAX_WAITING = int(os.getenv("AGENT_MAX_WAITING", "32"))
+AGENT_WAIT_TIMEOUT = float(os.getenv("AGENT_WAIT_TIMEOUT", "30"))
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2048"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+HISTORY_WINDOW_RUNS = int(os.getenv("HISTORY_WINDOW_RUNS", "20"))
+HISTORY_WINDOW_MESSAGES = int(os.getenv("HISTORY_WINDOW_MESSAGES", "200"))
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "1024"))
+MEMORY_BATCH_SIZE = int(os.getenv("MEMORY_BATCH_SIZE", "32"))
+MEMORY_BATCH_WINDOW = float(os.getenv("MEMORY_BATCH_WINDOW", "2.0"))
+
+# Blocking pandas/yfinance work runs here so it never stalls the event loop
+calculation_executor = ThreadPoolExecutor(max_workers=CALCULATION_CONCURRENCY, thread_name_prefix="calc")
 
 # Configure remote logger
 logger = logging.getLogger("remote_logger")
 logger.setLevel(logging.INFO)
 
-remote_handler = RemoteLogHandler(LOG_URL)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+remote_handler = RemoteLogHandler(
+    LOG_URL,
+    max_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    max_batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+    overflow_policy=os.getenv("LOG_OVERFLOW_POLICY", "drop_newest"),
+    session=http_client,
+)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [trace %(trace_id)s] - %(message)s')
 remote_handler.setFormatter(formatter)
+remote_handler.addFilter(TraceFilter())
 logger.addHandler(remote_handler)
 
 
 # FastAPI application initialization
 app = FastAPI()
+instrument_app(app, "backend", logger)
 
 # Define the request body
 class QueryItem(BaseModel):
     query: str
     user_id: str
     session_id: str
+    use_cache: bool = True
 
 
 instruction_list, guideline_list = get_prompts()
 
-# Create a single agent instance
-agent = Agent(
-    name="Financial asset recommender",
-    model=OpenAIChat(id=MODEL,
-                     api_key=OPENAI_API_KEY),
-    tools=[
-        perform_calculations_for_tickers,
-        send_raw_data_to_api,
-        send_features_to_api,
-    ],
-    memory=AgentMemory(
-        db=PgMemoryDb(table_name="fin_agent_memory_", db_url=DB_URL),
+# Clients shared by every agent; each is safe to use from several threads
+openai_client = OpenAI(api_key=OPENAI_API_KEY)
+db_engine = create_engine(DB_URL, pool_size=AGENT_CONCURRENCY, max_overflow=AGENT_CONCURRENCY)
+memory_db = PgMemoryDb(table_name="fin_agent_memory_", db_engine=db_engine)
+agent_storage = WindowedAgentStorage(
+    table_name="global_user_sessions_",
+    db_engine=db_engine,
+    max_runs=HISTORY_WINDOW_RUNS,
+    max_messages=HISTORY_WINDOW_MESSAGES,
+    cache_size=HISTORY_CACHE_SIZE,
+)
+
+# Read-only tools are memoized per market day; tools that write are always run
+tool_cache = ToolCache(max_entries=TOOL_CACHE_SIZE)
+
+# Each tool call is timed as stage 'tool.<name>', cache hits included
+agent_tools = [timed_function(f"tool.{tool.__name__}")(tool) for tool in [
+    resolve_ticker,
+    tool_cache.memoize(perform_calculations_for_tickers),
+    tool_cache.memoize(optimize_portfolio),
+    tool_cache.memoize(compute_value_at_risk),
+    tool_cache.memoize(backtest_strategy),
+    tool_cache.memoize(get_resampled_candles),
+    tool_cache.memoize(find_similar_assets),
+    send_raw_data_to_api,
+    send_features_to_api,
+]]
+
+
+def embed_query(text: str) -> list[float]:
+    with timed("embedding"):
+        return openai_client.embeddings.create(model=EMBEDDING_MODEL, input=[text]).data[0].embedding
+
+
+semantic_cache = SemanticCache(
+    embed_query,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_SIZE,
+) if SEMANTIC_CACHE_ENABLED else None
+
+
+def invalidate_caches(tickers: Optional[list[str]] = None, tool: Optional[str] = None) -> dict:
+    """
+    Drop cached tool results and answers that depend on `tickers` (all of them when None).
+    """
+    removed = {"tools": tool_cache.invalidate(tickers, tool), "answers": 0}
+    if semantic_cache is not None and (tickers or tool is None):
+        removed["answers"] = semantic_cache.invalidate(tickers)
+    logger.info(f"Invalidated caches for {tickers or 'all tickers'}: {removed}")
+    return removed
+
+
+def answer_tickers(tools: Optional[list]) -> set:
+    """
+    Tickers referenced by the tool calls of an agent turn.
+    """
+    found = set()
+    for tool in tools or []:
+        arguments = tool.get("tool_args") or {}
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except ValueError:
+                continue
+        found |= tickers_in(arguments)
+    return found
+
+
+def answer_cache_vector(query: str, session_id: str):
+    """
+    Embedding of a query for the answer cache, or None when the session already has
+    history: follow-up questions only make sense together with it, so they neither
+    read nor fill the cache. Blocking.
+    """
+    session = agent_storage.read(session_id)
+    if session is not None and (session.memory or {}).get("runs"):
+        return None
+    return semantic_cache.vector(query)
+
+
+async def cached_answer(request: QueryItem, user_id: str, session_id: str):
+    """
+    (cached answer or None, query embedding to store the fresh answer under or None).
+    Answers are only shared between turns of the same user.
+    """
+    if semantic_cache is None or not request.use_cache:
+        return None, None
+    loop = asyncio.get_running_loop()
+    try:
+        vector = await loop.run_in_executor(
+            calculation_executor, in_context(answer_cache_vector), request.query, session_id
+        )
+    except Exception as e:
+        logger.error(f"Failed to embed query for the answer cache: {str(e)}")
+        return None, None
+    if vector is None:
+        return None, None
+    return semantic_cache.lookup(vector, scope=user_id), vector
+
+
+def build_agent(user_id: str, session_id: str, context: Optional[str]) -> Agent:
+    """
+    A fresh agent for one turn; cheap because model client, memory DB and storage are shared.
+    """
+    return Agent(
+        name="Financial asset recommender",
+        model=OpenAIChat(id=MODEL,
+                         api_key=OPENAI_API_KEY,
+                         client=openai_client),
+        tools=agent_tools,
+        # Memories and summaries are read here but written by memory_worker after the response
+        memory=AgentMemory(
+            db=memory_db,
+            create_user_memories=True,
+            update_user_memories_after_run=False,
+            create_session_summary=True,
+            update_session_summary_after_run=False
+        ),
+        storage=agent_storage,
+        instructions=instruction_list,
+        guidelines=guideline_list,
+        additional_context=context,
+        session_id=session_id,
+        user_id=user_id,
+        markdown=False,
+        show_tool_calls=True,
+        read_chat_history=True,
+        add_history_to_messages=True,
+        num_history_responses=3,
+        debug_mode=False,
+        prevent_prompt_leakage=True
+    )
+
+
+def memory_model() -> OpenAIChat:
+    return OpenAIChat(id=MODEL, api_key=OPENAI_API_KEY, client=openai_client)
+
+
+def update_user_memories(user_id: str, messages: list[str]) -> None:
+    """
+    Extract long-term memories from all new messages of a user with one classifier and manager pass.
+    """
+    memory = AgentMemory(
+        db=memory_db,
+        user_id=user_id,
         create_user_memories=True,
-        create_session_summary=True
-    ),
-    storage=PgAgentStorage(
-        table_name="global_user_sessions_",
-        db_url=DB_URL
-    ),
-    instructions=instruction_list,
-    guidelines=guideline_list,
-    session_id=str(uuid.uuid4()),
-    user_id="global_agent",
-    markdown=False,
-    show_tool_calls=True,
-    read_chat_history=True,
-    add_history_to_messages=True,
-    num_history_responses=3,
-    debug_mode=False,
-    prevent_prompt_leakage=True
+        classifier=MemoryClassifier(model=memory_model()),
+        manager=MemoryManager(model=memory_model(), user_id=user_id, db=memory_db),
+    )
+    memory.load_user_memories()
+    memory.update_memory(input="\n".join(messages))
+
+
+def update_session_summary(session_id: str) -> None:
+    """
+    Summarize the stored history window of a session and write the summary back.
+    """
+    session = agent_storage.read(session_id)
+    if session is None or not session.memory or not session.memory.get("runs"):
+        return
+    memory = AgentMemory(
+        runs=[AgentRun(**run) for run in session.memory["runs"]],
+        summarizer=MemorySummarizer(model=memory_model()),
+    )
+    summary = memory.update_summary()
+    if summary is None:
+        return
+    # Re-read so runs stored while the summary was generated are kept
+    latest = agent_storage.read(session_id) or session
+    latest.memory = {**(latest.memory or {}), "summary": summary.to_dict()}
+    agent_storage.upsert(latest)
+
+
+memory_worker = MemoryWorker(
+    update_user_memories,
+    update_session_summary,
+    batch_size=MEMORY_BATCH_SIZE,
+    batch_window=MEMORY_BATCH_WINDOW,
 )
 
 
+def turn_timings(timings: dict, response=None) -> dict:
+    """
+    Per-turn latency breakdown in milliseconds; 'model' is the LLM time inside 'agent',
+    'other' is tools plus history and storage.
+    """
+    breakdown = {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+    metrics = getattr(response, "metrics", None) or {}
+    if "agent" in breakdown and metrics.get("time"):
+        breakdown["model"] = round(sum(metrics["time"]) * 1000, 1)
+        breakdown["other"] = round(breakdown["agent"] - breakdown["model"], 1)
+    return breakdown
+
+
+def server_timing(breakdown: dict) -> str:
+    return ", ".join(f"{name};dur={value}" for name, value in breakdown.items())
+
+
+agent_pool = AgentPool(
+    build_agent,
+    max_concurrency=AGENT_CONCURRENCY,
+    max_waiting=AGENT_MAX_WAITING,
+    wait_timeout=AGENT_WAIT_TIMEOUT,
+)
+
 
 @app.post("/v1/query")
 async def query_agent(request: QueryItem):
     logger.info(f"Query received: {request.query}")
+    user_id = request.user_id or str(uuid.uuid4())
+    session_id = request.session_id or str(uuid.uuid4())
+    started = time.perf_counter()
+    cached, vector = await cached_answer(request, user_id, session_id)
+    timings = {"cache": time.perf_counter() - started}
+    if cached is not None:
+        logger.info(f"Query answered from cache (similarity {cached['score']:.3f})")
+        return JSONResponse(content=cached["answer"], headers={"X-Cache": "hit", "Server-Timing": server_timing(turn_timings(timings))})
     try:
-        # Update agent with new user ID and session ID
-        agent.additional_context = f"current datetime is: {str(datetime.datetime.now())}"
-        agent.user_id = request.user_id or str(uuid.uuid4())
-        agent.session_id = request.session_id or str(uuid.uuid4())
-
-        # Add logic to process the query using the agent
-        response = agent.run(f"{request.query}")
-        logger.info("Query processed successfully.")
-        return JSONResponse(content=response.content)
+        response = await agent_pool.run(
+            user_id,
+            session_id,
+            f"{request.query}",
+            context=f"current datetime is: {str(datetime.datetime.now())}",
+            timings=timings
+        )
+        memory_worker.submit(user_id, session_id, request.query)
+        if vector is not None and response.content:
+            semantic_cache.store(request.query, vector, response.content, answer_tickers(response.tools), scope=user_id)
+        breakdown = turn_timings(timings, response)
+        logger.info(f"Query processed successfully. Timings (ms): {breakdown}")
+        return JSONResponse(content=response.content, headers={"Server-Timing": server_timing(breakdown)})
+    except AgentPoolBusy as e:
+        logger.warning(f"Query rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Error initiating query: {str(e)}")
         raise HTTPException(status_code=500, detail="Error initiating request processing")
 
 
+# phidata run events forwarded to streaming clients, by the name they are sent under
+STREAM_EVENTS = {
+    RunEvent.run_started.value: "start",
+    RunEvent.run_response.value: "token",
+    RunEvent.tool_call_started.value: "tool_call_started",
+    RunEvent.tool_call_completed.value: "tool_call_completed",
+    RunEvent.run_completed.value: "done",
+}
+
+
+def stream_event(event: str, **fields) -> str:
+    return json.dumps({"event": event, **fields}, default=str) + "\n"
+
+
+@app.post("/v1/query/stream")
+async def query_agent_stream(request: QueryItem):
+    """
+    Same as /v1/query, but streams the turn as newline-delimited JSON events:
+    start, token (content is the next piece of the answer), tool_call_started,
+    tool_call_completed, then done (full answer) or error.
+    """
+    logger.info(f"Streaming query received: {request.query}")
+    user_id = request.user_id or str(uuid.uuid4())
+    session_id = request.session_id or str(uuid.uuid4())
+    started = time.perf_counter()
+    cached, vector = await cached_answer(request, user_id, session_id)
+    timings = {"cache": time.perf_counter() - started}
+    if cached is not None:
+        logger.info(f"Streaming query answered from cache (similarity {cached['score']:.3f})")
+
+        async def cached_events():
+            yield stream_event("start", user_id=user_id, session_id=session_id, cached=True)
+            yield stream_event("token", content=cached["answer"])
+            yield stream_event("done", content=cached["answer"], cached=True)
+
+        return StreamingResponse(cached_events(), media_type="application/x-ndjson")
+    try:
+        chunks = await agent_pool.stream(
+            user_id,
+            session_id,
+            f"{request.query}",
+            context=f"current datetime is: {str(datetime.datetime.now())}",
+            timings=timings
+        )
+    except AgentPoolBusy as e:
+        logger.warning(f"Query rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    async def events():
+        started = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                event = STREAM_EVENTS.get(chunk.event)
+                if event == "token" and not chunk.content:
+                    continue
+                if event == "token" and "first_token" not in timings:
+                    timings["first_token"] = time.perf_counter() - started
+                if event == "start":
+                    yield stream_event(event, user_id=user_id, session_id=session_id)
+                elif event == "done":
+                    timings["agent"] = time.perf_counter() - started
+                    memory_worker.submit(user_id, session_id, request.query)
+                    if vector is not None and chunk.content:
+                        semantic_cache.store(request.query, vector, chunk.content, answer_tickers(chunk.tools), scope=user_id)
+                    yield stream_event(event, content=chunk.content, timings=turn_timings(timings, chunk))
+                elif event is not None:
+                    yield stream_event(event, content=chunk.content)
+            logger.info(f"Streaming query processed successfully. Timings (ms): {turn_timings(timings)}")
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield stream_event("error", detail="Error processing request")
+        finally:
+            # Stops the agent run at its next chunk if the client went away
+            await chunks.aclose()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+class CacheInvalidationRequest(BaseModel):
+    """
+    Tickers whose cached tool results and answers should be dropped; empty drops everything.
+    """
+    tickers: list[str] = []
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit rates of the tool-result cache and, when enabled, the semantic answer cache.
+    """
+    return {
+        "tools": tool_cache.stats(),
+        "answers": semantic_cache.stats() if semantic_cache is not None else None,
+    }
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(request: CacheInvalidationRequest):
+    return {"removed": invalidate_caches(request.tickers or None)}
+
+
+@app.get("/ohlc_cache/stats")
+async def get_ohlc_cache_stats():
+    """
+    Hit/miss counters, empty upstream responses and disk usage of the local candle cache.
+    """
+    return ohlc_cache.stats()
+
+
+@app.get("/memory/stats")
+async def get_memory_stats():
+    """
+    Background memory/summary worker progress and the session history cache.
+    """
+    return {"worker": memory_worker.stats(), "history": agent_storage.stats()}
+
+
+@app.get("/agent_pool/stats")
+async def get_agent_pool_stats():
+    """
+    Running, waiting, completed and rejected agent turns.
+    """
+    return agent_pool.stats()
+
+
 
 # ------------------------------------------------------------------
 # Endpoint for feature calculation and data gathering
@@ -130,43 +495,69 @@ class MainData(BaseModel):
 # --------------------------------------------------------------------------
 # Helpers to store daily candlestick data and computed features
 # --------------------------------------------------------------------------
-def store_daily_data(df: pd.DataFrame, ticker: str) -> None:
+def store_daily_data(df: pd.DataFrame, ticker: str) -> list[dict]:
+    """
+    Send the candles in `df` to the data service as columnar chunks of
+    RAW_DATA_CHUNK_SIZE rows and return one report per chunk.
+    """
     logger.info(f"Storing daily data for ticker: {ticker}")
-    df = df.reset_index()  # Typically adds a 'Date' column if df is from yfinance
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance keys single-ticker frames as (Price, Ticker)
+        df = df.xs(ticker, axis=1, level=-1)
+    df = df.reset_index().dropna(subset=["Open", "High", "Low", "Close", "Volume"])
 
-    for _, row in df.iterrows():
+    columns = {
+        "date_time": df["Date"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist(),
+        "open": df["Open"].astype(float).tolist(),
+        "high": df["High"].astype(float).tolist(),
+        "low": df["Low"].astype(float).tolist(),
+        "close": df["Close"].astype(float).tolist(),
+        "volume": df["Volume"].astype(float).tolist(),
+    }
+
+    reports = []
+    for chunk_start in range(0, len(df), RAW_DATA_CHUNK_SIZE):
+        chunk_end = chunk_start + RAW_DATA_CHUNK_SIZE
+        batch = {"ticker": ticker}
+        batch.update({name: values[chunk_start:chunk_end] for name, values in columns.items()})
+        rows = len(batch["date_time"])
+        report = {"chunk": len(reports), "rows": rows, "inserted": 0, "updated": 0, "failed": rows}
         try:
-            data = MainData(
-                ticker=ticker,
-                date_time=row["Date"],
-                open=float(row["Open"]),
-                high=float(row["High"]),
-                low=float(row["Low"]),
-                close=float(row["Close"]),
-                volume=float(row["Volume"])
-            )
-            logger.info(f"Sending raw data to API for {ticker} on {row['Date']}")
-            send_raw_data_to_api(data.model_dump())
+            response = send_raw_data_batch_to_api(batch)
+            response.raise_for_status()
+            body = response.json()
+            if "error" in body:
+                raise RuntimeError(body["error"])
+            report["inserted"] = body.get("inserted", 0)
+            report["updated"] = body.get("updated", 0)
+            report["failed"] = body.get("failed", 0)
+            logger.info(f"Stored chunk {report['chunk']} for {ticker}: {report['inserted']} inserted, {report['updated']} updated of {rows}")
         except Exception as e:
-            logger.error(f"Failed to store raw data for {ticker}: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Failed to store raw data: {str(e)}")
-    
+            report["error"] = str(e)
+            logger.error(f"Failed to store chunk {report['chunk']} of raw data for {ticker}: {str(e)}")
+        reports.append(report)
+
+    if any("error" in report for report in reports):
+        raise HTTPException(status_code=400, detail={"message": "Failed to store raw data", "chunks": reports})
+
     logger.info(f"Finished storing daily data for {ticker}")
+    return reports
 
 
-def store_computed_features(ticker: str, features_dict: dict) -> None:
+def store_computed_features(ticker: str, features_dict: dict, start_date: str, end_date: str) -> None:
     logger.info(f"Storing computed features for ticker: {ticker}")
-    
-    doc_id = f"{ticker}_features_{datetime.datetime.utcnow().isoformat()}"
-    text_content = str(features_dict)
 
-    payload = {
-        "id": doc_id,
-        "text": text_content
+    # One point per (ticker, as-of date, window) with the metrics as payload fields
+    document = {
+        "ticker": ticker,
+        "start_date": start_date,
+        "end_date": end_date,
+        "features": features_dict
     }
     try:
         logger.info(f"Sending computed features for {ticker} to vector store")
-        send_features_to_api(payload)
+        response = send_feature_vectors_to_api([document])
+        response.raise_for_status()
     except Exception as e:
         logger.error(f"Failed to store computed features for {ticker}: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Failed to store computed features: {str(e)}")
@@ -197,45 +588,499 @@ def resolve_dates(
     return resolved_start, resolved_end
 
 
-@app.post("/perform_calculations")
-async def perform_calculations_for_ticker(request: TickerRequest):
-    logger.info(f"Received calculation request for ticker: {request.ticker}")
-    
-    ticker = request.ticker
-    start_date, end_date = resolve_dates(request.start_date, request.end_date)
-    
+def calculate_ticker(ticker: str, start_date: str, end_date: str) -> dict:
+    """
+    Fetch and compute one ticker. Blocking; run it in calculation_executor.
+    """
     logger.info(f"Fetching candlestick data for {ticker} from {start_date} to {end_date}")
     df = fetch_candlestick_data(ticker, start_date, end_date)
     if df.empty:
         logger.error(f"No data found for {ticker} between {start_date} and {end_date}")
         raise HTTPException(status_code=404, detail=f"No data found for {ticker} between {start_date} and {end_date}")
-
-    if request.store_raw:
-        logger.info(f"Storing raw candlestick data for {ticker}")
-        store_daily_data(df, ticker)
     
     logger.info(f"Performing calculations for {ticker}")
-    calculations_str = perform_calculations_for_tickers(
-        ticker, start_date, end_date
-    )
-    
-    import ast
-    try:
-        calculations = ast.literal_eval(calculations_str)
-        logger.info(f"Calculations completed successfully for {ticker}")
-    except Exception as e:
-        logger.error(f"Failed to parse calculations for {ticker}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to parse calculations: {str(e)}")
-    
-    if request.store_features:
-        ticker_features = calculations.get(ticker, {})
-        logger.info(f"Storing computed features for {ticker}")
-        store_computed_features(ticker, ticker_features)
-    
-    logger.info(f"Completed processing request for {ticker}")
+    calculations = calculate_metrics(df, ticker)
+    logger.info(f"Calculations completed successfully for {ticker}")
     return {
         "ticker": ticker,
         "start_date": start_date,
         "end_date": end_date,
         "calculations": calculations
     }
+
+
+def persistence_items(result: dict, store_raw: bool, store_features: bool) -> list[dict]:
+    """
+    Job items that store the raw candles and/or computed features of a calculate_ticker result.
+    """
+    ticker = result["ticker"]
+    items = []
+    if store_raw:
+        items.append({
+            "kind": "store_raw",
+            "ticker": ticker,
+            "start_date": result["start_date"],
+            "end_date": result["end_date"]
+        })
+    if store_features:
+        items.append({
+            "kind": "store_features",
+            "ticker": ticker,
+            "start_date": result["start_date"],
+            "end_date": result["end_date"],
+            "features": result["calculations"].get(ticker, {})
+        })
+        # New features also refresh this ticker's entry in the similarity index
+        items.append({
+            "kind": "index_similarity",
+            "ticker": ticker,
+            "start_date": result["start_date"],
+            "end_date": result["end_date"]
+        })
+    return items
+
+
+def run_store_raw_item(item: dict) -> None:
+    # The OHLC cache makes re-reading the range cheap and keeps job payloads small
+    df = fetch_candlestick_data(item["ticker"], item["start_date"], item["end_date"])
+    store_daily_data(df, item["ticker"])
+    invalidate_caches([item["ticker"]])
+
+
+def run_store_features_item(item: dict) -> None:
+    # Store every registered metric so the numeric feature-vector collection is fully populated
+    df = fetch_candlestick_data(item["ticker"], item["start_date"], item["end_date"])
+    features = calculate_metrics(df, item["ticker"], features=list(FEATURES)).get(item["ticker"], {})
+    store_computed_features(item["ticker"], {**features, **item["features"]}, item["start_date"], item["end_date"])
+    invalidate_caches([item["ticker"]])
+
+
+def run_index_similarity_item(item: dict) -> None:
+    update_similarity_index(item["ticker"], item["start_date"], item["end_date"]).raise_for_status()
+    # Any ticker's neighbours may have changed, not only this one's
+    invalidate_caches([item["ticker"]], tool="find_similar_assets")
+
+
+job_queue = JobQueue(
+    JobStore(JOB_DB_PATH),
+    handlers={
+        "store_raw": run_store_raw_item,
+        "store_features": run_store_features_item,
+        "index_similarity": run_index_similarity_item,
+    },
+    workers=JOB_WORKERS,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    backoff=JOB_RETRY_BACKOFF,
+    lease=JOB_LEASE_SECONDS,
+)
+
+
+@app.post("/perform_calculations")
+async def perform_calculations_for_ticker(request: TickerRequest):
+    logger.info(f"Received calculation request for ticker: {request.ticker}")
+    
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        calculation_executor, in_context(calculate_ticker), request.ticker, start_date, end_date
+    )
+
+    items = persistence_items(result, request.store_raw, request.store_features)
+    if items:
+        result["job_id"] = job_queue.submit(items)
+        logger.info(f"Queued storage job {result['job_id']} for {request.ticker}")
+    return result
+
+
+@app.get("/http_client/stats")
+async def get_http_client_stats():
+    """
+    Connection pool utilization and request counters per upstream service.
+    """
+    return {"sync": http_client.stats(), "async": async_http_client.stats()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status, progress and per-item failures of a background storage job.
+    """
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+class BatchTickerRequest(BaseModel):
+    """
+    Model for a multi-ticker calculation request; give either tickers or a watchlist name.
+    """
+    tickers: list[str] = []
+    watchlist: Optional[str] = None
+    start_date: Optional[str] = None  # 'YYYY-MM-DD'
+    end_date: Optional[str] = None    # 'YYYY-MM-DD'
+    store_raw: bool = False
+    store_features: bool = False
+
+
+def load_watchlists() -> dict[str, list[str]]:
+    if not WATCHLIST_FILE or not os.path.exists(WATCHLIST_FILE):
+        return {}
+    with open(WATCHLIST_FILE) as f:
+        return json.load(f)
+
+
+def resolve_tickers(tickers: list[str], watchlist: Optional[str]) -> list[str]:
+    """
+    The given tickers followed by the watchlist's, without duplicates.
+    """
+    tickers = list(tickers)
+    if watchlist:
+        watchlists = load_watchlists()
+        if watchlist not in watchlists:
+            raise HTTPException(status_code=404, detail=f"Unknown watchlist {watchlist}")
+        tickers += watchlists[watchlist]
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers given")
+    return tickers
+
+
+@app.post("/perform_calculations/batch")
+async def perform_calculations_for_batch(request: BatchTickerRequest):
+    """
+    Fan fetch/compute out over many tickers with at most CALCULATION_CONCURRENCY
+    of them in flight and return per-ticker results and errors. Requested storage
+    for the successful tickers is queued as a single background job.
+    """
+    tickers = resolve_tickers(request.tickers, request.watchlist)
+
+    logger.info(f"Received batch calculation request for {len(tickers)} tickers")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(CALCULATION_CONCURRENCY)
+
+    async def run_one(ticker: str):
+        async with semaphore:
+            try:
+                result = await loop.run_in_executor(
+                    calculation_executor, in_context(calculate_ticker), ticker, start_date, end_date
+                )
+                return ticker, result, None
+            except HTTPException as e:
+                return ticker, None, e.detail
+            except Exception as e:
+                logger.error(f"Batch calculation failed for {ticker}: {str(e)}")
+                return ticker, None, str(e)
+
+    outcomes = await asyncio.gather(*(run_one(ticker) for ticker in tickers))
+    results = {ticker: result for ticker, result, error in outcomes if error is None}
+    errors = {ticker: error for ticker, result, error in outcomes if error is not None}
+    logger.info(f"Batch calculation finished: {len(results)} succeeded, {len(errors)} failed")
+
+    items = [
+        item
+        for result in results.values()
+        for item in persistence_items(result, request.store_raw, request.store_features)
+    ]
+    job_id = job_queue.submit(items) if items else None
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "results": results,
+        "errors": errors,
+        "job_id": job_id
+    }
+
+
+
+@app.get("/resolve_ticker")
+async def resolve_ticker_endpoint(q: str, limit: int = 5):
+    """
+    Ticker candidates for a company name, alias or ticker from the local symbol directory.
+    """
+    return {"query": q, "matches": symbol_index.resolve(q, limit)}
+
+
+@app.get("/similar_assets/{ticker}")
+async def get_similar_assets(ticker: str, k: int = 5):
+    """
+    Top-k tickers closest to `ticker` in the precomputed similarity index.
+    """
+    logger.info(f"Finding {k} assets similar to {ticker}")
+    response = await async_http_client.get(f"{VECTOR_DB_URL}/similar/{ticker}", params={"k": k})
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"{ticker} is not in the similarity index")
+    if response.is_error:
+        raise HTTPException(status_code=502, detail=f"Similarity search failed: {response.text}")
+    return response.json()
+
+
+@app.post("/similarity_index")
+async def build_similarity_index(request: BatchTickerRequest):
+    """
+    Compute and upsert similarity vectors for the given tickers (or watchlist) in one pass.
+    Existing entries of other tickers are kept, so the index grows incrementally.
+    """
+    tickers = resolve_tickers(request.tickers, request.watchlist)
+
+    logger.info(f"Indexing similarity vectors for {len(tickers)} tickers")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    try:
+        response = await loop.run_in_executor(
+            calculation_executor, in_context(update_similarity_index), tickers, start_date, end_date
+        )
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Failed to index similarity vectors: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to index similarity vectors: {str(e)}")
+    invalidate_caches(tickers, tool="find_similar_assets")
+    return {"start_date": start_date, "end_date": end_date, **response.json()}
+
+
+class PortfolioRequest(BaseModel):
+    """
+    Model for a portfolio optimization request; give tickers and/or a watchlist name.
+    """
+    tickers: list[str] = []
+    watchlist: Optional[str] = None
+    start_date: Optional[str] = None  # 'YYYY-MM-DD'
+    end_date: Optional[str] = None    # 'YYYY-MM-DD'
+    methods: list[str] = list(METHODS)
+    risk_aversion: Optional[float] = None
+    frontier_points: int = 20
+
+
+def build_portfolios(request: PortfolioRequest, tickers: list[str], start_date: str, end_date: str) -> dict:
+    df = fetch_candlestick_data(tickers, start_date, end_date)
+    return optimize(
+        df, tickers,
+        methods=request.methods,
+        risk_aversion=request.risk_aversion,
+        frontier_points=request.frontier_points,
+        risk_free_rate=RISK_FREE_RATE,
+    )
+
+
+@app.post("/portfolio/optimize")
+async def optimize_portfolio_endpoint(request: PortfolioRequest):
+    """
+    Minimum-variance, mean-variance, max-Sharpe, risk-parity and equal-weight
+    portfolios plus a sampled efficient frontier for the given tickers.
+    """
+    tickers = resolve_tickers(request.tickers, request.watchlist)
+    if len(tickers) < 2:
+        raise HTTPException(status_code=400, detail="A portfolio needs at least two tickers")
+
+    logger.info(f"Received portfolio optimization request for {len(tickers)} tickers")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            calculation_executor, in_context(build_portfolios), request, tickers, start_date, end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"start_date": start_date, "end_date": end_date, "tickers": tickers, **result}
+
+
+class ShockScenario(BaseModel):
+    name: Optional[str] = None
+    shocks: Dict[str, float]      # ticker -> return, e.g. {"AAPL": -0.2}
+    propagate: bool = True        # move unshocked tickers by their conditional expectation
+
+
+class RiskRequest(BaseModel):
+    """
+    Model for a VaR/CVaR request over one ticker or a weighted portfolio.
+    """
+    tickers: list[str] = []
+    watchlist: Optional[str] = None
+    weights: Optional[Dict[str, float]] = None
+    start_date: Optional[str] = None  # 'YYYY-MM-DD'
+    end_date: Optional[str] = None    # 'YYYY-MM-DD'
+    confidence: list[float] = [0.95, 0.99]
+    horizon_days: int = 1
+    paths: int = Field(100_000, ge=1, le=MAX_RISK_PATHS)
+    seed: int = 42
+    distribution: str = "normal"      # 'normal' or 't'
+    t_df: float = 5.0
+    scenarios: list[ShockScenario] = []
+
+
+def build_risk_report(request: RiskRequest, tickers: list[str], start_date: str, end_date: str) -> dict:
+    df = fetch_candlestick_data(tickers, start_date, end_date)
+    return risk_report(
+        df, tickers,
+        weights=request.weights,
+        confidence=request.confidence,
+        horizon=request.horizon_days,
+        paths=request.paths,
+        seed=request.seed,
+        distribution=request.distribution,
+        t_df=request.t_df,
+        scenarios=[scenario.model_dump() for scenario in request.scenarios],
+    )
+
+
+@app.post("/risk")
+async def compute_risk_endpoint(request: RiskRequest):
+    """
+    Historical, parametric and Monte Carlo VaR/CVaR plus stress scenarios. The
+    simulation is split into seeded chunks on the shared process pool.
+    """
+    tickers = resolve_tickers(request.tickers, request.watchlist)
+    if request.weights:
+        tickers = list(dict.fromkeys(tickers + list(request.weights)))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers given")
+    if any(not 0 < level < 1 for level in request.confidence) or request.horizon_days < 1:
+        raise HTTPException(status_code=400, detail="confidence must be in (0, 1) and horizon_days >= 1")
+
+    logger.info(f"Received risk request for {len(tickers)} tickers with {request.paths} paths")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    try:
+        report = await loop.run_in_executor(
+            calculation_executor, in_context(build_risk_report), request, tickers, start_date, end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"start_date": start_date, "end_date": end_date, **report}
+
+
+class BacktestRequest(BaseModel):
+    """
+    Model for a backtest: one strategy with an optional parameter grid, or explicit variants.
+    Each variant is {"strategy", "params", "rebalance", "cost_bps"}.
+    """
+    tickers: list[str] = []
+    watchlist: Optional[str] = None
+    start_date: Optional[str] = None  # 'YYYY-MM-DD'
+    end_date: Optional[str] = None    # 'YYYY-MM-DD'
+    strategy: str = "equal_weight"
+    params: Dict[str, Any] = {}
+    param_grid: Dict[str, list] = {}
+    rebalance: Union[str, int] = "M"
+    cost_bps: float = 5.0
+    variants: list[Dict[str, Any]] = []
+    walk_forward: bool = False
+    train_days: int = 504
+    test_days: int = 126
+    include_equity: bool = True
+
+
+def equity_curve(returns) -> dict:
+    equity = (1 + returns).cumprod()
+    return {"dates": [day.strftime('%Y-%m-%d') for day in equity.index], "values": equity.round(6).tolist()}
+
+
+def run_backtest(request: BacktestRequest, tickers: list[str], start_date: str, end_date: str) -> dict:
+    close = load_close_matrix(tickers, start_date, end_date)
+    variants = request.variants or [
+        {**variant, "params": {**request.params, **variant["params"]}}
+        for variant in expand_grid(request.strategy, request.param_grid, request.rebalance, request.cost_bps)
+    ]
+    if request.walk_forward:
+        result = walk_forward(close, variants, request.train_days, request.test_days)
+        returns = result.pop("returns")
+        if request.include_equity:
+            result["equity"] = equity_curve(returns)
+        return result
+
+    results = run_variants(close, variants, keep_returns=request.include_equity)
+    best = max(
+        range(len(results)),
+        key=lambda i: results[i]["stats"]["sharpe"] if results[i]["stats"]["sharpe"] is not None else float("-inf")
+    )
+    response = {
+        "variants": [{"variant": variant, "stats": result["stats"]} for variant, result in zip(variants, results)],
+        "best": best,
+    }
+    if request.include_equity:
+        response["equity"] = equity_curve(results[best]["returns"])
+    return response
+
+
+@app.post("/backtest")
+async def backtest_endpoint(request: BacktestRequest):
+    """
+    Vectorized backtest of strategy variants (fanned out over the process pool),
+    or a walk-forward run with one process-pool task per window.
+    """
+    tickers = resolve_tickers(request.tickers, request.watchlist)
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers given")
+
+    logger.info(f"Received backtest request for {len(tickers)} tickers")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            calculation_executor, in_context(run_backtest), request, tickers, start_date, end_date
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"start_date": start_date, "end_date": end_date, "tickers": tickers, **result}
+
+
+def apply_feature_update(ticker, start_date, end_date):
+    """
+    Load a ticker's feature state, fold in candles after its last date and store it; blocking.
+    Returns (state, number of candles applied).
+    """
+    try:
+        stored = load_feature_state_from_api(ticker)
+    except Exception as e:
+        logger.error(f"Failed to load feature state for {ticker}: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to load feature state: {str(e)}")
+
+    state = IncrementalFeatureState.from_dict(stored) if stored else IncrementalFeatureState(ticker)
+    # The end is exclusive, so today's still-open candle never enters the running statistics
+    end_date = min(end_date, datetime.date.today().strftime('%Y-%m-%d'))
+    if state.last_date:
+        start_date = (datetime.datetime.strptime(state.last_date, '%Y-%m-%d') + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+
+    applied = 0
+    if start_date < end_date:
+        df = fetch_candlestick_data(ticker, start_date, end_date)
+        applied = state.update(df)
+
+    if state.last_date is None:
+        raise HTTPException(status_code=404, detail=f"No data found for {ticker} between {start_date} and {end_date}")
+
+    if applied:
+        try:
+            send_feature_state_to_api(state.to_dict()).raise_for_status()
+        except Exception as e:
+            logger.error(f"Failed to store feature state for {ticker}: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"Failed to store feature state: {str(e)}")
+    return state, applied
+
+
+@app.post("/update_features")
+async def update_features_for_ticker(request: TickerRequest):
+    """
+    Bring the stored incremental feature state of a ticker up to end_date,
+    fetching and folding in only the candles newer than the state.
+    start_date only seeds the history of a ticker that has no state yet.
+    """
+    ticker = request.ticker
+    logger.info(f"Received incremental feature update for ticker: {ticker}")
+    start_date, end_date = resolve_dates(request.start_date, request.end_date)
+
+    loop = asyncio.get_running_loop()
+    state, applied = await loop.run_in_executor(
+        calculation_executor, in_context(apply_feature_update), ticker, start_date, end_date
+    )
+    if applied:
+        invalidate_caches([ticker])
+
+    logger.info(f"Applied {applied} new candles to feature state of {ticker}")
+    return {
+        "ticker": ticker,
+        "as_of": state.last_date,
+        "new_rows": applied,
+        "features": state.features(risk_free_rate=RISK_FREE_RATE)
+    }
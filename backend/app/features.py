@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# name -> function(FeatureInputs) -> pd.Series indexed by ticker
+FEATURES = {}
+
+
+def register_feature(name):
+    """Register a per-ticker feature under `name` so callers can request it by name."""
+    def decorator(func):
+        FEATURES[name] = func
+        return func
+    return decorator
+
+
+def price_matrix(df, field, tickers):
+    """Extract one OHLCV field from a yfinance-shaped frame as one column per ticker.
+
+    Args:
+        df (pd.DataFrame): Flat frame for one ticker or (Price, Ticker) MultiIndex frame.
+        field (str): 'Open', 'High', 'Low', 'Close' or 'Volume'.
+        tickers (list of str): Tickers to keep, in order.
+
+    Returns:
+        pd.DataFrame: Values indexed by date with one column per ticker.
+    """
+    values = df[field]
+    if isinstance(values, pd.Series):
+        values = values.to_frame(name=tickers[0])
+    return values[tickers].astype(float)
+
+
+def matrix_returns(close):
+    """Daily returns per column, measured between each column's own valid prices."""
+    return close.ffill().pct_change(fill_method=None).where(close.notna())
+
+
+class FeatureInputs:
+    """Price matrices shared by every feature so each is computed once per request."""
+
+    def __init__(self, df, tickers, benchmark_close=None, risk_free_rate=0.0):
+        self.tickers = list(tickers)
+        self.close = price_matrix(df, 'Close', self.tickers)
+        self.returns = matrix_returns(self.close)
+        self.risk_free_rate = risk_free_rate
+        self.benchmark_returns = None
+        if benchmark_close is not None:
+            benchmark_close = benchmark_close.reindex(self.close.index)
+            self.benchmark_returns = benchmark_close.ffill().pct_change(fill_method=None).where(benchmark_close.notna())
+
+        fields = df.columns.get_level_values(0) if isinstance(df.columns, pd.MultiIndex) else df.columns
+        self.high = price_matrix(df, 'High', self.tickers) if 'High' in fields else None
+        self.low = price_matrix(df, 'Low', self.tickers) if 'Low' in fields else None
+
+
+def _rolling_volatility(inputs, window):
+    rolling = inputs.returns.rolling(window, min_periods=window).std()
+    return rolling.ffill().iloc[-1] * np.sqrt(TRADING_DAYS)
+
+
+def _momentum(inputs, window):
+    close = inputs.close.ffill()
+    if len(close) <= window:
+        return pd.Series(np.nan, index=inputs.tickers)
+    return close.iloc[-1] / close.iloc[-1 - window] - 1
+
+
+@register_feature('volatility')
+def volatility(inputs):
+    return inputs.returns.std() * np.sqrt(TRADING_DAYS)
+
+
+@register_feature('risk')
+def risk(inputs):
+    return volatility(inputs)
+
+
+@register_feature('annualized_return')
+def annualized_return(inputs):
+    return inputs.returns.mean() * TRADING_DAYS
+
+
+@register_feature('volatility_21d')
+def volatility_21d(inputs):
+    return _rolling_volatility(inputs, 21)
+
+
+@register_feature('volatility_63d')
+def volatility_63d(inputs):
+    return _rolling_volatility(inputs, 63)
+
+
+@register_feature('max_drawdown')
+def max_drawdown(inputs):
+    return (inputs.close / inputs.close.cummax() - 1).min()
+
+
+@register_feature('sharpe')
+def sharpe(inputs):
+    return (annualized_return(inputs) - inputs.risk_free_rate) / volatility(inputs)
+
+
+@register_feature('sortino')
+def sortino(inputs):
+    downside = inputs.returns.clip(upper=0)
+    downside_deviation = np.sqrt((downside ** 2).mean()) * np.sqrt(TRADING_DAYS)
+    return (annualized_return(inputs) - inputs.risk_free_rate) / downside_deviation
+
+
+@register_feature('beta')
+def beta(inputs):
+    if inputs.benchmark_returns is None:
+        return pd.Series(np.nan, index=inputs.tickers)
+    returns = inputs.returns.to_numpy()
+    benchmark = inputs.benchmark_returns.to_numpy()[:, None]
+    valid = ~np.isnan(returns) & ~np.isnan(benchmark)
+    count = valid.sum(axis=0)
+    r = np.where(valid, returns, 0.0)
+    b = np.where(valid, benchmark, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r_mean = r.sum(axis=0) / count
+        b_mean = b.sum(axis=0) / count
+        covariance = (np.where(valid, (r - r_mean) * (b - b_mean), 0.0)).sum(axis=0) / (count - 1)
+        variance = (np.where(valid, (b - b_mean) ** 2, 0.0)).sum(axis=0) / (count - 1)
+        return pd.Series(covariance / variance, index=inputs.tickers)
+
+
+@register_feature('momentum_21d')
+def momentum_21d(inputs):
+    return _momentum(inputs, 21)
+
+
+@register_feature('momentum_63d')
+def momentum_63d(inputs):
+    return _momentum(inputs, 63)
+
+
+@register_feature('momentum_252d')
+def momentum_252d(inputs):
+    return _momentum(inputs, 252)
+
+
+@register_feature('atr_14')
+def atr_14(inputs):
+    if inputs.high is None or inputs.low is None:
+        return pd.Series(np.nan, index=inputs.tickers)
+    previous_close = inputs.close.shift(1)
+    true_range = np.fmax(
+        inputs.high - inputs.low,
+        np.fmax((inputs.high - previous_close).abs(), (inputs.low - previous_close).abs())
+    )
+    return true_range.rolling(14, min_periods=14).mean().ffill().iloc[-1]
+
+
+def compute_features(df, tickers, features=None, benchmark_close=None, risk_free_rate=0.0):
+    """Compute registered features for every ticker in one vectorized pass per feature.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (str or list of str): Ticker symbols to compute features for.
+        features (list of str, optional): Feature names from FEATURES. Defaults to all of them.
+        benchmark_close (pd.Series, optional): Benchmark close prices, required for 'beta'.
+        risk_free_rate (float): Annual risk-free rate used by 'sharpe' and 'sortino'.
+
+    Returns:
+        dict: Mapping of ticker to {feature: float or None}.
+    """
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    names = list(FEATURES) if features is None else list(features)
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features {unknown}; available: {sorted(FEATURES)}")
+
+    inputs = FeatureInputs(df, tickers, benchmark_close=benchmark_close, risk_free_rate=risk_free_rate)
+    table = pd.DataFrame({name: FEATURES[name](inputs) for name in names}, index=tickers)
+    table = table.replace([np.inf, -np.inf], np.nan)
+    table = table.astype(object).where(table.notna(), None)
+    return {ticker: {name: (None if value is None else float(value)) for name, value in row.items()}
+            for ticker, row in table.iterrows()}
+
+
+def correlation_matrix(df, tickers):
+    """Pairwise correlation of daily returns across tickers.
+
+    Returns:
+        dict: Nested mapping ticker -> ticker -> correlation.
+    """
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    returns = matrix_returns(price_matrix(df, 'Close', tickers))
+    corr = returns.corr()
+    return corr.astype(object).where(corr.notna(), None).to_dict()
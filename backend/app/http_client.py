@@ -0,0 +1,218 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlsplit
+import httpx
+from instrumentation import timed, trace_headers
+
+# Retrying these is safe even for writes: the request never reached the server
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Retried only for idempotent methods
+RETRYABLE_ERRORS = CONNECT_ERRORS + (httpx.ReadTimeout, httpx.RemoteProtocolError)
+RETRYABLE_STATUS = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class HostStats:
+    """Request counters for one upstream host."""
+
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": self.in_flight / self.max_connections,
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+        }
+
+
+class _PoolBase:
+    """
+    Shared settings and bookkeeping for the sync and async pooled clients.
+
+    One underlying httpx client (and so one connection pool) is kept per
+    host, which is what gives each service its own connection limit.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host=20,
+        max_keepalive_per_host=10,
+        timeout=10.0,
+        connect_timeout=3.0,
+        retries=3,
+        backoff=0.2,
+        http2=False,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.http2 = http2
+        self._clients = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_connections_per_host=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20")),
+            max_keepalive_per_host=int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10")),
+            timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3")),
+            retries=int(os.getenv("HTTP_RETRIES", "3")),
+            backoff=float(os.getenv("HTTP_RETRY_BACKOFF", "0.2")),
+            http2=os.getenv("HTTP2", "false").lower() == "true",
+        )
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _client_for(self, url, factory):
+        host = self._host(url)
+        with self._lock:
+            if host not in self._clients:
+                self._clients[host] = factory(limits=self.limits, timeout=self.timeout, http2=self.http2)
+                self._stats[host] = HostStats(self.limits.max_connections)
+            return self._clients[host], self._stats[host]
+
+    def _should_retry(self, method, attempt, error=None, response=None):
+        if attempt >= self.retries:
+            return False
+        if error is not None:
+            return isinstance(error, CONNECT_ERRORS) or (
+                method in IDEMPOTENT_METHODS and isinstance(error, RETRYABLE_ERRORS)
+            )
+        return method in IDEMPOTENT_METHODS and response.status_code in RETRYABLE_STATUS
+
+    def _delay(self, attempt):
+        # Full jitter keeps retries from many workers from arriving in lockstep
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _begin(self, stats):
+        with self._lock:
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+
+    def _end(self, stats, failed):
+        with self._lock:
+            stats.in_flight -= 1
+            stats.errors += int(failed)
+
+    def stats(self):
+        """Per-host pool utilization and request counters."""
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+
+class PooledHTTPClient(_PoolBase):
+    """Thread-safe keep-alive HTTP client with per-host pools, timeouts and retries."""
+
+    def request(self, method, url, data=None, headers=None, params=None, timeout=None):
+        method = method.upper()
+        headers = trace_headers(headers)
+        client, stats = self._client_for(url, httpx.Client)
+        self._begin(stats)
+        failed = True
+        with timed("http_call"):
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        response = client.request(
+                            method, url, content=data, headers=headers, params=params,
+                            timeout=timeout or self.timeout
+                        )
+                    except httpx.TransportError as e:
+                        if not self._should_retry(method, attempt, error=e):
+                            raise
+                    else:
+                        if not self._should_retry(method, attempt, response=response):
+                            failed = response.is_server_error
+                            return response
+                        response.close()
+                    attempt += 1
+                    with self._lock:
+                        stats.retries += 1
+                    time.sleep(self._delay(attempt))
+            finally:
+                self._end(stats, failed)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+class AsyncPooledHTTPClient(_PoolBase):
+    """asyncio counterpart of PooledHTTPClient for use inside async endpoints."""
+
+    async def request(self, method, url, data=None, headers=None, params=None, timeout=None):
+        method = method.upper()
+        headers = trace_headers(headers)
+        client, stats = self._client_for(url, httpx.AsyncClient)
+        self._begin(stats)
+        failed = True
+        with timed("http_call"):
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        response = await client.request(
+                            method, url, content=data, headers=headers, params=params,
+                            timeout=timeout or self.timeout
+                        )
+                    except httpx.TransportError as e:
+                        if not self._should_retry(method, attempt, error=e):
+                            raise
+                    else:
+                        if not self._should_retry(method, attempt, response=response):
+                            failed = response.is_server_error
+                            return response
+                        await response.aclose()
+                    attempt += 1
+                    with self._lock:
+                        stats.retries += 1
+                    await asyncio.sleep(self._delay(attempt))
+            finally:
+                self._end(stats, failed)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+# Shared by every backend -> data/logging service call
+http_client = PooledHTTPClient.from_env()
+async_http_client = AsyncPooledHTTPClient.from_env()
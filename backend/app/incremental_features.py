@@ -0,0 +1,137 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from features import TRADING_DAYS
+
+ROLLING_WINDOWS = (21, 63)
+MOMENTUM_WINDOWS = (21, 63, 252)
+ATR_WINDOW = 14
+
+
+class IncrementalFeatureState:
+    """
+    Running statistics for one ticker that are updated in O(new rows).
+
+    Keeps a Welford mean/variance of daily returns, the running peak and
+    drawdown, and ring buffers holding just enough recent returns, closes and
+    true ranges for the rolling features. The values reported by features()
+    match features.compute_features over the same full history.
+    """
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.last_date = None
+        self.last_close = None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq_sum = 0.0
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.returns = deque(maxlen=max(ROLLING_WINDOWS))
+        self.closes = deque(maxlen=max(MOMENTUM_WINDOWS) + 1)
+        self.true_ranges = deque(maxlen=ATR_WINDOW)
+
+    def update(self, df):
+        """Fold candles newer than last_date into the state.
+
+        Args:
+            df (pd.DataFrame): Flat OHLCV frame for this ticker indexed by date.
+
+        Returns:
+            int: Number of candles applied.
+        """
+        if self.last_date is not None:
+            df = df[df.index > pd.Timestamp(self.last_date)]
+        df = df.dropna(subset=['Close'])
+
+        applied = 0
+        for date, high, low, close in zip(df.index, df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy()):
+            self._apply(float(high), float(low), float(close))
+            self.last_date = pd.Timestamp(date).strftime('%Y-%m-%d')
+            applied += 1
+        return applied
+
+    def _apply(self, high, low, close):
+        previous_close = self.last_close
+        if previous_close is not None:
+            daily_return = close / previous_close - 1
+            self.count += 1
+            delta = daily_return - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (daily_return - self.mean)
+            self.downside_sq_sum += min(daily_return, 0.0) ** 2
+            self.returns.append(daily_return)
+
+        if not (math.isnan(high) or math.isnan(low)):
+            true_range = high - low
+            if previous_close is not None:
+                true_range = max(true_range, abs(high - previous_close), abs(low - previous_close))
+            self.true_ranges.append(true_range)
+
+        self.peak = close if self.peak is None else max(self.peak, close)
+        self.max_drawdown = min(self.max_drawdown, close / self.peak - 1)
+        self.closes.append(close)
+        self.last_close = close
+
+    def features(self, risk_free_rate=0.0):
+        """Return the current feature values; undefined values are None."""
+        volatility = math.sqrt(self.m2 / (self.count - 1)) * math.sqrt(TRADING_DAYS) if self.count > 1 else None
+        annualized_return = self.mean * TRADING_DAYS if self.count else None
+        downside_deviation = math.sqrt(self.downside_sq_sum / self.count) * math.sqrt(TRADING_DAYS) if self.count else None
+
+        values = {
+            'risk': volatility,
+            'volatility': volatility,
+            'annualized_return': annualized_return,
+            'max_drawdown': self.max_drawdown if self.peak is not None else None,
+            'sharpe': _ratio(annualized_return, risk_free_rate, volatility),
+            'sortino': _ratio(annualized_return, risk_free_rate, downside_deviation),
+        }
+        recent_returns = np.fromiter(self.returns, dtype=float)
+        for window in ROLLING_WINDOWS:
+            values[f'volatility_{window}d'] = (
+                float(recent_returns[-window:].std(ddof=1) * math.sqrt(TRADING_DAYS))
+                if len(recent_returns) >= window else None
+            )
+        for window in MOMENTUM_WINDOWS:
+            values[f'momentum_{window}d'] = (
+                self.closes[-1] / self.closes[-1 - window] - 1 if len(self.closes) > window else None
+            )
+        values[f'atr_{ATR_WINDOW}'] = (
+            sum(self.true_ranges) / ATR_WINDOW if len(self.true_ranges) == ATR_WINDOW else None
+        )
+        return values
+
+    def to_dict(self):
+        return {
+            'ticker': self.ticker,
+            'last_date': self.last_date,
+            'last_close': self.last_close,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'downside_sq_sum': self.downside_sq_sum,
+            'peak': self.peak,
+            'max_drawdown': self.max_drawdown,
+            'returns': list(self.returns),
+            'closes': list(self.closes),
+            'true_ranges': list(self.true_ranges),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['ticker'])
+        for name in ('last_date', 'last_close', 'count', 'mean', 'm2', 'downside_sq_sum', 'peak', 'max_drawdown'):
+            setattr(state, name, data[name])
+        state.returns.extend(data['returns'])
+        state.closes.extend(data['closes'])
+        state.true_ranges.extend(data['true_ranges'])
+        return state
+
+
+def _ratio(annualized_return, risk_free_rate, deviation):
+    if annualized_return is None or not deviation:
+        return None
+    return (annualized_return - risk_free_rate) / deviation
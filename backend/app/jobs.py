@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import queue
+import random
+import socket
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("remote_logger")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    SQLite-backed job records so queued and running jobs survive a restart.
+    A job is an ordered list of items; each item is a JSON dict with a 'kind'.
+
+    The file may be shared by several worker processes: it runs in WAL mode with
+    a busy timeout, and a job is only run by the process that claimed it. A claim
+    is a lease that its owner keeps renewing; jobs whose lease ran out (their
+    process died) can be claimed again.
+    """
+
+    def __init__(self, path, busy_timeout=30.0):
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    items TEXT NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    failures TEXT NOT NULL DEFAULT '[]',
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    owner TEXT,
+                    lease_until REAL
+                )
+                """
+            )
+            # Job files created before leases existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def create(self, items):
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, items, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(items), now, now)
+            )
+        return job_id
+
+    def update(self, job_id, owner=None, **fields):
+        """Set `fields` of a job; with `owner`, only while that process still holds the job."""
+        if "failures" in fields:
+            fields["failures"] = json.dumps(fields["failures"])
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        condition, values = ("id = ?", (job_id,)) if owner is None else ("id = ? AND owner = ?", (job_id, owner))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f"UPDATE jobs SET {assignments} WHERE {condition}", (*fields.values(), *values))
+        return cursor.rowcount == 1
+
+    def claim(self, job_id, owner, lease):
+        """Atomically mark a queued (or abandoned) job as running for `owner`; False if someone else has it."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, owner = ?, lease_until = ?, updated = ?
+                WHERE id = ? AND (status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?)))
+                """,
+                (RUNNING, owner, now + lease, now, job_id, QUEUED, RUNNING, now)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, owner, lease):
+        """Extend the leases of every job `owner` is running."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?", (time.time() + lease, owner, RUNNING)
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, items, done, failures, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        items = json.loads(row[2])
+        return {
+            "id": row[0],
+            "status": row[1],
+            "items": items,
+            "total": len(items),
+            "done": row[3],
+            "failures": json.loads(row[4]),
+            "created": row[5],
+            "updated": row[6],
+        }
+
+    def claimable(self):
+        """Ids of queued jobs and of running jobs whose lease expired, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT id FROM jobs
+                WHERE status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?))
+                ORDER BY created
+                """,
+                (QUEUED, RUNNING, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class JobQueue:
+    """
+    Runs persisted jobs on background worker threads.
+
+    Every item is dispatched to handlers[item['kind']] and retried with
+    exponential backoff plus jitter; an item that still fails after
+    max_attempts is recorded in the job's failures and the job moves on.
+
+    A worker claims a job before running it, so with several processes on one
+    job file each job runs once. A heartbeat thread renews this process's leases
+    every lease / 3 seconds and picks up jobs that are still queued or whose
+    owner stopped renewing, which also resumes jobs of a previous process.
+    """
+
+    def __init__(self, store, handlers, workers=2, max_attempts=3, backoff=1.0, lease=60.0):
+        self.store = store
+        self.handlers = handlers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._workers.append(threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, items):
+        """Persist a job for `items` and queue it; returns the job id."""
+        job_id = self.store.create(items)
+        self._queue.put(job_id)
+        return job_id
+
+    def _heartbeat(self):
+        while True:
+            try:
+                self.store.renew(self.owner, self.lease)
+                for job_id in self.store.claimable():
+                    self._queue.put(job_id)
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {str(e)}")
+            time.sleep(self.lease / 3)
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {str(e)}")
+                self.store.update(job_id, owner=self.owner, status=FAILED)
+
+    def _process(self, job_id):
+        # Another process (or an earlier queue entry) may already have it
+        if not self.store.claim(job_id, self.owner, self.lease):
+            return
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        failures = job["failures"]
+
+        # Resume after the last item a previous run finished
+        for position in range(job["done"], job["total"]):
+            item = job["items"][position]
+            error = self._attempt(item)
+            if error is not None:
+                failures.append({"item": position, "kind": item.get("kind"), "ticker": item.get("ticker"), "error": error})
+            if not self.store.update(job_id, owner=self.owner, done=position + 1, failures=failures):
+                logger.warning(f"Lost the lease on job {job_id}; leaving it to its new owner")
+                return
+
+        self.store.update(job_id, owner=self.owner, status=FAILED if failures else SUCCEEDED)
+        logger.info(f"Job {job_id} finished with {len(failures)} failed items out of {job['total']}")
+
+    def _attempt(self, item):
+        handler = self.handlers.get(item.get("kind"))
+        if handler is None:
+            return f"No handler for job item kind {item.get('kind')}"
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                handler(item)
+                return None
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e)
+                if attempt == self.max_attempts:
+                    return error
+                delay = self.backoff * 2 ** (attempt - 1)
+                time.sleep(delay + random.uniform(0, delay))
@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+import pandas as pd
+import yfinance as yf
+from instrumentation import timed
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# A fetch whose last candle is this close to the end of its range covered the whole range;
+# the missing days are a weekend or holidays rather than a truncated response.
+SETTLE_DAYS = 5
+# yf.download keeps results in module-global state, so batched downloads must not overlap
+_download_lock = threading.Lock()
+
+
+class DataSource(ABC):
+    """Upstream provider of daily OHLCV candles."""
+
+    @abstractmethod
+    def fetch(self, ticker, start_date, end_date):
+        """Return candles in [start_date, end_date) indexed by a 'Date' DatetimeIndex.
+
+        Args:
+            ticker (str): Ticker symbol.
+            start_date (str): Inclusive start date in 'YYYY-MM-DD' format.
+            end_date (str): Exclusive end date in 'YYYY-MM-DD' format.
+
+        Returns:
+            pd.DataFrame: Frame with OHLC_COLUMNS.
+        """
+
+    def fetch_many(self, tickers, start_date, end_date):
+        """Return {ticker: candles} for several tickers; sources with a batch API override this."""
+        return {ticker: self.fetch(ticker, start_date, end_date) for ticker in tickers}
+
+
+class YFinanceSource(DataSource):
+    """Downloads candles from Yahoo Finance.
+
+    Single tickers use Ticker.history. Several tickers are fetched with one
+    yf.download call, whose results are collected in module-global state and can
+    get mixed up when several threads download at once, so those calls are serialized.
+    """
+
+    def fetch(self, ticker, start_date, end_date):
+        with timed("yfinance_fetch"):
+            df = yf.Ticker(ticker).history(start=start_date, end=end_date, auto_adjust=False)
+        return _normalize(df)
+
+    def fetch_many(self, tickers, start_date, end_date):
+        if len(tickers) == 1:
+            return {tickers[0]: self.fetch(tickers[0], start_date, end_date)}
+        with timed("yfinance_fetch"), _download_lock:
+            df = yf.download(
+                tickers, start=start_date, end=end_date, group_by="ticker",
+                auto_adjust=False, progress=False, threads=True,
+            )
+        available = set(df.columns.get_level_values(0)) if isinstance(df.columns, pd.MultiIndex) else set()
+        return {
+            ticker: _normalize(df[ticker].dropna(how="all") if ticker in available else pd.DataFrame())
+            for ticker in tickers
+        }
+
+
+class FixtureSource(DataSource):
+    """Reads candles from local '<ticker>.csv' files so tests and benchmarks run offline."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start_date, end_date):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return _normalize(pd.DataFrame())
+        df = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+        return _slice(_normalize(df), start_date, end_date)
+
+
+def _normalize(df):
+    """Coerce a provider frame to OHLC_COLUMNS on a sorted, tz-naive 'Date' index."""
+    if df.empty:
+        return pd.DataFrame(columns=OHLC_COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.droplevel(-1, axis=1)
+    df = df[OHLC_COLUMNS].astype(float)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.rename("Date")
+    return df.sort_index()
+
+
+def _slice(df, start_date, end_date):
+    return df[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
+
+
+def _subtract_ranges(start, end, covered):
+    """Return the parts of [start, end) not covered by the sorted, merged `covered` ranges."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for range_start, range_end in sorted(ranges):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+class OHLCCache:
+    """
+    Persistent per-ticker Parquet cache in front of a DataSource.
+
+    Every ticker keeps one '<ticker>.parquet' file plus the list of day ranges
+    that were already requested upstream, so weekends and holidays are not
+    refetched. A request only downloads the uncovered gaps and merges them in.
+    Today's (still open) candle is never marked as covered, and neither is a range
+    the source returned nothing for (providers answer rate limits and network errors
+    with an empty frame): such a range is only skipped for `empty_ttl` seconds.
+    Files are evicted least-recently-used first once the directory exceeds max_bytes.
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory, source=None, max_bytes=512 * 1024 * 1024, empty_ttl=900):
+        self.directory = directory
+        self.source = source or YFinanceSource()
+        self.max_bytes = max_bytes
+        self.empty_ttl = empty_ttl
+        self.empty_fetches = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._ticker_locks = {}
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._read_index()
+
+    # ---- index bookkeeping ----
+
+    def _read_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, ticker):
+        return os.path.join(self.directory, f"{ticker.replace('/', '_')}.parquet")
+
+    def _load(self, ticker):
+        path = self._path(ticker)
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        return _normalize(pd.DataFrame())
+
+    def _evict(self, keep):
+        """Drop least-recently-used tickers until the cache fits; caller holds self._lock."""
+        total = sum(entry.get("bytes", 0) for entry in self._index.values())
+        by_age = sorted(self._index.items(), key=lambda item: item[1].get("last_access", 0))
+        for ticker, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if ticker in keep:
+                continue
+            # A held ticker lock means another thread is between reading this ticker's
+            # coverage and its file; evicting now would hand it a truncated history
+            lock = self._ticker_lock(ticker)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                total -= entry.get("bytes", 0)
+                self._drop(ticker)
+            finally:
+                lock.release()
+
+    def _entry(self, ticker):
+        return self._index.setdefault(ticker, {"ranges": [], "empty": [], "bytes": 0, "last_access": 0})
+
+    def _gaps(self, ticker, start_date, end_date):
+        entry = self._entry(ticker)
+        now = time.time()
+        entry["empty"] = [empty for empty in entry.get("empty", []) if empty[2] > now]
+        skipped = entry["ranges"] + [empty[:2] for empty in entry["empty"]]
+        return _subtract_ranges(start_date, end_date, _merge_ranges(skipped))
+
+    def _settle(self, entry, gap, fetched):
+        """Record what a fetch of `gap` proved about upstream data."""
+        gap_start, gap_end = gap
+        today = datetime.date.today().strftime('%Y-%m-%d')
+        if gap_start >= today:
+            return
+        if fetched.empty:
+            self.empty_fetches += 1
+            entry["empty"].append([gap_start, gap_end, time.time() + self.empty_ttl])
+            return
+        settled_end = min(gap_end, today)
+        last = fetched.index.max()
+        if last + pd.Timedelta(days=SETTLE_DAYS) < pd.Timestamp(settled_end):
+            # Truncated response: only the part up to the last candle is known
+            settled_end = min(settled_end, (last + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+        entry["ranges"] = _merge_ranges(entry["ranges"] + [[gap_start, settled_end]])
+
+    # ---- public API ----
+
+    def get(self, ticker, start_date, end_date):
+        """Return cached candles for [start_date, end_date), fetching only the missing gaps.
+
+        Args:
+            ticker (str): Ticker symbol.
+            start_date (str): Inclusive start date in 'YYYY-MM-DD' format.
+            end_date (str): Exclusive end date in 'YYYY-MM-DD' format.
+
+        Returns:
+            pd.DataFrame: Frame with OHLC_COLUMNS indexed by 'Date'.
+        """
+        return self.get_many([ticker], start_date, end_date)[ticker]
+
+    def get_many(self, tickers, start_date, end_date):
+        """Like get() for several tickers; the ones with gaps are fetched in one batched call.
+
+        Returns:
+            dict: {ticker: pd.DataFrame} in the order of `tickers`.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        with ExitStack() as stack:
+            # Sorted so two overlapping batches cannot deadlock
+            for ticker in sorted(tickers):
+                stack.enter_context(self._ticker_lock(ticker))
+            with self._lock:
+                gaps = {ticker: self._gaps(ticker, start_date, end_date) for ticker in tickers}
+                missing = [ticker for ticker in tickers if gaps[ticker]]
+                self.misses += len(missing)
+                self.hits += len(tickers) - len(missing)
+
+            # Upstream downloads happen outside the shared lock so other tickers fetch in parallel
+            fetched = {}
+            if len(missing) == 1:
+                ticker = missing[0]
+                fetched[ticker] = [(gap, self.source.fetch(ticker, *gap)) for gap in gaps[ticker]]
+            elif missing:
+                span_start = min(gaps[ticker][0][0] for ticker in missing)
+                span_end = max(gaps[ticker][-1][1] for ticker in missing)
+                batch = self.source.fetch_many(missing, span_start, span_end)
+                for ticker in missing:
+                    fetched[ticker] = [(gap, _slice(batch[ticker], *gap)) for gap in gaps[ticker]]
+
+            frames = {}
+            for ticker in tickers:
+                frame = self._load(ticker)
+                new = [df for _, df in fetched.get(ticker, []) if not df.empty]
+                if new:
+                    frame = pd.concat([frame, *new])
+                    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                    frame.to_parquet(self._path(ticker))
+                frames[ticker] = _slice(frame, start_date, end_date)
+
+            with self._lock:
+                for ticker in tickers:
+                    entry = self._entry(ticker)
+                    for gap, df in fetched.get(ticker, []):
+                        self._settle(entry, gap, df)
+                    if os.path.exists(self._path(ticker)):
+                        entry["bytes"] = os.path.getsize(self._path(ticker))
+                    entry["last_access"] = time.time()
+                if missing:
+                    self._evict(keep=set(tickers))
+                self._write_index()
+            return frames
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker, threading.Lock())
+
+    def _drop(self, ticker):
+        self._index.pop(ticker, None)
+        path = self._path(ticker)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def invalidate(self, ticker):
+        """Drop a ticker's cached candles and coverage, waiting for any fetch of it to finish."""
+        with self._ticker_lock(ticker), self._lock:
+            self._drop(ticker)
+            self._write_index()
+
+    def stats(self):
+        """Return hit/miss counters and the current on-disk footprint."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "empty_fetches": self.empty_fetches,
+                "tickers": len(self._index),
+                "bytes": sum(entry.get("bytes", 0) for entry in self._index.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,36 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes for CPU-bound NumPy work (simulations, backtests); 0 or 1 runs in-process
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Forking a server that already runs log, job and pool threads can copy held locks into
+# the children, so workers start from a clean forkserver (or spawn) process instead
+PROCESS_START_METHOD = os.getenv("PROCESS_START_METHOD", "forkserver")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_pool():
+    """Shared process pool, created on first use; None when PROCESS_WORKERS <= 1."""
+    global _pool
+    if PROCESS_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(PROCESS_START_METHOD)
+            if PROCESS_START_METHOD == "forkserver":
+                # Imported once by the fork server instead of by every worker
+                context.set_forkserver_preload(["risk", "backtest"])
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=context)
+        return _pool
+
+
+def run_chunks(func, chunks):
+    """Map `func` over `chunks` on the process pool (or inline without one), keeping chunk order."""
+    pool = process_pool()
+    if pool is None or len(chunks) == 1:
+        return [func(chunk) for chunk in chunks]
+    return list(pool.map(func, chunks))
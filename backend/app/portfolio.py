@@ -0,0 +1,204 @@
+import numpy as np
+from features import TRADING_DAYS, matrix_returns, price_matrix
+
+METHODS = ('min_variance', 'mean_variance', 'max_sharpe', 'risk_parity', 'equal_weight')
+
+
+def estimate_moments(df, tickers, shrinkage=0.1):
+    """Annualized mean returns and covariance from the close matrix.
+
+    The sample covariance is shrunk towards its average variance on the diagonal
+    so it stays invertible and well conditioned when assets outnumber observations.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (list of str): Tickers, in the order used for the outputs.
+        shrinkage (float): Weight (0-1) of the diagonal target.
+
+    Returns:
+        tuple: (mu, cov, returns) with mu of shape (n,), cov of shape (n, n) and
+            the daily return matrix used to estimate them.
+    """
+    returns = matrix_returns(price_matrix(df, 'Close', tickers)).iloc[1:]
+    mu = returns.mean().to_numpy() * TRADING_DAYS
+    # pandas' pairwise-complete covariance tolerates tickers with shorter histories
+    sample = returns.cov().to_numpy() * TRADING_DAYS
+    sample = np.nan_to_num(sample)
+    target = np.eye(len(tickers)) * np.trace(sample) / len(tickers)
+    cov = (1 - shrinkage) * sample + shrinkage * target
+    return np.nan_to_num(mu), cov, returns
+
+
+def project_simplex(v):
+    """Euclidean projection of each row of `v` onto {w >= 0, sum(w) = 1}."""
+    v = np.atleast_2d(v)
+    u = -np.sort(-v, axis=1)
+    cssv = np.cumsum(u, axis=1) - 1
+    ks = np.arange(1, v.shape[1] + 1)
+    rho = np.count_nonzero(u - cssv / ks > 0, axis=1)
+    theta = cssv[np.arange(v.shape[0]), rho - 1] / rho
+    return np.maximum(v - theta[:, None], 0)
+
+
+def solve_mean_variance(mu, cov, risk_aversion, iterations=1000, tol=1e-9):
+    """Long-only, fully invested weights maximizing mu'w - gamma/2 w'Cw for every gamma at once.
+
+    Accelerated projected gradient (FISTA with restarts) on the simplex; all risk
+    aversions share each matrix product, so a whole frontier costs one
+    (G, n) x (n, n) product per step.
+
+    Args:
+        mu (np.ndarray): Expected returns, shape (n,).
+        cov (np.ndarray): Covariance, shape (n, n).
+        risk_aversion (float or array-like): One or more gamma values; np.inf gives
+            the minimum-variance portfolio.
+
+    Returns:
+        np.ndarray: Weights of shape (G, n), one row per risk aversion.
+    """
+    gammas = np.atleast_1d(np.asarray(risk_aversion, dtype=float))
+    n = len(mu)
+    # Minimum variance is the gamma -> inf limit: drop the return term and keep unit curvature
+    return_scale = np.where(np.isinf(gammas), 0.0, 1.0)[:, None]
+    curvature = np.where(np.isinf(gammas), 1.0, gammas)[:, None]
+    steps = 1.0 / np.maximum(np.linalg.eigvalsh(cov)[-1] * curvature, 1e-12)
+
+    weights = np.full((len(gammas), n), 1.0 / n)
+    momentum = weights
+    t = np.ones((len(gammas), 1))
+    for _ in range(iterations):
+        gradient = return_scale * mu - curvature * (momentum @ cov)
+        updated = project_simplex(momentum + steps * gradient)
+        change = updated - weights
+        if np.max(np.abs(change)) < tol:
+            return updated
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        # Restart a row's momentum once its objective stops improving
+        restart = np.sum(change * gradient, axis=1, keepdims=True) < 0
+        momentum = np.where(restart, updated, updated + ((t - 1) / t_next) * change)
+        t = np.where(restart, 1.0, t_next)
+        weights = updated
+    return weights
+
+
+def risk_parity_weights(cov, budgets=None, iterations=50, tol=1e-10):
+    """Long-only weights whose risk contributions w_i (Cw)_i / w'Cw match `budgets` (equal by default).
+
+    Minimizes the convex y'Cy / 2 - sum(b_i log y_i) with damped Newton steps
+    that keep y positive, then rescales the solution to sum to one.
+    """
+    n = cov.shape[0]
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+    weights = 1.0 / np.sqrt(np.maximum(np.diag(cov), 1e-12))
+    weights /= np.sqrt(weights @ cov @ weights)
+    for _ in range(iterations):
+        gradient = cov @ weights - budgets / weights
+        hessian = cov + np.diag(budgets / weights ** 2)
+        step = np.linalg.solve(hessian, gradient)
+        # Newton decrement; below tolerance the solution is accurate to ~tol
+        if gradient @ step < tol:
+            break
+        # Largest step keeping every weight positive
+        shrinking = step > 0
+        scale = min(1.0, 0.95 * float(np.min(weights[shrinking] / step[shrinking]))) if shrinking.any() else 1.0
+        weights = weights - scale * step
+    return weights / weights.sum()
+
+
+def portfolio_metrics(weights, mu, cov, tickers, risk_free_rate=0.0):
+    """Expected return, volatility, Sharpe ratio and per-asset risk contributions of one portfolio."""
+    variance = float(weights @ cov @ weights)
+    volatility = float(np.sqrt(max(variance, 0.0)))
+    expected_return = float(weights @ mu)
+    contributions = weights * (cov @ weights) / variance if variance > 0 else np.zeros_like(weights)
+    asset_volatility = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    return {
+        'expected_return': expected_return,
+        'volatility': volatility,
+        'sharpe': (expected_return - risk_free_rate) / volatility if volatility > 0 else None,
+        'diversification_ratio': float(weights @ asset_volatility) / volatility if volatility > 0 else None,
+        'effective_assets': float(1.0 / np.sum(weights ** 2)),
+        'risk_contributions': {t: float(c) for t, c in zip(tickers, contributions) if abs(c) > 1e-6},
+    }
+
+
+def frontier_gammas(mu, cov, points=20):
+    """Risk aversions sampling the long-only frontier from minimum variance towards the highest-return asset."""
+    if points < 1:
+        return np.array([])
+    # Around gamma ~ spread(mu) / average variance the optimum moves from concentrated to diversified
+    gammas = np.logspace(2, -2, points - 1) * _typical_gamma(mu, cov)
+    return np.concatenate([[np.inf], gammas])
+
+
+def _typical_gamma(mu, cov):
+    return max(float(np.ptp(mu)), 1e-6) / max(float(np.trace(cov)) / len(mu), 1e-12)
+
+
+def optimize(df, tickers, methods=METHODS, risk_aversion=None, frontier_points=0,
+             risk_free_rate=0.0, shrinkage=0.1):
+    """Build portfolios over `tickers` with each requested method.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (list of str): Candidate assets.
+        methods (iterable of str): Names from METHODS.
+        risk_aversion (float, optional): gamma for 'mean_variance'. Defaults to the
+            middle of the sampled frontier range.
+        frontier_points (int): Number of efficient-frontier points to sample (0 to skip).
+        risk_free_rate (float): Annual risk-free rate used for Sharpe ratios.
+        shrinkage (float): Covariance shrinkage towards the diagonal.
+
+    Returns:
+        dict: {'portfolios': {method: {'weights', 'metrics'}}, 'frontier': [...]}.
+    """
+    unknown = [method for method in methods if method not in METHODS]
+    if unknown:
+        raise ValueError(f"Unknown methods {unknown}; available: {list(METHODS)}")
+
+    tickers = list(tickers)
+    mu, cov, _ = estimate_moments(df, tickers, shrinkage=shrinkage)
+    n = len(tickers)
+
+    # Every mean-variance style portfolio comes out of one batched solve
+    points = frontier_points or (25 if 'max_sharpe' in methods else 0)
+    gammas = frontier_gammas(mu, cov, points)
+    if 'min_variance' in methods:
+        gammas = np.append(gammas, np.inf)
+    if 'mean_variance' in methods:
+        gammas = np.append(gammas, risk_aversion if risk_aversion is not None else _typical_gamma(mu, cov))
+    solved = solve_mean_variance(mu, cov, gammas) if len(gammas) else np.empty((0, n))
+    frontier = solved[:points]
+    frontier_returns = frontier @ mu
+    frontier_volatility = np.sqrt(np.maximum(np.einsum('gi,ij,gj->g', frontier, cov, frontier), 0.0))
+
+    weights = {}
+    if 'min_variance' in methods:
+        weights['min_variance'] = solved[points]
+    if 'mean_variance' in methods:
+        weights['mean_variance'] = solved[-1]
+    if 'max_sharpe' in methods:
+        sharpe = (frontier_returns - risk_free_rate) / np.maximum(frontier_volatility, 1e-12)
+        weights['max_sharpe'] = frontier[int(np.argmax(sharpe))]
+    if 'risk_parity' in methods:
+        weights['risk_parity'] = risk_parity_weights(cov)
+    if 'equal_weight' in methods:
+        weights['equal_weight'] = np.full(n, 1.0 / n)
+
+    return {
+        'portfolios': {
+            method: {
+                'weights': {t: float(w) for t, w in zip(tickers, values) if w > 1e-6},
+                'metrics': portfolio_metrics(values, mu, cov, tickers, risk_free_rate),
+            }
+            for method, values in weights.items()
+        },
+        'frontier': [
+            {
+                'expected_return': float(r),
+                'volatility': float(v),
+                'sharpe': float((r - risk_free_rate) / v) if v > 0 else None,
+            }
+            for r, v in zip(frontier_returns, frontier_volatility)
+        ] if frontier_points > 0 else [],
+    }
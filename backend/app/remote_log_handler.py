@@ -1,21 +1,63 @@
 # client/remote_log_handler.py
 import logging
 import json
+import queue
+import threading
+import time
 import requests
 
 class RemoteLogHandler(logging.Handler):
     """
-    A custom log handler that sends logs to a FastAPI server via HTTP POST.
+    A custom log handler that ships logs to a FastAPI server in batches.
+
+    emit() only formats the record and puts it on a bounded in-memory queue;
+    a background thread drains the queue and POSTs the records to the
+    logging service's /logs/batch endpoint, so callers never wait on the network.
+
+    overflow_policy decides what happens when the queue is full:
+      - "drop_newest": discard the incoming record (default)
+      - "drop_oldest": discard the oldest queued record to make room
+      - "block": wait until the worker frees a slot
     """
-    def __init__(self, endpoint_url: str):
+    OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        batch_url: str = None,
+        max_queue_size: int = 10000,
+        max_batch_size: int = 200,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop_newest",
+        timeout: float = 2,
+        session=None,
+    ):
         super().__init__()
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy {overflow_policy}")
+
         self.endpoint_url = endpoint_url
+        self.batch_url = batch_url or f"{(endpoint_url or '').rstrip('/')}/batch"
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.timeout = timeout
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        # A shared client (anything with a requests-style post()) can be passed in;
+        # otherwise the handler keeps its own keep-alive session.
+        self._owns_session = session is None
+        self._session = session or requests.Session()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="remote-log-shipper", daemon=True)
+        self._worker.start()
 
     def emit(self, record):
         try:
             # Format the log record
             log_entry = self.format(record)
-            
+
             # Construct the payload
             payload = {
                 "loggerName": record.name,
@@ -24,16 +66,80 @@ class RemoteLogHandler(logging.Handler):
                 "filename": record.filename,
                 "lineNo": record.lineno,
                 "created": record.created,  # Unix timestamp
+                "traceId": getattr(record, "trace_id", None),
             }
+            self._enqueue(payload)
+        except Exception:
+            # Avoid infinite loop if logging fails
+            pass
+
+    def _enqueue(self, payload):
+        if self.overflow_policy == "block":
+            self._queue.put(payload)
+            return
 
-            # Send the log via HTTP POST
-            # You could also add "extra" fields if needed
-            requests.post(
-                self.endpoint_url,
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+            if self.overflow_policy == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                    self._queue.put_nowait(payload)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _drain(self, block: bool, limit: int) -> list:
+        """Collect up to `limit` queued records, waiting at most flush_interval for the first."""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < limit:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _ship(self, batch: list):
+        if not batch:
+            return
+        try:
+            self._session.post(
+                self.batch_url,
                 headers={"Content-Type": "application/json"},
-                data=json.dumps(payload),
-                timeout=2
+                data=json.dumps(batch),
+                timeout=self.timeout
             )
         except Exception:
-            # Avoid infinite loop if logging fails
+            # The logging service being down must never break the caller
             pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(block=True, limit=self.max_batch_size)
+            # Top the batch up for a short while so bursts go out together
+            deadline = time.monotonic() + self.flush_interval
+            while batch and len(batch) < self.max_batch_size and time.monotonic() < deadline:
+                more = self._drain(block=False, limit=self.max_batch_size - len(batch))
+                if not more:
+                    time.sleep(min(0.05, self.flush_interval))
+                    continue
+                batch.extend(more)
+            self._ship(batch)
+
+    def flush(self):
+        """Ship everything currently queued from the calling thread."""
+        while True:
+            batch = self._drain(block=False, limit=self.max_batch_size)
+            if not batch:
+                break
+            self._ship(batch)
+
+    def close(self):
+        self._stop.set()
+        self._worker.join(timeout=self.flush_interval + self.timeout)
+        self.flush()
+        if self._owns_session:
+            self._session.close()
+        super().close()
@@ -0,0 +1,232 @@
+import json
+import time
+import inspect
+import datetime
+import functools
+import threading
+from collections import OrderedDict
+from zoneinfo import ZoneInfo
+import numpy as np
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = datetime.time(16, 0)
+# Arguments holding ticker symbols; normalized to upper case and used for invalidation
+TICKER_ARGS = ('ticker', 'tickers', 'benchmark')
+
+
+def market_as_of(now=None):
+    """Date of the last completed trading session (weekdays closing at 16:00 New York time).
+
+    Exchange holidays are not modelled; on a holiday the as-of date simply moves
+    forward without new data, which only costs a cache refresh.
+    """
+    local = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(MARKET_TZ)
+    day = local.date() if local.time() >= MARKET_CLOSE else local.date() - datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def next_market_close(now=None):
+    """Unix time of the next session close, when market_as_of moves to a new day."""
+    local = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(MARKET_TZ)
+    day = local.date() if local.time() < MARKET_CLOSE else local.date() + datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day += datetime.timedelta(days=1)
+    return datetime.datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ).timestamp()
+
+
+def _normalize(name, value):
+    if name in TICKER_ARGS:
+        if isinstance(value, str):
+            return value.strip().upper()
+        if isinstance(value, (list, tuple)):
+            return sorted(dict.fromkeys(str(ticker).strip().upper() for ticker in value))
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {key: _normalize(key, value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(None, item) for item in value]
+    return value
+
+
+def normalize_args(func, args, kwargs):
+    """Bound arguments of a call with defaults applied, stripped strings and upper-cased, sorted tickers."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return {name: _normalize(name, value) for name, value in bound.arguments.items()}
+
+
+def tickers_in(arguments):
+    """Ticker symbols referenced by normalized (or raw) tool arguments."""
+    found = set()
+    for name in TICKER_ARGS:
+        value = arguments.get(name)
+        if isinstance(value, str):
+            found.add(value.strip().upper())
+        elif isinstance(value, (list, tuple)):
+            found.update(str(ticker).strip().upper() for ticker in value)
+    return found
+
+
+class ToolCache:
+    """
+    Memoizes agent tool calls keyed by (tool, normalized arguments, market as-of date).
+
+    Entries expire at the next market close, when the as-of date and therefore
+    the data behind every result changes, and are evicted least-recently-used
+    first beyond max_entries. Only successful calls are stored.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def memoize(self, func):
+        """Wrap a tool; the wrapper keeps its name, signature and docstring for the agent."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = normalize_args(func, args, kwargs)
+            key = (func.__name__, json.dumps(arguments, sort_keys=True, default=str), market_as_of().isoformat())
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry['expires_at'] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry['result']
+                self.misses += 1
+            result = func(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = {
+                    'result': result,
+                    'tickers': tickers_in(arguments),
+                    'expires_at': next_market_close(),
+                }
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return result
+        return wrapper
+
+    def invalidate(self, tickers=None, tool=None):
+        """Drop entries for any of `tickers` and/or of `tool`; with neither, drop everything.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        tickers = {ticker.upper() for ticker in tickers} if tickers else None
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if (tickers is None and tool is None)
+                or (tickers is not None and entry['tickers'] & tickers)
+                or (tool is not None and key[0] == tool)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidated += len(stale)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "invalidated": self.invalidated,
+            }
+
+
+class SemanticCache:
+    """
+    Past agent answers matched by cosine similarity of query embeddings.
+
+    `embed(text)` returns one vector. A query whose embedding is at least
+    `threshold` similar to a cached one, from the same market as-of date and
+    `scope` (the user, since answers draw on their memories), gets that answer
+    without running the agent. Entries remember the tickers their tool calls
+    used so ingestion of new data for a ticker drops them.
+    """
+
+    def __init__(self, embed, threshold=0.95, max_entries=2048):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._entries = []
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def vector(self, query):
+        vector = np.asarray(self.embed(query.strip()), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, vector, scope=None):
+        """Best cached answer of `scope` above the threshold as {'answer', 'score', 'query'}, or None."""
+        now = time.time()
+        with self._lock:
+            live = [entry for entry in self._entries if entry['expires_at'] > now]
+            if len(live) != len(self._entries):
+                self._entries, self._matrix = live, None
+            if self._matrix is None:
+                self._matrix = np.vstack([entry['vector'] for entry in self._entries]) if self._entries else None
+            if self._matrix is not None:
+                scores = self._matrix @ vector
+                scores[[entry['scope'] != scope for entry in self._entries]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    entry = self._entries[best]
+                    return {'answer': entry['answer'], 'score': float(scores[best]), 'query': entry['query']}
+            self.misses += 1
+            return None
+
+    def store(self, query, vector, answer, tickers=(), scope=None):
+        with self._lock:
+            self._entries.append({
+                'scope': scope,
+                'query': query,
+                'vector': vector,
+                'answer': answer,
+                'tickers': {ticker.upper() for ticker in tickers},
+                'expires_at': next_market_close(),
+            })
+            # Oldest first, so trimming the head evicts the oldest answers
+            self._entries = self._entries[-self.max_entries:]
+            self._matrix = None
+
+    def invalidate(self, tickers=None):
+        """Drop answers that used any of `tickers`, or every answer when tickers is None."""
+        tickers = {ticker.upper() for ticker in tickers} if tickers else None
+        with self._lock:
+            kept = [entry for entry in self._entries if tickers is not None and not entry['tickers'] & tickers]
+            removed = len(self._entries) - len(kept)
+            self._entries = kept
+            self._matrix = None
+            self.invalidated += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "invalidated": self.invalidated,
+            }
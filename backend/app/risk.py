@@ -0,0 +1,199 @@
+import numpy as np
+from statistics import NormalDist
+from features import price_matrix
+from parallel import run_chunks
+
+DEFAULT_CONFIDENCE = (0.95, 0.99)
+SIMULATION_CHUNK = 20_000
+
+
+def log_returns(df, tickers):
+    """Daily log returns per ticker, keeping only dates where every ticker traded."""
+    close = price_matrix(df, 'Close', tickers)
+    return np.log(close).diff().iloc[1:].dropna()
+
+
+def _tail(losses, confidence):
+    """VaR and CVaR (expected shortfall) of a loss sample at each confidence level."""
+    result = {}
+    for level in confidence:
+        var = float(np.quantile(losses, level))
+        tail = losses[losses >= var]
+        result[str(level)] = {'var': var, 'cvar': float(tail.mean()) if tail.size else var}
+    return result
+
+
+def historical_var(returns, weights, confidence=DEFAULT_CONFIDENCE, horizon=1):
+    """VaR/CVaR from the empirical distribution of overlapping `horizon`-day portfolio returns.
+
+    Args:
+        returns (np.ndarray): Daily log returns, shape (T, n).
+        weights (np.ndarray): Portfolio weights, shape (n,).
+
+    Returns:
+        dict: {confidence: {'var', 'cvar'}} as positive fractions of portfolio value.
+    """
+    window = np.cumsum(np.vstack([np.zeros(returns.shape[1]), returns]), axis=0)
+    horizon_returns = window[horizon:] - window[:-horizon]
+    losses = -(np.expm1(horizon_returns) @ weights)
+    return _tail(losses, confidence)
+
+
+def parametric_var(mean, cov, weights, confidence=DEFAULT_CONFIDENCE, horizon=1):
+    """Gaussian (variance-covariance) VaR/CVaR over `horizon` days from daily simple-return moments."""
+    mu = float(weights @ mean) * horizon
+    sigma = float(np.sqrt(max(weights @ cov @ weights, 0.0) * horizon))
+    normal = NormalDist()
+    result = {}
+    for level in confidence:
+        z = normal.inv_cdf(level)
+        result[str(level)] = {
+            'var': sigma * z - mu,
+            'cvar': sigma * normal.pdf(z) / (1 - level) - mu,
+        }
+    return result
+
+
+def _simulate_chunk(task):
+    """Portfolio returns of one chunk of paths; top-level so it can run in a worker process."""
+    mean, factor, weights, paths, seed, distribution, t_df = task
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((paths, len(mean)))
+    if distribution == 't':
+        # Multivariate Student-t with unit covariance: scale normals by a shared chi-square draw
+        shocks *= np.sqrt((t_df - 2) / rng.chisquare(t_df, size=(paths, 1)))
+    asset_returns = np.expm1(mean + shocks @ factor.T)
+    return asset_returns @ weights
+
+
+def monte_carlo_var(mean, cov, weights, confidence=DEFAULT_CONFIDENCE, horizon=1, paths=100_000,
+                    seed=42, distribution='normal', t_df=5, chunk_size=SIMULATION_CHUNK):
+    """Simulated VaR/CVaR of the portfolio over `horizon` days.
+
+    Horizon log returns are drawn directly as N(h * mean, h * cov) (or a Student-t
+    with that covariance) in chunks of `chunk_size` paths, which run on the shared
+    process pool. Each chunk gets its own child of SeedSequence(seed), so results
+    depend only on `seed` and `chunk_size`, never on the number of workers.
+    """
+    if distribution not in ('normal', 't'):
+        raise ValueError(f"Unknown distribution {distribution}; use 'normal' or 't'")
+    if distribution == 't' and t_df <= 2:
+        raise ValueError("t_df must be greater than 2 for a finite covariance")
+
+    horizon_mean = np.asarray(mean) * horizon
+    # Eigen-decomposition tolerates the semi-definite covariances of collinear assets
+    eigenvalues, eigenvectors = np.linalg.eigh(np.asarray(cov) * horizon)
+    factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(horizon_mean, factor, weights, size, child, distribution, t_df) for size, child in zip(sizes, seeds)]
+    losses = -np.concatenate(run_chunks(_simulate_chunk, tasks))
+
+    result = _tail(losses, confidence)
+    for level in result.values():
+        level['paths'] = paths
+    return result
+
+
+def stress_test(mean, cov, weights, tickers, scenarios):
+    """Portfolio return under user-defined shock scenarios.
+
+    Each scenario is {'name', 'shocks': {ticker: return}, 'propagate': bool}. With
+    propagate (the default) tickers without an explicit shock move by their
+    conditional expectation given the shocked ones, E[x_u | x_s] = C_us C_ss^-1 (x_s - mu_s).
+
+    Returns:
+        list: One {'name', 'portfolio_return', 'asset_returns'} per scenario.
+    """
+    index = {ticker: i for i, ticker in enumerate(tickers)}
+    results = []
+    for scenario in scenarios:
+        shocks = scenario.get('shocks', {})
+        unknown = [ticker for ticker in shocks if ticker not in index]
+        if unknown:
+            raise ValueError(f"Scenario {scenario.get('name')} shocks tickers outside the portfolio: {unknown}")
+
+        shocked = np.array([index[ticker] for ticker in shocks], dtype=int)
+        # Work in log returns so shocks and the covariance share a scale
+        moves = np.zeros(len(tickers))
+        moves[shocked] = np.log1p(np.array(list(shocks.values()), dtype=float))
+        free = np.setdiff1d(np.arange(len(tickers)), shocked)
+        if scenario.get('propagate', True) and shocked.size and free.size:
+            beta = np.linalg.lstsq(cov[np.ix_(shocked, shocked)], cov[np.ix_(shocked, free)], rcond=None)[0]
+            moves[free] = mean[free] + (moves[shocked] - mean[shocked]) @ beta
+        asset_returns = np.expm1(moves)
+        results.append({
+            'name': scenario.get('name', f"scenario_{len(results) + 1}"),
+            'portfolio_return': float(asset_returns @ weights),
+            'asset_returns': {ticker: float(value) for ticker, value in zip(tickers, asset_returns)},
+        })
+    return results
+
+
+def risk_report(df, tickers, weights=None, confidence=DEFAULT_CONFIDENCE, horizon=1, paths=100_000,
+                seed=42, distribution='normal', t_df=5, scenarios=None, chunk_size=SIMULATION_CHUNK):
+    """Historical, parametric and Monte Carlo VaR/CVaR plus stress scenarios.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (list of str): Assets in the portfolio; a single ticker gives single-asset risk.
+        weights (dict, optional): Ticker -> weight; normalized to sum to one. Defaults to equal weights.
+        confidence (iterable of float): Confidence levels, e.g. (0.95, 0.99).
+        horizon (int): Horizon in trading days.
+        paths (int): Monte Carlo paths; 0 skips the simulation.
+        seed (int): Seed that makes the simulation reproducible.
+        distribution (str): 'normal' or 't' for fat-tailed simulated returns.
+        t_df (float): Degrees of freedom of the Student-t.
+        scenarios (list of dict, optional): Shock scenarios for stress_test.
+
+    Returns:
+        dict: VaR/CVaR per method (positive numbers are losses as a fraction of
+            portfolio value), per-asset historical/parametric VaR and scenario results.
+    """
+    tickers = list(tickers)
+    if weights:
+        unknown = [ticker for ticker in weights if ticker not in tickers]
+        if unknown:
+            raise ValueError(f"Weights given for tickers outside the portfolio: {unknown}")
+        w = np.array([float(weights.get(ticker, 0.0)) for ticker in tickers])
+    else:
+        w = np.full(len(tickers), 1.0 / len(tickers))
+    if not np.isclose(w.sum(), 0.0):
+        w = w / w.sum()
+
+    returns = log_returns(df, tickers)
+    if len(returns) <= horizon:
+        raise ValueError(f"Need more than {horizon} days of overlapping history, got {len(returns)}")
+    matrix = returns.to_numpy()
+    mean = matrix.mean(axis=0)
+    cov = np.atleast_2d(np.cov(matrix, rowvar=False))
+    # Portfolio returns are linear in simple (not log) returns
+    simple = np.expm1(matrix)
+    simple_mean = simple.mean(axis=0)
+    simple_cov = np.atleast_2d(np.cov(simple, rowvar=False))
+
+    report = {
+        'weights': {ticker: float(value) for ticker, value in zip(tickers, w)},
+        'horizon_days': horizon,
+        'observations': len(matrix),
+        'portfolio': {
+            'historical': historical_var(matrix, w, confidence, horizon),
+            'parametric': parametric_var(simple_mean, simple_cov, w, confidence, horizon),
+        },
+        'assets': {},
+        'scenarios': stress_test(mean, cov, w, tickers, scenarios) if scenarios else [],
+    }
+    if paths > 0:
+        report['portfolio']['monte_carlo'] = monte_carlo_var(
+            mean, cov, w, confidence, horizon, paths, seed, distribution, t_df, chunk_size
+        )
+    if len(tickers) > 1:
+        for i, ticker in enumerate(tickers):
+            unit = np.zeros(len(tickers))
+            unit[i] = 1.0
+            report['assets'][ticker] = {
+                'historical': historical_var(matrix, unit, confidence, horizon),
+                'parametric': parametric_var(simple_mean, simple_cov, unit, confidence, horizon),
+            }
+    return report
@@ -1,12 +1,16 @@
 instruction_list = [
 "Get a name of stock as input",
-"Find the Ticker or the stock from it for further usages",
+"Find the Ticker of the stock by calling resolve_ticker with the name instead of guessing it; use the top match when its score is 1.0, otherwise pick the most plausible candidate or ask the user",
 "Call the tool perform_calculations_for_tickers to get all of the calculations and data",
 "the tool will send you the features so provide them to the user",
 "user migh ask multiple questiosn or want to create a portfolio try to answer the user with newly generated data",
+"to create a portfolio call optimize_portfolio with the candidate tickers and report the weights and risk metrics",
+"before recommending a portfolio or strategy, validate it with backtest_strategy (use strategy 'fixed' with the recommended weights) and report the results",
+"when the user asks about risk, downside or losses, call compute_value_at_risk and explain VaR/CVaR as potential losses",
 "the datetime is passed use it for selecting the data range",
 "if no datetime provided, get the last two years data",
-"all of the data should be daily so if the user wanted other periods, is not available for now",
+"calculations use daily data; if the user wants weekly, monthly or other periods, call get_resampled_candles for tickers that have stored data",
+"if the user asks for alternatives or assets that behave like a ticker, call find_similar_assets",
 
 ]
 
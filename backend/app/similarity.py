@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from features import FeatureInputs, FEATURES
+
+# Features that describe how an asset behaves, with the magnitude treated as
+# "large" for each; values are squashed with tanh(value / scale) so a ticker's
+# vector never depends on the rest of the universe and can be indexed on its own.
+SIMILARITY_FEATURES = {
+    'volatility': 0.4,
+    'annualized_return': 0.3,
+    'max_drawdown': 0.4,
+    'sharpe': 1.5,
+    'sortino': 2.0,
+    'momentum_21d': 0.1,
+    'momentum_63d': 0.2,
+    'momentum_252d': 0.4,
+}
+
+# Trailing daily returns kept as the co-movement part of the vector
+RETURN_WINDOW = 63
+
+
+def return_calendar(as_of, return_window=RETURN_WINDOW):
+    """Weekdays ending at `as_of` that the return part of every vector with that as-of date covers."""
+    return pd.bdate_range(end=pd.Timestamp(as_of).normalize(), periods=return_window)
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def similarity_vectors(df, tickers, return_weight=0.5, return_window=RETURN_WINDOW, as_of=None):
+    """Build one unit-length vector per ticker for cosine nearest-neighbour search.
+
+    The vector joins the squashed SIMILARITY_FEATURES with the demeaned trailing
+    returns, so the cosine of two return parts is their return correlation and
+    the feature part groups assets with a similar risk/return profile. Returns
+    are laid out on return_calendar(as_of), so coordinate i is the same day in
+    every vector with that as-of date, whenever and with whatever history each
+    ticker was indexed; days without a candle count as a zero (mean) return.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (str or list of str): Tickers to build vectors for.
+        return_weight (float): Share of the vector (0-1) given to the return part.
+        return_window (int): Number of trailing daily returns in the return part.
+        as_of (str or date, optional): Last day of the return calendar. Defaults to the last date in `df`.
+
+    Returns:
+        dict: Mapping of ticker to {'vector': list of float, 'features': {name: float or None}}.
+    """
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    inputs = FeatureInputs(df, tickers)
+
+    raw = np.column_stack([
+        FEATURES[name](inputs).reindex(tickers).to_numpy(dtype=float) for name in SIMILARITY_FEATURES
+    ])
+    raw[~np.isfinite(raw)] = np.nan
+    scales = np.array(list(SIMILARITY_FEATURES.values()))
+    feature_part = _unit(np.nan_to_num(np.tanh(raw / scales)))
+
+    calendar = return_calendar(inputs.returns.index.max() if as_of is None else as_of, return_window)
+    returns = inputs.returns.reindex(index=calendar, columns=tickers)
+    returns = (returns - returns.mean()).fillna(0.0).to_numpy(dtype=float).T
+    return_part = _unit(returns)
+
+    vectors = np.hstack([np.sqrt(1 - return_weight) * feature_part, np.sqrt(return_weight) * return_part])
+    return {
+        ticker: {
+            'vector': vectors[i].tolist(),
+            'features': {name: (None if np.isnan(value) else float(value))
+                         for name, value in zip(SIMILARITY_FEATURES, raw[i])},
+        }
+        for i, ticker in enumerate(tickers)
+    }
@@ -0,0 +1,153 @@
+import os
+import re
+import csv
+
+SYMBOL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.csv')
+
+# Words that do not tell companies apart and are often left out by users
+STOP_WORDS = {
+    'the', 'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'companies',
+    'ltd', 'limited', 'plc', 'holdings', 'holding', 'group', 'sa', 'se', 'nv', 'ag', 'com',
+}
+FUZZY_THRESHOLD = 0.35
+
+
+def normalize(text):
+    """Lower-case words without punctuation or corporate suffixes ('Apple Inc.' -> 'apple')."""
+    words = re.findall(r'[a-z0-9]+', text.lower().replace('&', ' and '))
+    kept = [word for word in words if word not in STOP_WORDS]
+    return ' '.join(kept or words)
+
+
+def _trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """
+    In-memory symbol directory with exact, prefix and fuzzy lookups.
+
+    Every symbol is reachable by its ticker, its name and its aliases. Names and
+    aliases are normalized into keys that feed three structures built once at load:
+    a dict for exact matches, a character trie (also holding each key from every
+    word onwards, so 'hathaway' finds Berkshire Hathaway) for prefixes, and a
+    trigram inverted index for typos, scored with the Dice coefficient.
+    """
+
+    def __init__(self, records):
+        self.symbols = []
+        self._name_keys = []
+        self._tickers = {}
+        self._exact = {}
+        self._trie = {}
+        self._keys = []
+        self._grams = {}
+        for record in records:
+            self._add(record)
+
+    @classmethod
+    def load(cls, path=SYMBOL_FILE):
+        """Build the index from a CSV or Parquet file with ticker, name, exchange, asset_type and aliases ('|'-separated)."""
+        if path.endswith('.parquet'):
+            import pandas as pd
+            records = pd.read_parquet(path).fillna('').to_dict('records')
+        else:
+            with open(path, newline='', encoding='utf-8') as f:
+                records = list(csv.DictReader(f))
+        return cls(records)
+
+    def _add(self, record):
+        aliases = record.get('aliases') or []
+        if isinstance(aliases, str):
+            aliases = [alias for alias in aliases.split('|') if alias.strip()]
+        symbol = {
+            'ticker': record['ticker'].strip().upper(),
+            'name': record['name'].strip(),
+            'exchange': (record.get('exchange') or '').strip(),
+            'asset_type': (record.get('asset_type') or '').strip(),
+        }
+        position = len(self.symbols)
+        self.symbols.append(symbol)
+        self._name_keys.append(normalize(symbol['name']))
+        for ticker in {symbol['ticker'], symbol['ticker'].replace('-', '.'), symbol['ticker'].lstrip('^')}:
+            self._tickers.setdefault(ticker, position)
+
+        for key in dict.fromkeys(normalize(text) for text in [symbol['name'], *aliases]):
+            self._exact.setdefault(key, []).append(position)
+            words = key.split(' ')
+            for start in range(len(words)):
+                self._insert(' '.join(words[start:]), position)
+            key_id = len(self._keys)
+            grams = _trigrams(key)
+            self._keys.append((key, position, len(grams)))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(key_id)
+
+    def _insert(self, key, position):
+        node = self._trie
+        for char in key:
+            node = node.setdefault(char, {})
+            # Positions under a node, in insertion (directory) order
+            below = node.setdefault(None, [])
+            if not below or below[-1] != position:
+                below.append(position)
+
+    def _prefix(self, key):
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get(None, [])
+
+    def _fuzzy(self, key):
+        grams = _trigrams(key)
+        shared = {}
+        for gram in grams:
+            for key_id in self._grams.get(gram, ()):
+                shared[key_id] = shared.get(key_id, 0) + 1
+        scores = {}
+        for key_id, count in shared.items():
+            _, position, size = self._keys[key_id]
+            score = 2 * count / (len(grams) + size)
+            if score >= FUZZY_THRESHOLD and score > scores.get(position, 0.0):
+                scores[position] = score
+        return scores
+
+    def resolve(self, query, limit=5):
+        """Best matching symbols for a ticker, company name or alias.
+
+        Args:
+            query (str): e.g. 'AAPL', 'apple', 'Berkshire Hath' or 'microsfot'.
+            limit (int): Maximum number of matches.
+
+        Returns:
+            list of dict: {'ticker', 'name', 'exchange', 'asset_type', 'match', 'score'},
+                best first; match is 'ticker', 'exact', 'prefix' or 'fuzzy'.
+        """
+        found = {}
+
+        def add(position, match, score):
+            if score > found.get(position, (None, 0.0))[1]:
+                found[position] = (match, score)
+
+        ticker = query.strip().upper()
+        if ticker in self._tickers:
+            add(self._tickers[ticker], 'ticker', 1.0)
+        key = normalize(query)
+        if key:
+            for position in self._exact.get(key, ()):
+                add(position, 'exact', 1.0)
+            prefix = self._prefix(key)
+            for position in prefix[:limit * 4]:
+                add(position, 'prefix', 0.6 + 0.3 * min(len(key) / max(len(self._name_keys[position]), 1), 1.0))
+            if len(found) < limit:
+                for position, score in self._fuzzy(key).items():
+                    add(position, 'fuzzy', 0.8 * score)
+
+        best = sorted(found.items(), key=lambda item: (-item[1][1], item[0]))[:limit]
+        return [
+            {**self.symbols[position], 'match': match, 'score': round(score, 3)}
+            for position, (match, score) in best
+        ]
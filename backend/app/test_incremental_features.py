@@ -0,0 +1,72 @@
+import json
+import unittest
+import numpy as np
+import pandas as pd
+from features import compute_features
+from incremental_features import IncrementalFeatureState
+
+TOLERANCE = 1e-9
+
+
+def candles(rows=400, seed=7):
+    """Random-walk daily OHLCV candles for one ticker."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, rows)))
+    spread = np.abs(rng.normal(0, 0.01, rows)) * close
+    index = pd.bdate_range('2022-01-03', periods=rows, name='Date')
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 10_000, rows).astype(float),
+    }, index=index)
+
+
+class IncrementalFeatureStateTest(unittest.TestCase):
+
+    def assertMatchesFull(self, state, df):
+        expected = compute_features(df, 'TEST', risk_free_rate=0.02)['TEST']
+        actual = state.features(risk_free_rate=0.02)
+        for name, value in actual.items():
+            if name not in expected:
+                continue
+            with self.subTest(feature=name):
+                if expected[name] is None:
+                    self.assertIsNone(value)
+                else:
+                    self.assertAlmostEqual(value, expected[name], delta=TOLERANCE * max(1.0, abs(expected[name])))
+
+    def test_single_update_matches_full_recomputation(self):
+        df = candles()
+        state = IncrementalFeatureState('TEST')
+        self.assertEqual(state.update(df), len(df))
+        self.assertMatchesFull(state, df)
+
+    def test_split_updates_through_serialization_match_full_recomputation(self):
+        df = candles()
+        state = IncrementalFeatureState('TEST')
+        for start, end in ((0, 150), (150, 151), (151, 300), (300, len(df))):
+            # Round-trip through JSON as /update_features does via the data service
+            state = IncrementalFeatureState.from_dict(json.loads(json.dumps(state.to_dict())))
+            state.update(df.iloc[start:end])
+        self.assertEqual(state.last_date, df.index[-1].strftime('%Y-%m-%d'))
+        self.assertMatchesFull(state, df)
+
+    def test_already_applied_candles_are_skipped(self):
+        df = candles()
+        state = IncrementalFeatureState('TEST')
+        state.update(df.iloc[:200])
+        self.assertEqual(state.update(df.iloc[100:]), len(df) - 200)
+        self.assertMatchesFull(state, df)
+
+    def test_short_history_leaves_window_features_undefined(self):
+        df = candles(rows=10)
+        state = IncrementalFeatureState('TEST')
+        state.update(df)
+        self.assertMatchesFull(state, df)
+        self.assertIsNone(state.features()['momentum_21d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
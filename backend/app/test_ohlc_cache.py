@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+from ohlc_cache import OHLCCache, FixtureSource, OHLC_COLUMNS
+
+
+def write_fixture(directory, ticker, start='2019-01-01', end='2022-12-31'):
+    index = pd.bdate_range(start, end, name='Date')
+    close = np.linspace(100, 200, len(index))
+    frame = pd.DataFrame({column: close for column in OHLC_COLUMNS}, index=index)
+    frame.to_csv(os.path.join(directory, f'{ticker}.csv'))
+
+
+class BlockingFixtureSource(FixtureSource):
+    """FixtureSource whose fetches of one ticker wait until `release` is set."""
+
+    def __init__(self, directory, blocked):
+        super().__init__(directory)
+        self.blocked = blocked
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+
+    def fetch(self, ticker, start_date, end_date):
+        if ticker == self.blocked:
+            self.fetching.set()
+            self.release.wait(timeout=10)
+        return super().fetch(ticker, start_date, end_date)
+
+
+class OHLCCacheEvictionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for ticker in ('A', 'B'):
+            write_fixture(self.fixtures, ticker)
+
+    def tearDown(self):
+        shutil.rmtree(self.fixtures)
+        shutil.rmtree(self.cache_dir)
+
+    def test_eviction_skips_tickers_being_fetched(self):
+        source = BlockingFixtureSource(self.fixtures, blocked='B')
+        # Any miss evicts every other ticker
+        cache = OHLCCache(self.cache_dir, source=source, max_bytes=1)
+        source.blocked = None
+        first_year = len(cache.get('B', '2020-01-01', '2021-01-01'))
+        source.blocked = 'B'
+
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(b=cache.get('B', '2020-01-01', '2022-01-01')))
+        worker.start()
+        self.assertTrue(source.fetching.wait(timeout=10))
+        # A concurrent miss on A while B's second year is being fetched
+        cache.get('A', '2020-01-01', '2022-01-01')
+        source.release.set()
+        worker.join(timeout=10)
+
+        expected = len(pd.bdate_range('2020-01-01', '2021-12-31'))
+        self.assertGreater(expected, first_year)
+        self.assertEqual(len(result['b']), expected)
+
+    def test_idle_tickers_are_still_evicted(self):
+        cache = OHLCCache(self.cache_dir, source=FixtureSource(self.fixtures), max_bytes=1)
+        cache.get('B', '2020-01-01', '2021-01-01')
+        cache.get('A', '2020-01-01', '2021-01-01')
+        self.assertEqual(cache.stats()['tickers'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'B.parquet')))
+
+
+if __name__ == '__main__':
+    unittest.main()
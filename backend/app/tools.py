@@ -1,18 +1,47 @@
 import os
-import yfinance as yf
 import pandas as pd
 import datetime
 import numpy as np
-import requests
+import pyarrow as pa
 import json
 from dotenv import load_dotenv
+from ohlc_cache import OHLCCache, YFinanceSource, FixtureSource
+from features import FEATURES, compute_features, correlation_matrix, price_matrix
+from similarity import similarity_vectors
+from response_cache import market_as_of
+from portfolio import METHODS, optimize
+from risk import risk_report
+from backtest import expand_grid, run_variants, walk_forward
+from symbols import SymbolIndex, SYMBOL_FILE
+from http_client import http_client
+from instrumentation import timed
 
 VECTOR_DB_URL = os.getenv('VECTOR_DB_URL')
 MONGO_DB_URL = os.getenv('MONGO_DB_URL')
+OHLC_CACHE_DIR = os.getenv('OHLC_CACHE_DIR', '.ohlc_cache')
+OHLC_CACHE_MAX_BYTES = int(os.getenv('OHLC_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+OHLC_FIXTURE_DIR = os.getenv('OHLC_FIXTURE_DIR')
+RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.0'))
+# Upper bound on Monte Carlo paths per risk request or tool call; every path keeps its simulated loss in memory
+MAX_RISK_PATHS = int(os.getenv('MAX_RISK_PATHS', '1000000'))
+DEFAULT_FEATURES = ['risk', 'volatility', 'annualized_return']
+SIMILARITY_RETURN_WEIGHT = float(os.getenv('SIMILARITY_RETURN_WEIGHT', '0.5'))
+SYMBOL_DIRECTORY = os.getenv('SYMBOL_DIRECTORY', SYMBOL_FILE)
+
+# Candles are served from the local cache; set OHLC_FIXTURE_DIR to run fully offline.
+ohlc_cache = OHLCCache(
+    OHLC_CACHE_DIR,
+    source=FixtureSource(OHLC_FIXTURE_DIR) if OHLC_FIXTURE_DIR else YFinanceSource(),
+    max_bytes=OHLC_CACHE_MAX_BYTES,
+)
+
+
+# Local symbol directory (CSV or Parquet) so names resolve to tickers offline
+symbol_index = SymbolIndex.load(SYMBOL_DIRECTORY)
 
 
 def fetch_candlestick_data(tickers, start_date=None, end_date=None):
-    """Fetch candlestick (OHLCV) data for a single ticker or list of tickers from yfinance.
+    """Fetch candlestick (OHLCV) data for a single ticker or list of tickers through the local OHLC cache.
 
     Args:
         tickers (str or list of str): Ticker symbols (e.g., 'AAPL' or ['AAPL', 'MSFT']).
@@ -20,7 +49,8 @@ def fetch_candlestick_data(tickers, start_date=None, end_date=None):
         end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today.
 
     Returns:
-        pd.DataFrame or dict: DataFrame or a dictionary of DataFrames for multiple tickers.
+        pd.DataFrame: Flat OHLCV frame for a single ticker, or a frame with
+            (Price, Ticker) MultiIndex columns for a list of tickers, as yfinance returns.
     """
     if start_date is None or end_date is None:
         end_date_dt = datetime.datetime.today()
@@ -29,7 +59,13 @@ def fetch_candlestick_data(tickers, start_date=None, end_date=None):
         start_date = start_date_dt.strftime('%Y-%m-%d')
         end_date = end_date_dt.strftime('%Y-%m-%d')
 
-    return yf.download(tickers=tickers, start=start_date, end=end_date, progress=False)
+    if isinstance(tickers, str):
+        return ohlc_cache.get(tickers, start_date, end_date)
+
+    # Tickers missing from the cache are downloaded together in one batched request
+    frames = ohlc_cache.get_many(tickers, start_date, end_date)
+    combined = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+    return combined.swaplevel(0, 1, axis=1).sort_index(axis=1)
 
 def compute_daily_returns(close_series):
     """Compute daily percentage returns for a given close price series.
@@ -95,32 +131,292 @@ def get_risk_volatility_return(close_series):
         'annualized_return': ann_return
     }
 
-def perform_calculations_for_tickers(tickers, start_date=None, end_date=None) -> str:
+def get_close_prices(df, tickers):
+    """Extract close prices from a yfinance frame as one column per ticker.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (str or list of str): Ticker symbols the frame was fetched for.
+
+    Returns:
+        pd.DataFrame: Close prices indexed by date with one column per ticker.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+    close = df['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(name=ticker_list[0])
+    return close[ticker_list]
+
+def calculate_metrics(df, tickers, features=None, benchmark_close=None) -> dict[str, dict[str, float]]:
+    """Compute features from already-fetched candlestick data with the vectorized feature engine.
+
+    Args:
+        df (pd.DataFrame): Frame returned by fetch_candlestick_data.
+        tickers (str or list of str): Ticker symbols to compute metrics for.
+        features (list of str, optional): Names from features.FEATURES. Defaults to DEFAULT_FEATURES.
+        benchmark_close (pd.Series, optional): Benchmark close prices used for 'beta'.
+
+    Returns:
+        dict: Mapping of ticker to {feature: float} (None where a feature is undefined).
+    """
+    with timed("feature_compute"):
+        return compute_features(
+            df, tickers,
+            features=features or DEFAULT_FEATURES,
+            benchmark_close=benchmark_close,
+            risk_free_rate=RISK_FREE_RATE,
+        )
+
+def resolve_ticker(name, limit=5) -> str:
+    """Find the ticker symbol for a company, fund, index or crypto name (or check a ticker) in the local symbol directory.
+
+    Handles exact names, partial names ('Berkshire Hath') and typos ('microsfot').
+
+    Args:
+        name (str): Company or asset name, alias or ticker.
+        limit (int): Maximum number of candidates. Defaults to 5.
+
+    Returns:
+        str: JSON list of {'ticker', 'name', 'exchange', 'asset_type', 'match', 'score'}, best first;
+            a score of 1.0 is a certain match, an empty list means the name is not in the directory.
+    """
+    return json.dumps(symbol_index.resolve(name, limit))
+
+def perform_calculations_for_tickers(tickers, start_date=None, end_date=None, features=None,
+                                     benchmark=None, include_correlation=False) -> str:
     """Perform calculations for ticker or multiple tickers, including fetching data and computing metrics.
 
+    Available features: risk, volatility, annualized_return, volatility_21d, volatility_63d,
+    max_drawdown, sharpe, sortino, beta, momentum_21d, momentum_63d, momentum_252d, atr_14.
+
     Args:
         tickers (str or list of str): Ticker symbols.
         start_date (str, optional): Start date in 'YYYY-MM-DD' format. Defaults to two years ago.
         end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today.
+        features (list of str, optional): Features to compute. Defaults to risk, volatility and annualized_return.
+        benchmark (str, optional): Benchmark ticker (e.g. 'SPY') used to compute 'beta'.
+        include_correlation (bool): Also return the correlation matrix of daily returns.
 
     Returns:
-        dict: Dictionary of results, keyed by ticker.
+        str: String form of the results keyed by ticker, or of
+            {'metrics': ..., 'correlation': ...} when include_correlation is set.
     """
-    df = fetch_candlestick_data(tickers, start_date, end_date)
+    ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+    fetch_list = ticker_list + [benchmark] if benchmark and benchmark not in ticker_list else ticker_list
+    df = fetch_candlestick_data(fetch_list, start_date, end_date)
+
+    benchmark_close = get_close_prices(df, fetch_list)[benchmark] if benchmark else None
+    results = calculate_metrics(df, ticker_list, features=features, benchmark_close=benchmark_close)
+    if include_correlation:
+        results = {'metrics': results, 'correlation': correlation_matrix(df, ticker_list)}
+    return str(results)
 
-    results = {}
+def optimize_portfolio(tickers, start_date=None, end_date=None, methods=None,
+                       risk_aversion=None, frontier_points=0) -> str:
+    """Build long-only portfolios over a set of tickers from their daily close prices.
 
-    if isinstance(tickers, str):
-        close_series = df['Close'].dropna()
-        calc = get_risk_volatility_return(close_series)
-        results[tickers] = calc
-    else:
-        for ticker in tickers:
-            close_series = df['Close', ticker].dropna()
-            calc = get_risk_volatility_return(close_series)
-            results[ticker] = calc
+    Available methods: min_variance, mean_variance, max_sharpe, risk_parity, equal_weight.
 
-    return str(results)
+    Args:
+        tickers (list of str): Candidate assets.
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format. Defaults to two years ago.
+        end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today.
+        methods (list of str, optional): Portfolio methods to run. Defaults to all of them.
+        risk_aversion (float, optional): Risk aversion for mean_variance; higher is more conservative.
+        frontier_points (int): Number of efficient-frontier points to include (0 to skip).
+
+    Returns:
+        str: JSON with 'portfolios' (weights and metrics per method) and 'frontier'
+            (expected_return, volatility and sharpe per point).
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(dict.fromkeys(tickers))
+    df = fetch_candlestick_data(ticker_list, start_date, end_date)
+    result = optimize(
+        df, ticker_list,
+        methods=methods or METHODS,
+        risk_aversion=risk_aversion,
+        frontier_points=frontier_points,
+        risk_free_rate=RISK_FREE_RATE,
+    )
+    return json.dumps(result)
+
+def compute_value_at_risk(tickers, weights=None, start_date=None, end_date=None, confidence=None,
+                          horizon_days=1, paths=100000, distribution="normal", scenarios=None) -> str:
+    """Compute historical, parametric and Monte Carlo Value at Risk (VaR) and CVaR for an asset or a portfolio.
+
+    Args:
+        tickers (str or list of str): One ticker for single-asset risk, or the portfolio's tickers.
+        weights (dict, optional): Ticker -> portfolio weight. Defaults to equal weights.
+        start_date (str, optional): Start date of the history in 'YYYY-MM-DD' format. Defaults to two years ago.
+        end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today.
+        confidence (list of float, optional): Confidence levels. Defaults to [0.95, 0.99].
+        horizon_days (int): Risk horizon in trading days. Defaults to 1.
+        paths (int): Monte Carlo paths, capped at a server-side limit. Defaults to 100000.
+        distribution (str): 'normal' or 't' (fat tails) for the simulation.
+        scenarios (list of dict, optional): Stress scenarios such as
+            [{'name': 'tech selloff', 'shocks': {'AAPL': -0.2, 'MSFT': -0.15}}]; other
+            tickers move with their historical correlation to the shocked ones.
+
+    Returns:
+        str: JSON with VaR/CVaR as loss fractions of portfolio value per method and
+            confidence, per-asset VaR and the portfolio return of each scenario.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(dict.fromkeys(tickers))
+    df = fetch_candlestick_data(ticker_list, start_date, end_date)
+    report = risk_report(
+        df, ticker_list,
+        weights=weights,
+        confidence=confidence or (0.95, 0.99),
+        horizon=horizon_days,
+        paths=max(1, min(int(paths), MAX_RISK_PATHS)),
+        distribution=distribution,
+        scenarios=scenarios,
+    )
+    return json.dumps(report)
+
+def load_close_matrix(tickers, start_date=None, end_date=None):
+    """Close prices with one column per ticker, from the data service when it holds every ticker.
+
+    Falls back to the local OHLC cache when the data service is unreachable or is
+    missing any of the tickers.
+
+    Returns:
+        pd.DataFrame: Close prices indexed by date.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+    try:
+        df = load_ohlc_from_api(ticker_list, start_date, end_date)
+        if set(ticker_list) <= set(df.columns.get_level_values("Ticker")):
+            return price_matrix(df, 'Close', ticker_list)
+    except Exception:
+        pass
+    return price_matrix(fetch_candlestick_data(ticker_list, start_date, end_date), 'Close', ticker_list)
+
+def backtest_strategy(tickers, strategy="equal_weight", params=None, weights=None, rebalance="M",
+                      cost_bps=5.0, start_date=None, end_date=None, param_grid=None,
+                      walk_forward_test=False) -> str:
+    """Backtest a recommendation or trading rule on historical daily closes.
+
+    Available strategies: equal_weight, buy_and_hold, fixed (use `weights`), momentum
+    (lookback, skip, top_k), inverse_volatility (lookback), moving_average (fast, slow).
+
+    Args:
+        tickers (list of str): Tickers in the universe.
+        strategy (str): Strategy name. Defaults to 'equal_weight'.
+        params (dict, optional): Strategy parameters, e.g. {'lookback': 126, 'top_k': 5}.
+        weights (dict, optional): Ticker -> weight for the 'fixed' strategy (e.g. a recommended portfolio).
+        rebalance (str): 'D', 'W', 'M', 'Q' or 'never'. Defaults to 'M'.
+        cost_bps (float): Transaction cost in basis points of traded value. Defaults to 5.
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format. Defaults to two years ago.
+        end_date (str, optional): End date in 'YYYY-MM-DD' format. Defaults to today.
+        param_grid (dict, optional): Parameter lists to test every combination of, e.g. {'lookback': [63, 126]}.
+        walk_forward_test (bool): Pick the best grid variant on rolling 2-year windows and report
+            its out-of-sample performance on the following 6 months.
+
+    Returns:
+        str: JSON with performance stats (total return, CAGR, volatility, Sharpe, Sortino,
+            max drawdown, turnover, cost drag) per variant, or the walk-forward result.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(dict.fromkeys(tickers))
+    close = load_close_matrix(ticker_list, start_date, end_date)
+    if strategy == "fixed":
+        params = {**(params or {}), "weights": weights or {}}
+    variants = [
+        {**variant, "params": {**(params or {}), **variant["params"]}}
+        for variant in expand_grid(strategy, param_grid or {}, rebalance=rebalance, cost_bps=cost_bps)
+    ]
+    if walk_forward_test:
+        result = walk_forward(close, variants)
+        result.pop("returns")
+        return json.dumps(result, default=str)
+    results = run_variants(close, variants)
+    return json.dumps([{"variant": variant, "stats": result["stats"]} for variant, result in zip(variants, results)])
+
+def get_resampled_candles(ticker, unit="week", bin_size=1, start_date=None, end_date=None) -> str:
+    """Get weekly, monthly or other aggregated OHLC bars for a ticker stored in the data service.
+
+    Args:
+        ticker (str): Ticker symbol.
+        unit (str): Bar unit, one of 'day', 'week', 'month', 'quarter' or 'year'. Defaults to 'week'.
+        bin_size (int): Number of units per bar (e.g. unit='day', bin_size=3 for 3-day bars). Defaults to 1.
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format.
+        end_date (str, optional): End date in 'YYYY-MM-DD' format.
+
+    Returns:
+        str: JSON list of bars with date_time, open, high, low, close and volume.
+    """
+    url = f"{MONGO_DB_URL}/resample/{ticker}"
+    params = {"unit": unit, "bin_size": bin_size}
+    if start_date:
+        params["start"] = start_date
+    if end_date:
+        params["end"] = end_date
+
+    response = perform_api_call(url=url, method="GET", data=params)
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        return f"Resampling failed: {body['error']}"
+    return json.dumps(body["bars"])
+
+def find_similar_assets(ticker, k=5) -> str:
+    """Find the assets that behave most like a ticker (co-movement of returns and risk/return profile).
+
+    Args:
+        ticker (str): Ticker symbol to find look-alikes for.
+        k (int): Number of similar tickers to return. Defaults to 5.
+
+    Returns:
+        str: JSON list of {'ticker', 'score', 'as_of', 'features'} ordered from most to least similar.
+    """
+    url = f"{VECTOR_DB_URL}/similar/{ticker}"
+
+    response = perform_api_call(url=url, method="GET", data={"k": k})
+    if response.status_code == 404:
+        return f"{ticker} is not in the similarity index yet; compute and store its features first."
+    response.raise_for_status()
+    return json.dumps(response.json()["similar"])
+
+def update_similarity_index(tickers, start_date=None, end_date=None):
+    """Recompute the similarity vectors of the given tickers and upsert them into the index.
+
+    Only these tickers are re-indexed; the rest of the index is left untouched.
+    The as-of date is the last weekday before end_date (never later than the last
+    completed session), so tickers indexed by different jobs on the same day share
+    one return calendar; neighbours are only searched among vectors with the same as-of date.
+
+    Args:
+        tickers (str or list of str): Ticker symbols.
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format.
+        end_date (str, optional): End date (the as-of date) in 'YYYY-MM-DD' format.
+
+    Returns:
+        httpx.Response: Response object from the API call.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+    df = fetch_candlestick_data(ticker_list, start_date, end_date)
+    as_of = market_as_of()
+    if end_date is not None:
+        as_of = min(as_of, (pd.Timestamp(end_date) - pd.offsets.BDay(1)).date())
+    as_of = as_of.strftime('%Y-%m-%d')
+    vectors = similarity_vectors(df, ticker_list, return_weight=SIMILARITY_RETURN_WEIGHT, as_of=as_of)
+    return send_similarity_vectors_to_api([
+        {"ticker": ticker, "as_of": as_of, **vectors[ticker]} for ticker in ticker_list
+    ])
+
+def send_similarity_vectors_to_api(documents):
+    """Upsert similarity vectors into the vector store.
+
+    Args:
+        documents (list): Dicts with 'ticker', 'as_of' (YYYY-MM-DD), 'vector' and 'features'.
+
+    Returns:
+        httpx.Response: Response object from the API call.
+    """
+    url = f"{VECTOR_DB_URL}/store_similarity_vectors"
+
+    payload = json.dumps(documents)
+    return perform_api_call(url=url, method="POST", data=payload)
 
 def send_raw_data_to_api(raw_data):
     """Send raw data (e.g., candlestick data) to another URL as JSON to an API.
@@ -129,40 +425,116 @@ def send_raw_data_to_api(raw_data):
         raw_data (dict): JSON-serializable object containing raw data.
 
     Returns:
-        requests.Response: Response object from the API call.
+        httpx.Response: Response object from the API call.
     """
     url = f"{MONGO_DB_URL}/store_data"
 
     payload = json.dumps(raw_data, default=str)
     return perform_api_call(url=url, method="POST", data=payload)
 
+def send_raw_data_batch_to_api(batch):
+    """Send a columnar batch of candlestick data to the data service in a single request.
+
+    Args:
+        batch (dict): Columnar payload with a 'ticker' key and one list per field
+            ('date_time', 'open', 'high', 'low', 'close', 'volume').
+
+    Returns:
+        httpx.Response: Response object from the API call.
+    """
+    url = f"{MONGO_DB_URL}/store_data_batch"
+
+    payload = json.dumps(batch, default=str)
+    return perform_api_call(url=url, method="POST", data=payload)
+
+def load_ohlc_from_api(tickers, start_date=None, end_date=None):
+    """Load stored OHLC candles from the data service's columnar Arrow export.
+
+    Args:
+        tickers (str or list of str): Ticker symbols.
+        start_date (str, optional): Inclusive start date in 'YYYY-MM-DD' format.
+        end_date (str, optional): Inclusive end date in 'YYYY-MM-DD' format.
+
+    Returns:
+        pd.DataFrame: Frame shaped like fetch_candlestick_data's output, so it can be
+            passed straight to calculate_metrics.
+    """
+    ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+    url = f"{MONGO_DB_URL}/export/ohlc"
+    params = {"tickers": ",".join(ticker_list), "format": "arrow"}
+    if start_date:
+        params["start"] = start_date
+    if end_date:
+        params["end"] = end_date
+
+    response = perform_api_call(url=url, method="GET", data=params)
+    response.raise_for_status()
+    table = pa.ipc.open_stream(response.content).read_all()
+    long = table.to_pandas().rename(columns={
+        "date_time": "Date", "open": "Open", "high": "High",
+        "low": "Low", "close": "Close", "volume": "Volume",
+    })
+    wide = long.pivot(index="Date", columns="ticker", values=["Open", "High", "Low", "Close", "Volume"])
+    wide.columns.names = ["Price", "Ticker"]
+    if isinstance(tickers, str):
+        return wide.droplevel("Ticker", axis=1)
+    return wide
+
+def send_feature_state_to_api(state):
+    """Persist an incremental feature state in the data service.
+
+    Args:
+        state (dict): Output of IncrementalFeatureState.to_dict().
+
+    Returns:
+        httpx.Response: Response object from the API call.
+    """
+    url = f"{MONGO_DB_URL}/store_feature_state"
+
+    payload = json.dumps({"ticker": state["ticker"], "last_date": state["last_date"], "state": state})
+    return perform_api_call(url=url, method="POST", data=payload)
+
+def load_feature_state_from_api(ticker):
+    """Load the incremental feature state of a ticker from the data service.
+
+    Args:
+        ticker (str): Ticker symbol.
+
+    Returns:
+        dict or None: State dictionary, or None if the ticker has no stored state yet.
+    """
+    url = f"{MONGO_DB_URL}/load_feature_state/{ticker}"
+
+    response = perform_api_call(url=url, method="GET")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        raise RuntimeError(body["error"])
+    return body["state"]
+
 def perform_api_call(url, method="GET", data=None, headers=None):
-    """Perform a generic API call using the requests library.
+    """Perform a generic API call through the shared pooled HTTP client.
 
     Args:
         url (str): API endpoint.
         method (str): HTTP method (GET, POST, PUT, DELETE, etc.). Defaults to 'GET'.
-        data (str or dict, optional): Request body, JSON string, or dictionary. Defaults to None.
+        data (str or dict, optional): Request body as a JSON string, or query parameters for GET. Defaults to None.
         headers (dict, optional): Additional headers for the request. Defaults to {'Content-Type': 'application/json'}.
 
     Returns:
-        requests.Response: Response object from the API call.
+        httpx.Response: Response object from the API call.
     """
     if headers is None:
         headers = {"Content-Type": "application/json"}
 
-    if method.upper() == "GET":
-        response = requests.get(url, headers=headers, params=data)
-    elif method.upper() == "POST":
-        response = requests.post(url, headers=headers, data=data)
-    elif method.upper() == "PUT":
-        response = requests.put(url, headers=headers, data=data)
-    elif method.upper() == "DELETE":
-        response = requests.delete(url, headers=headers, data=data)
-    else:
-        raise ValueError(f"Unsupported method {method}")
-
-    return response
+    method = method.upper()
+    if method == "GET":
+        return http_client.request("GET", url, headers=headers, params=data)
+    if method in ("POST", "PUT", "DELETE"):
+        return http_client.request(method, url, headers=headers, data=data)
+    raise ValueError(f"Unsupported method {method}")
 
 def send_features_to_api(features_dict):
     """Send calculated features (risk, volatility, return, etc.) to another URL as JSON.
@@ -171,9 +543,23 @@ def send_features_to_api(features_dict):
         features_dict (dict): Dictionary containing the calculated features.
 
     Returns:
-        requests.Response: Response object from the API call.
+        httpx.Response: Response object from the API call.
     """
     url = f"{VECTOR_DB_URL}/store"
 
     payload = json.dumps(features_dict)
+    return perform_api_call(url=url, method="POST", data=payload)
+
+def send_feature_vectors_to_api(documents):
+    """Store computed features as structured, filterable points in the vector store.
+
+    Args:
+        documents (list): Dicts with 'ticker', 'start_date', 'end_date' (YYYY-MM-DD) and 'features' (name -> float).
+
+    Returns:
+        httpx.Response: Response object from the API call.
+    """
+    url = f"{VECTOR_DB_URL}/store_feature_vectors"
+
+    payload = json.dumps(documents)
     return perform_api_call(url=url, method="POST", data=payload)
\ No newline at end of file
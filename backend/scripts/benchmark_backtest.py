@@ -0,0 +1,69 @@
+"""
+Benchmark the vectorized backtester on synthetic daily closes.
+
+Runs a momentum parameter grid (every lookback x skip x top_k x rebalance
+combination) over the same close matrix and reports wall time per worker count:
+
+  - tickers:  universe size
+  - years:    history length in trading years
+  - variants: number of strategy variants in the grid
+  - workers:  size of the process pool (PROCESS_WORKERS); 1 runs in-process
+
+Usage:
+    python scripts/benchmark_backtest.py --tickers 50 --years 10 --workers 1 4
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import parallel  # noqa: E402
+from backtest import expand_grid, run_variants  # noqa: E402
+
+
+def make_close(tickers, years, seed=0):
+    rng = np.random.default_rng(seed)
+    days = 252 * years
+    returns = rng.normal(0.0003, 0.015, (days, tickers))
+    index = pd.bdate_range("2010-01-01", periods=days)
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=[f"T{t:04d}" for t in range(tickers)])
+
+
+def make_variants():
+    grid = {"lookback": [63, 126, 189, 252], "skip": [0, 5, 21], "top_k": [3, 5, 10, 15, 20]}
+    return [
+        variant
+        for rebalance in ("W", "M", "Q")
+        for variant in expand_grid("momentum", grid, rebalance=rebalance, cost_bps=5.0)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    close = make_close(args.tickers, args.years)
+    variants = make_variants()
+    print(f"{'tickers':>8}{'days':>7}{'variants':>10}{'workers':>9}{'seconds':>10}{'best sharpe':>13}")
+    for workers in dict.fromkeys(args.workers):
+        parallel.PROCESS_WORKERS = workers
+        parallel._pool = None
+        started = time.perf_counter()
+        results = run_variants(close, variants)
+        elapsed = time.perf_counter() - started
+        best = max(result["stats"]["sharpe"] or float("-inf") for result in results)
+        print(f"{args.tickers:>8}{len(close):>7}{len(variants):>10}{workers:>9}{elapsed:>10.2f}{best:>13.3f}")
+        pool = parallel.process_pool()
+        if pool is not None:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the Monte Carlo VaR/CVaR engine on synthetic factor-model returns.
+
+For each asset count, times one full simulation and checks that the result is
+identical for every worker count (chunks are seeded independently of workers):
+
+  - assets:  portfolio size (equal weights)
+  - paths:   simulated horizon returns
+  - workers: size of the process pool (PROCESS_WORKERS); 1 runs in-process
+
+Usage:
+    python scripts/benchmark_risk.py --assets 100 300 500 --paths 100000 --workers 1 4
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import parallel  # noqa: E402
+from risk import monte_carlo_var  # noqa: E402
+
+
+def make_moments(assets, days=504, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (days, 5))
+    loadings = rng.normal(0, 1, (5, assets))
+    returns = 0.5 * factors @ loadings + rng.normal(0.0003, 0.012, (days, assets))
+    return returns.mean(axis=0), np.cov(returns, rowvar=False)
+
+
+def run(assets, paths, workers, horizon, distribution):
+    parallel.PROCESS_WORKERS = workers
+    parallel._pool = None
+    mean, cov = make_moments(assets)
+    weights = np.full(assets, 1.0 / assets)
+    # Warm the pool so process start-up is not part of the timing
+    monte_carlo_var(mean, cov, weights, paths=parallel.PROCESS_WORKERS, chunk_size=1)
+    started = time.perf_counter()
+    result = monte_carlo_var(mean, cov, weights, horizon=horizon, paths=paths, distribution=distribution)
+    elapsed = time.perf_counter() - started
+    pool = parallel.process_pool()
+    if pool is not None:
+        pool.shutdown()
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, nargs="+", default=[100, 300, 500])
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--horizon", type=int, default=1)
+    parser.add_argument("--distribution", choices=("normal", "t"), default="normal")
+    args = parser.parse_args()
+
+    print(f"{'assets':>8}{'paths':>10}{'workers':>9}{'seconds':>10}{'VaR 99%':>12}{'CVaR 99%':>12}")
+    for assets in args.assets:
+        reference = None
+        for workers in dict.fromkeys(args.workers):
+            elapsed, result = run(assets, args.paths, workers, args.horizon, args.distribution)
+            tail = result["0.99"]
+            print(f"{assets:>8}{args.paths:>10}{workers:>9}{elapsed:>10.2f}{tail['var']:>12.5f}{tail['cvar']:>12.5f}")
+            if reference is not None and reference != result:
+                print("  warning: result differs between worker counts")
+            reference = result
+
+
+if __name__ == "__main__":
+    main()
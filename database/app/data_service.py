@@ -1,21 +1,70 @@
 import os
-from fastapi import FastAPI, HTTPException
-from datetime import date
+import json
 import logging
-from langchain_qdrant import QdrantVectorStore
+from typing import AsyncIterator, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import date, datetime
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from langchain_openai import OpenAIEmbeddings
+from qdrant_client.http.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 # Local imports
 from app.remote_log_handler import RemoteLogHandler
-from app.models import MainData, FeatureData
+from app.instrumentation import instrument_app, timed, TraceFilter
+from app.models import (
+    MainData,
+    MainDataBatch,
+    FeatureData,
+    FeatureState,
+    FeatureVectorDocument,
+    SimilarityVector,
+    SearchRequest
+)
 from app.services import (
     store_main_data_logic,
+    store_main_data_batch_logic,
     load_main_data_logic,
+    iter_main_data,
     store_feature_data_logic,
     load_feature_data_logic,
-    query_feature_data_logic
+    iter_feature_data,
+    query_feature_data_logic,
+    ensure_indexes,
+    store_feature_state_logic,
+    load_feature_state_logic,
+    resample_main_data_logic,
+    candles_changed_logic
+)
+from app.embeddings import (
+    EmbeddingCache,
+    IngestionPipeline,
+    embedder_from_env,
+    point_id
+)
+from app.feature_vectors import (
+    FEATURE_COLLECTION,
+    FEATURE_VECTOR_NAMES,
+    SIMILARITY_COLLECTION,
+    build_filter,
+    ensure_feature_collection,
+    ensure_similarity_collection,
+    ensure_payload_indexes,
+    feature_doc_id,
+    feature_payload,
+    feature_text,
+    feature_vector,
+    similarity_point,
+    similarity_point_id
+)
+from app.export import (
+    OHLC_SCHEMA,
+    FEATURE_SCHEMA,
+    MEDIA_TYPES,
+    ohlc_batches,
+    feature_batches,
+    encode_batches
 )
 from dotenv import load_dotenv
 load_dotenv()
@@ -26,15 +75,32 @@ LOG_URL = os.getenv("LOG_URL")
 logger = logging.getLogger("remote_logger")
 logger.setLevel(logging.INFO)
 
-remote_handler = RemoteLogHandler(LOG_URL)
-formatter = logging.Formatter('Data Service log: - %(asctime)s - %(name)s - %(levelname)s - %(message)s')
+remote_handler = RemoteLogHandler(
+    LOG_URL,
+    max_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    max_batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+    overflow_policy=os.getenv("LOG_OVERFLOW_POLICY", "drop_newest"),
+)
+formatter = logging.Formatter('Data Service log: - %(asctime)s - %(name)s - %(levelname)s - [trace %(trace_id)s] %(message)s')
 remote_handler.setFormatter(formatter)
+remote_handler.addFilter(TraceFilter())
 logger.addHandler(remote_handler)
 
 # ----------------------------
 # Create your FastAPI instance
 # ----------------------------
 app = FastAPI()
+instrument_app(app, "database", logger)
+
+
+@app.on_event("startup")
+async def create_indexes():
+    """
+    Create and verify the MongoDB indexes before serving requests.
+    """
+    indexes = await ensure_indexes()
+    logger.info(f"MongoDB indexes verified: {indexes}")
 
 
 # ----------------------------
@@ -49,26 +115,109 @@ async def store_data_endpoint(data: MainData):
     logger.info("Starting to store main data.")
     try:
         inserted_id = await store_main_data_logic(data)
+        await candles_changed_logic(data.ticker)
         logger.info(f"Document stored with ID: {inserted_id}")
         return {"message": "Data stored successfully", "id": inserted_id}
     except Exception as e:
         logger.exception("Exception while storing main data.")
         return {"error": str(e)}
 
+@app.post("/store_data_batch")
+async def store_data_batch_endpoint(batch: MainDataBatch):
+    """
+    Store a columnar batch of main data in MongoDB with a single bulk write.
+    """
+    received = len(batch.date_time)
+    logger.info(f"Starting to store main data batch of {received} rows for ticker: {batch.ticker}")
+    try:
+        inserted, updated, failed = await store_main_data_batch_logic(batch)
+        if inserted or updated:
+            await candles_changed_logic(batch.ticker)
+        logger.info(f"Batch stored for ticker {batch.ticker}: {inserted} inserted, {updated} updated, {failed} failed")
+        return {
+            "message": "Batch stored",
+            "received": received,
+            "inserted": inserted,
+            "updated": updated,
+            "failed": failed,
+        }
+    except Exception as e:
+        logger.exception("Exception while storing main data batch.")
+        return {"error": str(e)}
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def ndjson_lines(docs: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Serialize documents to NDJSON one line at a time as the cursor yields them.
+    """
+    try:
+        async for doc in docs:
+            yield json.dumps(doc, default=_json_default) + "\n"
+    except Exception:
+        # Headers are already sent, so the client only sees a truncated stream
+        logger.exception("Exception while streaming documents.")
+
+
+def _split_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+
 @app.get("/load_data/{ticker}")
-async def load_data_endpoint(ticker: str):
+async def load_data_endpoint(
+    ticker: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date_time,close"),
+    after: Optional[datetime] = Query(None, description="date_time of the last row of the previous page"),
+    limit: Optional[int] = Query(None, gt=0, description="Maximum number of rows to return"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
     """
-    Load all main data documents for a given ticker.
+    Load main data documents for a given ticker in date order.
+    With format=ndjson the rows are streamed as the Mongo cursor produces them.
+    With a limit, the X-Next-Cursor header carries the `after` value of the next page.
     """
     logger.info(f"Starting to load main data for ticker: {ticker}")
+    filters = dict(start=start, end=end, fields=_split_fields(fields), after=after, limit=limit)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(iter_main_data(ticker, **filters)), media_type="application/x-ndjson")
     try:
-        docs = await load_main_data_logic(ticker)
+        docs = await load_main_data_logic(ticker, **filters)
         logger.info(f"Data loaded successfully for ticker: {ticker}")
+        if limit and len(docs) == limit:
+            return JSONResponse(
+                content=jsonable_encoder(docs),
+                headers={"X-Next-Cursor": docs[-1]["date_time"].isoformat()}
+            )
         return docs
     except Exception as e:
         logger.exception("Exception while loading main data.")
         return {"error": str(e)}
 
+@app.get("/resample/{ticker}")
+async def resample_endpoint(
+    ticker: str,
+    unit: Literal["day", "week", "month", "quarter", "year"] = "week",
+    bin_size: int = Query(1, gt=0, description="Number of units per bar, e.g. unit=day&bin_size=3"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    OHLC bars of a ticker resampled inside MongoDB from the stored daily candles.
+    Results are cached per resolution and refreshed when new candles are ingested.
+    """
+    logger.info(f"Resampling {ticker} to {bin_size} {unit} bars")
+    try:
+        bars, cached = await resample_main_data_logic(ticker, unit, bin_size, start, end)
+        logger.info(f"Returned {len(bars)} {unit} bars for {ticker} (cached={cached})")
+        return {"ticker": ticker, "unit": unit, "bin_size": bin_size, "cached": cached, "bars": bars}
+    except Exception as e:
+        logger.exception("Exception while resampling main data.")
+        return {"error": str(e)}
+
 @app.post("/store_features")
 async def store_features_endpoint(data: FeatureData):
     """
@@ -84,19 +233,68 @@ async def store_features_endpoint(data: FeatureData):
         return {"error": str(e)}
 
 @app.get("/load_features/{ticker}")
-async def load_features_endpoint(ticker: str):
+async def load_features_endpoint(
+    ticker: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,value"),
+    after: Optional[str] = Query(None, description="_id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, gt=0, description="Maximum number of rows to return"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
     """
-    Load all feature data documents for a given ticker.
+    Load feature data documents for a given ticker.
+    With format=ndjson the rows are streamed as the Mongo cursor produces them.
+    With a limit, the X-Next-Cursor header carries the `after` value of the next page.
     """
     logger.info(f"Starting to load features for ticker: {ticker}")
+    filters = dict(start=start, end=end, fields=_split_fields(fields), after=after, limit=limit)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(iter_feature_data(ticker, **filters)), media_type="application/x-ndjson")
     try:
-        docs = await load_feature_data_logic(ticker)
+        docs = await load_feature_data_logic(ticker, **filters)
         logger.info(f"Features loaded successfully for ticker: {ticker}")
+        if limit and len(docs) == limit:
+            return JSONResponse(content=jsonable_encoder(docs), headers={"X-Next-Cursor": docs[-1]["_id"]})
         return docs
     except Exception as e:
         logger.exception("Exception while loading feature data.")
         return {"error": str(e)}
 
+@app.get("/export/ohlc")
+async def export_ohlc_endpoint(
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = Query("arrow", pattern="^(arrow|parquet)$"),
+):
+    """
+    Export OHLC candles of several tickers as one columnar Arrow IPC stream or Parquet file.
+    """
+    ticker_list = _split_fields(tickers)
+    logger.info(f"Exporting OHLC data as {format} for {len(ticker_list)} tickers")
+    return StreamingResponse(
+        encode_batches(ohlc_batches(ticker_list, start, end), OHLC_SCHEMA, format),
+        media_type=MEDIA_TYPES[format]
+    )
+
+@app.get("/export/features")
+async def export_features_endpoint(
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: str = Query("arrow", pattern="^(arrow|parquet)$"),
+):
+    """
+    Export feature data of several tickers as one columnar Arrow IPC stream or Parquet file.
+    """
+    ticker_list = _split_fields(tickers)
+    logger.info(f"Exporting feature data as {format} for {len(ticker_list)} tickers")
+    return StreamingResponse(
+        encode_batches(feature_batches(ticker_list, start, end), FEATURE_SCHEMA, format),
+        media_type=MEDIA_TYPES[format]
+    )
+
 @app.get("/query_features")
 async def query_features_endpoint(name: str, start: date, end: date):
     """
@@ -111,6 +309,36 @@ async def query_features_endpoint(name: str, start: date, end: date):
         logger.exception("Exception while querying feature data.")
         return {"error": str(e)}
 
+@app.post("/store_feature_state")
+async def store_feature_state_endpoint(data: FeatureState):
+    """
+    Store (replace) the incremental feature state of a ticker.
+    """
+    logger.info(f"Storing feature state for ticker: {data.ticker} as of {data.last_date}")
+    try:
+        await store_feature_state_logic(data)
+        return {"message": "Feature state stored successfully"}
+    except Exception as e:
+        logger.exception("Exception while storing feature state.")
+        return {"error": str(e)}
+
+@app.get("/load_feature_state/{ticker}")
+async def load_feature_state_endpoint(ticker: str):
+    """
+    Load the incremental feature state of a ticker.
+    """
+    logger.info(f"Loading feature state for ticker: {ticker}")
+    try:
+        doc = await load_feature_state_logic(ticker)
+        if doc is None:
+            raise HTTPException(status_code=404, detail=f"No feature state for {ticker}")
+        return doc
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Exception while loading feature state.")
+        return {"error": str(e)}
+
 
 # ---------------------------------------------------------------------------------
 # Vector DB services
@@ -121,17 +349,28 @@ async def query_features_endpoint(name: str, start: date, end: date):
 QDRANT_URI = os.getenv("QDRANT_URI", ":memory:")
 client = QdrantClient(QDRANT_URI)  # for in-memory DB, or replace with "http://<Qdrant server address>:<port>"
 
+# EMBEDDER=hash swaps OpenAI for a local deterministic embedder (no network)
+embedder = embedder_from_env()
+
 collection_name = "demo_collection"
-client.create_collection(
-    collection_name=collection_name,
-    vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
-)
+if not client.collection_exists(collection_name):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=embedder.dimension, distance=Distance.COSINE),
+    )
+
+ensure_payload_indexes(client, collection_name)
+ensure_feature_collection(client)
 
-# Initialize Vector Store with Langchain
-vector_store = QdrantVectorStore(
-    client=client,
-    collection_name=collection_name,
-    embedding=OpenAIEmbeddings(),
+ingestion = IngestionPipeline(
+    client,
+    collection_name,
+    embedder,
+    cache=EmbeddingCache(
+        os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000")),
+    ),
+    batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
 )
 
 # Pydantic model for storing data
@@ -139,32 +378,191 @@ class Document(BaseModel):
     id: str
     text: str
 
+
+def ingest_documents_with_payload(docs: List[dict]) -> dict:
+    """
+    Embed (cache-aware, in EMBED_BATCH_SIZE batches) and upsert {'id', 'text', 'payload'} dicts; blocking.
+    """
+    return ingestion.write(docs)
+
+
+def ingest_documents(docs: List[Document]) -> dict:
+    return ingest_documents_with_payload([doc.model_dump() for doc in docs])
+
 @app.post("/store")
 async def store_vector(doc: Document):
     logger.info(f"Starting to store document with ID: {doc.id}")
     try:
         # Store vector in the Qdrant database
         logger.info(f"Storing document with ID: {doc.id}")
-        vector_store.store(documents=[{'id': doc.id, 'text': doc.text}])
+        await run_in_threadpool(ingest_documents, [doc])
         logger.info(f"Document with ID: {doc.id} stored successfully")
         return {"message": "Document stored successfully"}
     except Exception as e:
         logger.error(f"Failed to store document with ID: {doc.id}. Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to store document: {str(e)}")
 
+@app.post("/store_batch")
+async def store_vector_batch(docs: List[Document]):
+    """
+    Store many documents; unchanged texts are served from the embedding cache.
+    """
+    logger.info(f"Starting to store batch of {len(docs)} documents")
+    try:
+        counts = await run_in_threadpool(ingest_documents, docs)
+        logger.info(f"Stored batch: {counts}")
+        return {"message": "Documents stored successfully", **counts}
+    except Exception as e:
+        logger.error(f"Failed to store document batch. Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to store documents: {str(e)}")
+
+def ingest_feature_vectors(docs: List[FeatureVectorDocument]) -> dict:
+    """
+    Store each feature set twice: as filterable text in the text collection and
+    as a numeric metric vector in FEATURE_COLLECTION; blocking.
+    """
+    counts = ingest_documents_with_payload([
+        {"id": feature_doc_id(doc), "text": feature_text(doc), "payload": feature_payload(doc)}
+        for doc in docs
+    ])
+    points = [
+        PointStruct(id=point_id(feature_doc_id(doc)), vector=feature_vector(doc.features), payload=feature_payload(doc))
+        for doc in docs
+    ]
+    for start in range(0, len(points), ingestion.batch_size):
+        with timed("qdrant_upsert"):
+            client.upsert(collection_name=FEATURE_COLLECTION, points=points[start:start + ingestion.batch_size], wait=True)
+    counts["feature_vectors"] = len(points)
+    return counts
+
+
+@app.post("/store_feature_vectors")
+async def store_feature_vectors(docs: List[FeatureVectorDocument]):
+    """
+    Store computed features as Qdrant points with ticker / as_of / window payload fields.
+    """
+    logger.info(f"Starting to store {len(docs)} feature vectors")
+    try:
+        counts = await run_in_threadpool(ingest_feature_vectors, docs)
+        logger.info(f"Stored feature vectors: {counts}")
+        return {"message": "Feature vectors stored successfully", **counts}
+    except Exception as e:
+        logger.error(f"Failed to store feature vectors. Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to store feature vectors: {str(e)}")
+
+@app.post("/search")
+async def search_vectors(request: SearchRequest):
+    """
+    Similarity search combined with payload filters on ticker, as-of date and window.
+    """
+    logger.info(f"Searching {request.collection} collection")
+    if request.collection == "text":
+        if not request.query:
+            raise HTTPException(status_code=400, detail="`query` is required for the text collection")
+        target = collection_name
+        vector = (await run_in_threadpool(ingestion.embed, [request.query]))[0]
+    else:
+        if not request.vector or len(request.vector) != len(FEATURE_VECTOR_NAMES):
+            raise HTTPException(
+                status_code=400,
+                detail=f"`vector` must hold {len(FEATURE_VECTOR_NAMES)} values ordered as {FEATURE_VECTOR_NAMES}"
+            )
+        target = FEATURE_COLLECTION
+        vector = request.vector
+
+    query_filter = build_filter(request.tickers, request.as_of_from, request.as_of_to, request.window_days)
+    try:
+        with timed("qdrant_query"):
+            response = await run_in_threadpool(
+                lambda: client.query_points(
+                    collection_name=target, query=vector, query_filter=query_filter,
+                    limit=request.limit, with_payload=True
+                )
+            )
+        return {"results": [{"score": point.score, "payload": point.payload} for point in response.points]}
+    except Exception as e:
+        logger.error(f"Search failed. Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@app.post("/store_similarity_vectors")
+async def store_similarity_vectors(docs: List[SimilarityVector]):
+    """
+    Upsert the latest similarity vector of each ticker; only the given tickers are re-indexed.
+    """
+    if not docs:
+        return {"message": "No similarity vectors given", "upserted": 0}
+    logger.info(f"Indexing similarity vectors for {len(docs)} tickers")
+    try:
+        def upsert():
+            ensure_similarity_collection(client, len(docs[0].vector))
+            with timed("qdrant_upsert"):
+                client.upsert(collection_name=SIMILARITY_COLLECTION, points=[similarity_point(doc) for doc in docs], wait=True)
+        await run_in_threadpool(upsert)
+        return {"message": "Similarity vectors stored successfully", "upserted": len(docs)}
+    except Exception as e:
+        logger.error(f"Failed to store similarity vectors. Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to store similarity vectors: {str(e)}")
+
+@app.get("/similar/{ticker}")
+async def similar_assets(ticker: str, k: int = Query(5, ge=1, le=100)):
+    """
+    Top-k nearest tickers to `ticker` in the similarity index (cosine, HNSW).
+    Only vectors with the same as-of date are compared, since their return parts cover the same days.
+    """
+    logger.info(f"Finding {k} assets similar to {ticker}")
+
+    def query():
+        if not client.collection_exists(SIMILARITY_COLLECTION):
+            return None
+        found = client.retrieve(SIMILARITY_COLLECTION, ids=[similarity_point_id(ticker)], with_vectors=True)
+        if not found:
+            return None
+        return client.query_points(
+            collection_name=SIMILARITY_COLLECTION,
+            query=found[0].vector,
+            query_filter=Filter(
+                must=[FieldCondition(key="as_of", match=MatchValue(value=found[0].payload["as_of"]))],
+                must_not=[FieldCondition(key="ticker", match=MatchValue(value=ticker))],
+            ),
+            limit=k,
+            with_payload=True,
+        )
+
+    try:
+        with timed("qdrant_query"):
+            response = await run_in_threadpool(query)
+    except Exception as e:
+        logger.error(f"Similarity search for {ticker} failed. Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+    if response is None:
+        raise HTTPException(status_code=404, detail=f"{ticker} is not in the similarity index")
+    return {
+        "ticker": ticker,
+        "similar": [
+            {"ticker": point.payload["ticker"], "score": point.score, "as_of": point.payload["as_of"],
+             "features": point.payload.get("features", {})}
+            for point in response.points
+        ]
+    }
+
+@app.get("/embedding_cache/stats")
+async def embedding_cache_stats():
+    return ingestion.cache.stats()
+
 @app.get("/load/{doc_id}")
 async def load_vector(doc_id: str):
     logger.info(f"Starting to load document with ID: {doc_id}")
     try:
         # Load vector data by document ID
         logger.info(f"Loading document with ID: {doc_id}")
-        document = vector_store.load({'id': doc_id})
-        if document:
+        points = await run_in_threadpool(client.retrieve, collection_name, [point_id(doc_id)])
+        if points:
             logger.info(f"Document with ID: {doc_id} loaded successfully")
-            return {"document": document}
+            payload = points[0].payload
+            return {"document": {"id": doc_id, "text": payload.get("page_content"), "payload": payload}}
         else:
             logger.warning(f"Document with ID: {doc_id} not found")
             return {"message": "Document not found"}
     except Exception as e:
         logger.error(f"Failed to load document with ID: {doc_id}. Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to load document: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to load document: {str(e)}")
@@ -0,0 +1,227 @@
+import os
+import re
+import math
+import time
+import uuid
+import struct
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import PointStruct
+from app.instrumentation import timed
+
+# Qdrant only accepts unsigned ints or UUIDs as point ids
+POINT_NAMESPACE = uuid.UUID("0b6d7a3c-5f3e-4c52-9a53-3f0c2b8f1d41")
+
+
+def point_id(doc_id: str) -> str:
+    """
+    Stable Qdrant point id for an arbitrary document id.
+    """
+    return str(uuid.uuid5(POINT_NAMESPACE, doc_id))
+
+
+class Embedder(ABC):
+    """
+    Turns texts into vectors. `name` is part of the cache key so switching
+    models never serves stale vectors.
+    """
+    name = "embedder"
+    dimension = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        One `dimension`-long vector per text, in the order of `texts`.
+        """
+
+
+class OpenAIEmbedder(Embedder):
+    """
+    OpenAI embeddings through langchain; one API call per batch of texts.
+    """
+
+    def __init__(self, model: str = "text-embedding-ada-002", dimension: int = 1536):
+        from langchain_openai import OpenAIEmbeddings
+        self._embeddings = OpenAIEmbeddings(model=model)
+        self.name = f"openai:{model}"
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(texts)
+
+
+class HashEmbedder(Embedder):
+    """
+    Deterministic, network-free embedder for tests and benchmarks: words and
+    character trigrams are hashed into a fixed number of signed buckets.
+    """
+
+    def __init__(self, dimension: int = 256):
+        self.name = f"hash:{dimension}"
+        self.dimension = dimension
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        padded = f" {' '.join(words)} "
+        return words + [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimension
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dimension
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+
+class EmbeddingCache:
+    """
+    On-disk content-hash -> vector cache with least-recently-used eviction.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_access)")
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{text}".encode()).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock, self._conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = list(struct.unpack(f"{len(blob) // 4}f", blob))
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, struct.pack(f"{len(vector)}f", *vector), now) for key, vector in vectors.items()]
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size, "max_entries": self.max_entries}
+
+
+class IngestionPipeline:
+    """
+    Embeds only texts missing from the cache in batches of `batch_size` and
+    writes points to Qdrant with batched upserts. It holds no per-request state,
+    so concurrent callers each write (and hear about) exactly their own documents;
+    only the embedding cache is shared, behind its own lock.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        embedder: Embedder,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.embedder = embedder
+        self.cache = cache
+        self.batch_size = batch_size
+
+    def write(self, documents: List[dict]) -> dict:
+        """
+        Embed and upsert documents ({'id', 'text', optional 'payload'}) in batches of batch_size;
+        returns once all of them are in Qdrant.
+        """
+        totals = {"upserted": 0, "embedded": 0, "cached": 0}
+        for start in range(0, len(documents), self.batch_size):
+            _add_counts(totals, self._write(documents[start:start + self.batch_size]))
+        return totals
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Vectors for `texts`, computing only those not already cached.
+        """
+        return self._embed(texts)[0]
+
+    def _embed(self, texts: List[str]) -> Tuple[List[List[float]], int]:
+        keys = [EmbeddingCache.key(self.embedder.name, text) for text in texts]
+        known = self.cache.get_many(list(set(keys))) if self.cache else {}
+        missing = {key: text for key, text in zip(keys, texts) if key not in known}
+        if missing:
+            with timed("embedding"):
+                fresh = dict(zip(missing, self.embedder.embed(list(missing.values()))))
+            if self.cache:
+                self.cache.put_many(fresh)
+            known.update(fresh)
+        return [known[key] for key in keys], len(missing)
+
+    def _write(self, batch: List[dict]) -> dict:
+        vectors, embedded = self._embed([doc["text"] for doc in batch])
+        points = [
+            PointStruct(
+                id=point_id(doc["id"]),
+                vector=vector,
+                # page_content/metadata keep the points readable by langchain's QdrantVectorStore
+                payload={"page_content": doc["text"], "metadata": {"id": doc["id"]}, **doc.get("payload", {})},
+            )
+            for doc, vector in zip(batch, vectors)
+        ]
+        with timed("qdrant_upsert"):
+            self.client.upsert(collection_name=self.collection_name, points=points, wait=True)
+        return {"upserted": len(points), "embedded": embedded, "cached": len(points) - embedded}
+
+
+def _add_counts(totals: dict, counts: dict) -> None:
+    for name, value in counts.items():
+        totals[name] += value
+
+
+def embedder_from_env() -> Embedder:
+    """
+    EMBEDDER=openai (default) or EMBEDDER=hash for the offline deterministic embedder.
+    """
+    if os.getenv("EMBEDDER", "openai") == "hash":
+        return HashEmbedder(int(os.getenv("EMBEDDING_DIM", "256")))
+    return OpenAIEmbedder(
+        model=os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002"),
+        dimension=int(os.getenv("EMBEDDING_DIM", "1536")),
+    )
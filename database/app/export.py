@@ -0,0 +1,108 @@
+import io
+import os
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.services import as_datetime, database
+
+# Rows per Arrow record batch / Parquet row group
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "50000"))
+
+OHLC_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("date_time", pa.timestamp("ms")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+])
+
+FEATURE_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("name", pa.string()),
+    ("start_date", pa.date32()),
+    ("end_date", pa.date32()),
+    ("value", pa.float64()),
+])
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+async def _record_batches(cursor, schema: pa.Schema) -> AsyncIterator[pa.RecordBatch]:
+    """
+    Accumulate cursor documents straight into per-column lists and emit one
+    RecordBatch every EXPORT_BATCH_SIZE rows.
+    """
+    names = schema.names
+    columns = {name: [] for name in names}
+    rows = 0
+    async for doc in cursor:
+        for name in names:
+            columns[name].append(doc.get(name))
+        rows += 1
+        if rows == EXPORT_BATCH_SIZE:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {name: [] for name in names}
+            rows = 0
+    if rows:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def ohlc_batches(tickers: List[str], start: Optional[datetime], end: Optional[datetime]) -> AsyncIterator[pa.RecordBatch]:
+    query = {"ticker": {"$in": tickers}}
+    time_range = {}
+    if start:
+        time_range["$gte"] = start
+    if end:
+        time_range["$lte"] = end
+    if time_range:
+        query["date_time"] = time_range
+    projection = {name: 1 for name in OHLC_SCHEMA.names}
+    projection["_id"] = 0
+    cursor = database["main_data"].find(query, projection)
+    cursor = cursor.sort([("ticker", 1), ("date_time", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    return _record_batches(cursor, OHLC_SCHEMA)
+
+
+def feature_batches(tickers: List[str], start: Optional[date], end: Optional[date]) -> AsyncIterator[pa.RecordBatch]:
+    query = {"ticker": {"$in": tickers}}
+    if start:
+        query["start_date"] = {"$gte": as_datetime(start)}
+    if end:
+        query["end_date"] = {"$lte": as_datetime(end)}
+    projection = {name: 1 for name in FEATURE_SCHEMA.names}
+    projection["_id"] = 0
+    cursor = database["feature_data"].find(query, projection)
+    cursor = cursor.sort([("ticker", 1), ("name", 1), ("start_date", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    return _record_batches(cursor, FEATURE_SCHEMA)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+async def encode_batches(batches: AsyncIterator[pa.RecordBatch], schema: pa.Schema, format: str) -> AsyncIterator[bytes]:
+    """
+    Encode record batches as an Arrow IPC stream or a Parquet file, yielding
+    bytes as each batch is written so the full table is never held in memory.
+    """
+    sink = io.BytesIO()
+    if format == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for batch in batches:
+            writer.write_batch(batch)
+            yield _drain(sink)
+    finally:
+        writer.close()
+    yield _drain(sink)
@@ -0,0 +1,148 @@
+import math
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    DatetimeRange,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    PointStruct,
+    VectorParams,
+)
+from app.embeddings import point_id
+from app.models import FeatureVectorDocument, SimilarityVector
+
+# Collection whose vectors are the computed metrics themselves, in this order
+FEATURE_COLLECTION = "feature_vectors"
+FEATURE_VECTOR_NAMES = [
+    "volatility",
+    "annualized_return",
+    "volatility_21d",
+    "volatility_63d",
+    "max_drawdown",
+    "sharpe",
+    "sortino",
+    "momentum_21d",
+    "momentum_63d",
+    "momentum_252d",
+]
+
+# One point per ticker holding its latest similarity vector (HNSW, cosine)
+SIMILARITY_COLLECTION = "asset_similarity"
+
+PAYLOAD_INDEXES = {
+    "ticker": PayloadSchemaType.KEYWORD,
+    "as_of": PayloadSchemaType.DATETIME,
+    "feature_names": PayloadSchemaType.KEYWORD,
+    "window_days": PayloadSchemaType.INTEGER,
+}
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    """
+    Index the filterable payload fields so filtered searches never scan every point.
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field not in existing:
+            client.create_payload_index(collection_name, field_name=field, field_schema=schema)
+
+
+def ensure_feature_collection(client: QdrantClient) -> None:
+    if not client.collection_exists(FEATURE_COLLECTION):
+        client.create_collection(
+            collection_name=FEATURE_COLLECTION,
+            vectors_config=VectorParams(size=len(FEATURE_VECTOR_NAMES), distance=Distance.EUCLID),
+        )
+    ensure_payload_indexes(client, FEATURE_COLLECTION)
+
+
+def ensure_similarity_collection(client: QdrantClient, dimension: int) -> None:
+    """
+    Created on first write, since the vector size is decided by the backend.
+    """
+    if not client.collection_exists(SIMILARITY_COLLECTION):
+        client.create_collection(
+            collection_name=SIMILARITY_COLLECTION,
+            vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+        )
+        client.create_payload_index(SIMILARITY_COLLECTION, field_name="ticker", field_schema=PayloadSchemaType.KEYWORD)
+        client.create_payload_index(SIMILARITY_COLLECTION, field_name="as_of", field_schema=PayloadSchemaType.KEYWORD)
+
+
+def similarity_point_id(ticker: str) -> str:
+    return point_id(f"similarity:{ticker}")
+
+
+def similarity_point(doc: SimilarityVector) -> PointStruct:
+    return PointStruct(
+        id=similarity_point_id(doc.ticker),
+        vector=doc.vector,
+        payload={"ticker": doc.ticker, "as_of": _as_of(doc.as_of), "features": doc.features},
+    )
+
+
+def _as_of(value: date) -> str:
+    return datetime.combine(value, time(), tzinfo=timezone.utc).isoformat()
+
+
+def feature_doc_id(doc: FeatureVectorDocument) -> str:
+    """
+    One point per (ticker, as-of date, window), so recomputing the same window overwrites it.
+    """
+    return f"{doc.ticker}:{doc.end_date.isoformat()}:{(doc.end_date - doc.start_date).days}d"
+
+
+def feature_payload(doc: FeatureVectorDocument) -> dict:
+    return {
+        "ticker": doc.ticker,
+        "as_of": _as_of(doc.end_date),
+        "start_date": doc.start_date.isoformat(),
+        "window_days": (doc.end_date - doc.start_date).days,
+        "feature_names": sorted(name for name, value in doc.features.items() if value is not None),
+        "features": doc.features,
+    }
+
+
+def feature_text(doc: FeatureVectorDocument) -> str:
+    values = ", ".join(
+        f"{name.replace('_', ' ')} {value:.4f}" for name, value in sorted(doc.features.items()) if value is not None
+    )
+    return f"{doc.ticker} as of {doc.end_date.isoformat()} over {(doc.end_date - doc.start_date).days} days: {values}"
+
+
+def feature_vector(features: Dict[str, Optional[float]]) -> List[float]:
+    """
+    Metrics in FEATURE_VECTOR_NAMES order; missing or non-finite values become 0.
+    """
+    vector = []
+    for name in FEATURE_VECTOR_NAMES:
+        value = features.get(name)
+        vector.append(float(value) if value is not None and math.isfinite(value) else 0.0)
+    return vector
+
+
+def build_filter(
+    tickers: Optional[List[str]] = None,
+    as_of_from: Optional[date] = None,
+    as_of_to: Optional[date] = None,
+    window_days: Optional[int] = None,
+) -> Optional[Filter]:
+    conditions = []
+    if tickers:
+        conditions.append(FieldCondition(key="ticker", match=MatchAny(any=tickers)))
+    if as_of_from or as_of_to:
+        conditions.append(FieldCondition(
+            key="as_of",
+            range=DatetimeRange(
+                gte=_as_of(as_of_from) if as_of_from else None,
+                lte=_as_of(as_of_to) if as_of_to else None,
+            ),
+        ))
+    if window_days is not None:
+        conditions.append(FieldCondition(key="window_days", match=MatchValue(value=window_days)))
+    return Filter(must=conditions) if conditions else None
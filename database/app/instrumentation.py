@@ -0,0 +1,177 @@
+# Shared by every service; keep the copies in backend/app, database/app and logging/app identical
+import time
+import uuid
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+TRACE_HEADER = "X-Trace-Id"
+# Seconds; covers sub-millisecond cache hits up to long agent turns
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["service", "method", "route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["service", "method", "route"], buckets=BUCKETS
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled", ["service"])
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "Time spent in instrumented stages", ["service", "stage"], buckets=BUCKETS
+)
+STAGE_ERRORS = Counter("stage_errors_total", "Instrumented stages that raised", ["service", "stage"])
+
+_service = "unknown"
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+# (stage, seconds) pairs recorded while handling the current request
+_stages = contextvars.ContextVar("stages", default=None)
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def trace_headers(headers=None):
+    """`headers` plus the current trace id, for calls to other services."""
+    headers = dict(headers or {})
+    trace_id = _trace_id.get()
+    if trace_id and TRACE_HEADER not in headers:
+        headers[TRACE_HEADER] = trace_id
+    return headers
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of the enclosed block as `stage` and add it to the request breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(_service, stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(_service, stage).observe(elapsed)
+        stages = _stages.get()
+        if stages is not None:
+            stages.append((stage, elapsed))
+
+
+def timed_function(stage=None):
+    """Decorator form of timed(); the stage defaults to the function name."""
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def in_context(func):
+    """
+    Bind `func` to a copy of the current context so the trace id and stage
+    breakdown follow it into executor threads (run_in_executor does not copy it).
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def stage_breakdown(stages):
+    """Total milliseconds per stage, in first-seen order."""
+    totals = {}
+    for stage, seconds in stages:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return {stage: round(seconds * 1000, 1) for stage, seconds in totals.items()}
+
+
+class TraceFilter(logging.Filter):
+    """Adds `trace_id` to every record so log lines of one request can be joined across services."""
+
+    def filter(self, record):
+        record.trace_id = _trace_id.get() or "-"
+        return True
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware behind instrument_app.
+
+    The request is timed until the last body chunk has been sent, so streaming
+    responses (NDJSON, exports, agent token streams) are measured in full, and
+    stages that run while the body streams are still logged with the request.
+    """
+
+    def __init__(self, app, service, logger=None):
+        self.app = app
+        self.service = service
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(TRACE_HEADER.lower().encode())
+        trace_id = incoming.decode("latin-1") if incoming else uuid.uuid4().hex
+        trace_token = _trace_id.set(trace_id)
+        stages = []
+        stages_token = _stages.set(stages)
+        IN_FLIGHT.labels(self.service).inc()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[TRACE_HEADER] = trace_id
+                # Stages finished before the first byte; later ones only reach the log
+                if stages:
+                    timing = ", ".join(
+                        f"{stage.replace('.', '_')};dur={value}" for stage, value in stage_breakdown(stages).items()
+                    )
+                    existing = headers.get("Server-Timing")
+                    headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            path = getattr(scope.get("route"), "path", "unmatched")
+            IN_FLIGHT.labels(self.service).dec()
+            REQUESTS.labels(self.service, method, path, str(status)).inc()
+            REQUEST_SECONDS.labels(self.service, method, path).observe(elapsed)
+            if stages and self.logger is not None:
+                self.logger.info(
+                    f"{method} {path} {status} in {elapsed * 1000:.1f}ms; stages (ms): {stage_breakdown(stages)}"
+                )
+            _stages.reset(stages_token)
+            _trace_id.reset(trace_token)
+
+
+def instrument_app(app, service, logger=None):
+    """
+    Add request metrics, trace-id propagation and GET /metrics to a FastAPI app.
+
+    The trace id comes from the incoming X-Trace-Id header (or is generated),
+    is echoed on the response and is available to timed() stages and to outgoing
+    calls through trace_headers(). Stage timings of a request are appended to its
+    Server-Timing header and, when any were recorded, logged to `logger`.
+    Metrics are per process.
+    """
+    global _service
+    _service = service
+    app.add_middleware(InstrumentationMiddleware, service=service, logger=logger)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
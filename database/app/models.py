@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, model_validator
 from datetime import datetime, date
 
 class MainData(BaseModel):
@@ -10,9 +11,73 @@ class MainData(BaseModel):
     close: float
     volume: float
 
+class MainDataBatch(BaseModel):
+    """
+    Columnar batch of candles for a single ticker; every column must have the same length.
+    """
+    ticker: str
+    date_time: List[datetime]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[float]
+
+    @model_validator(mode="after")
+    def check_column_lengths(self):
+        lengths = {
+            len(self.date_time), len(self.open), len(self.high),
+            len(self.low), len(self.close), len(self.volume),
+        }
+        if len(lengths) > 1:
+            raise ValueError("All columns of a MainDataBatch must have the same length")
+        return self
+
 class FeatureData(BaseModel):
     ticker: str
     name: str
     start_date: date
     end_date: date
     value: float
+
+
+class FeatureState(BaseModel):
+    """
+    Serialized incremental feature state for one ticker (running moments, peaks and ring buffers).
+    """
+    ticker: str
+    last_date: date
+    state: Dict[str, Any]
+
+
+class FeatureVectorDocument(BaseModel):
+    """
+    Computed features of one ticker over [start_date, end_date]; end_date is the as-of date.
+    """
+    ticker: str
+    start_date: date
+    end_date: date
+    features: Dict[str, Optional[float]]
+
+class SimilarityVector(BaseModel):
+    """
+    Unit-length similarity vector of one ticker as of `as_of`; replaces the ticker's previous one.
+    """
+    ticker: str
+    as_of: date
+    vector: List[float]
+    features: Dict[str, Optional[float]] = {}
+
+class SearchRequest(BaseModel):
+    """
+    Vector search with payload filters. Give `query` text for the text collection or
+    `vector` (ordered as FEATURE_VECTOR_NAMES) for the numeric feature collection.
+    """
+    collection: Literal["text", "features"] = "text"
+    query: Optional[str] = None
+    vector: Optional[List[float]] = None
+    tickers: Optional[List[str]] = None
+    as_of_from: Optional[date] = None
+    as_of_to: Optional[date] = None
+    window_days: Optional[int] = None
+    limit: int = 10
@@ -1,59 +1,308 @@
 import os
-from typing import List
-from datetime import datetime, date
-from pymongo.results import InsertOneResult
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime, date, time
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import InsertOneResult, InsertManyResult
 from dotenv import load_dotenv
-from app.models import MainData, FeatureData
+from app.models import MainData, MainDataBatch, FeatureData, FeatureState
+from app.instrumentation import timed
 from motor.motor_asyncio import AsyncIOMotorClient
 
 load_dotenv()
+logger = logging.getLogger("remote_logger")
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongo:27017")
 # Create a global, shared Mongo client (no event handlers).
 mongo_client = AsyncIOMotorClient(MONGO_URI)
 database = mongo_client["asset_database"]
+# "documents": one regular document per candle, upserted on (ticker, date_time).
+# "timeseries": a MongoDB time-series collection with ticker as the metaField.
+MAIN_DATA_LAYOUT = os.getenv("MAIN_DATA_LAYOUT", "documents")
+# Documents fetched from MongoDB per round trip when streaming reads
+READ_BATCH_SIZE = int(os.getenv("READ_BATCH_SIZE", "1000"))
+# Resolutions recomputed right after new candles are ingested, as "unit:bin_size" pairs
+PRECOMPUTED_RESOLUTIONS = [
+    (unit, int(bin_size))
+    for unit, bin_size in (
+        item.split(":") for item in os.getenv("PRECOMPUTED_RESOLUTIONS", "week:1,month:1").split(",") if item
+    )
+]
+
+# Seconds between a ticker's first new candle and the recompute of its PRECOMPUTED_RESOLUTIONS;
+# every write in that window shares one recompute
+RESAMPLE_REFRESH_DELAY = float(os.getenv("RESAMPLE_REFRESH_DELAY", "5"))
+
+MAIN_DATA_KEY = [("ticker", ASCENDING), ("date_time", ASCENDING)]
+FEATURE_DATA_KEY = [("ticker", ASCENDING), ("name", ASCENDING), ("start_date", ASCENDING), ("end_date", ASCENDING)]
+FEATURE_QUERY_KEY = [("name", ASCENDING), ("start_date", ASCENDING), ("end_date", ASCENDING)]
+
+
+async def ensure_main_data_collection() -> None:
+    """
+    Creates 'main_data' as a time-series collection when MAIN_DATA_LAYOUT is "timeseries".
+    An existing collection is left as it is; changing layout needs a migration.
+    """
+    if MAIN_DATA_LAYOUT != "timeseries":
+        return
+    if "main_data" in await database.list_collection_names():
+        return
+    await database.create_collection(
+        "main_data",
+        timeseries={"timeField": "date_time", "metaField": "ticker", "granularity": "hours"},
+    )
+
+
+def as_datetime(value: Optional[date]) -> Optional[datetime]:
+    """
+    BSON has no date-only type; calendar dates are stored and queried as midnight datetimes.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+
+async def dedupe_main_data() -> int:
+    """
+    Deletes duplicate (ticker, date_time) candles left by the old insert-only ingest,
+    keeping the most recently inserted one; returns how many were deleted.
+    """
+    pipeline = [
+        {"$group": {"_id": {"ticker": "$ticker", "date_time": "$date_time"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]
+    deleted = 0
+    async for group in database["main_data"].aggregate(pipeline, allowDiskUse=True):
+        # ObjectIds grow with insertion time
+        stale = sorted(group["ids"])[:-1]
+        result = await database["main_data"].delete_many({"_id": {"$in": stale}})
+        deleted += result.deleted_count
+    return deleted
+
+
+async def ensure_main_data_index(unique: bool) -> str:
+    """
+    Creates the (ticker, date_time) index; before the first unique build, duplicate
+    candles are removed so deployments that ingested with insert_one can still start.
+    """
+    if unique:
+        existing = await database["main_data"].index_information()
+        if not any(info.get("key") == MAIN_DATA_KEY and info.get("unique") for info in existing.values()):
+            deleted = await dedupe_main_data()
+            if deleted:
+                logger.warning(f"Deleted {deleted} duplicate (ticker, date_time) candles before building the unique index")
+    try:
+        return await database["main_data"].create_index(MAIN_DATA_KEY, unique=unique)
+    except (DuplicateKeyError, OperationFailure) as e:
+        raise RuntimeError(
+            f"Could not build the (ticker, date_time) index on 'main_data': {str(e)}. "
+            "If duplicates remain (e.g. written during de-duplication), restart the service to retry."
+        ) from e
+
+
+async def ensure_indexes() -> dict:
+    """
+    Creates the indexes behind every main_data/feature_data query and verifies they exist.
+    Returns the index names per collection and raises RuntimeError if one is missing.
+    """
+    await ensure_main_data_collection()
+    # Time-series collections do not support unique indexes; writes there
+    # stay idempotent by replacing the candles of a batch instead.
+    unique_main = MAIN_DATA_LAYOUT != "timeseries"
+    expected = {
+        "main_data": [await ensure_main_data_index(unique_main)],
+        "feature_data": [
+            await database["feature_data"].create_index(FEATURE_DATA_KEY),
+            await database["feature_data"].create_index(FEATURE_QUERY_KEY),
+        ],
+        "feature_state": [await database["feature_state"].create_index("ticker", unique=True)],
+        "resampled_data": [
+            await database["resampled_data"].create_index(
+                [("ticker", ASCENDING), ("unit", ASCENDING), ("bin_size", ASCENDING)], unique=True
+            )
+        ],
+    }
+
+    for collection, names in expected.items():
+        existing = await database[collection].index_information()
+        missing = [name for name in names if name not in existing]
+        if missing:
+            raise RuntimeError(f"Indexes {missing} are missing on '{collection}'")
+    return expected
 
 
 async def store_main_data_logic(data: MainData) -> str:
     """
-    Stores MainData into the 'main_data' collection and returns the inserted ID.
+    Upserts MainData into the 'main_data' collection on (ticker, date_time) and returns its ID.
     """
     # Use model_dump() instead of .dict() for Pydantic v2 compatibility.
     doc = data.model_dump()
-    result: InsertOneResult = await database["main_data"].insert_one(doc)
-    return str(result.inserted_id)
+    key = {"ticker": data.ticker, "date_time": data.date_time}
+    with timed("mongo_write"):
+        if MAIN_DATA_LAYOUT == "timeseries":
+            await database["main_data"].delete_many(key)
+            result: InsertOneResult = await database["main_data"].insert_one(doc)
+            return str(result.inserted_id)
+
+        stored = await database["main_data"].find_one_and_replace(
+            key, doc, upsert=True, projection={"_id": 1}, return_document=ReturnDocument.AFTER
+        )
+        return str(stored["_id"])
 
 
-async def load_main_data_logic(ticker: str) -> List[dict]:
+async def store_main_data_batch_logic(batch: MainDataBatch) -> Tuple[int, int, int]:
     """
-    Returns all documents matching a given ticker from 'main_data'.
+    Idempotently writes a columnar MainDataBatch into 'main_data' with one unordered bulk write.
+    Returns (inserted, updated, failed) document counts; one bad document does not abort the rest.
     """
-    cursor = database["main_data"].find({"ticker": ticker})
-    docs = []
+    docs = [
+        {
+            "ticker": batch.ticker,
+            "date_time": date_time,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+        for date_time, open_, high, low, close, volume in zip(
+            batch.date_time, batch.open, batch.high, batch.low, batch.close, batch.volume
+        )
+    ]
+    if not docs:
+        return 0, 0, 0
+
+    with timed("mongo_write"):
+        if MAIN_DATA_LAYOUT == "timeseries":
+            # Time-series collections cannot upsert, so replace the batch's candles
+            deleted = await database["main_data"].delete_many(
+                {"ticker": batch.ticker, "date_time": {"$in": list(batch.date_time)}}
+            )
+            try:
+                result: InsertManyResult = await database["main_data"].insert_many(docs, ordered=False)
+                written = len(result.inserted_ids)
+            except BulkWriteError as e:
+                written = e.details.get("nInserted", 0)
+            updated = min(deleted.deleted_count, written)
+            return written - updated, updated, len(docs) - written
+
+        operations = [
+            UpdateOne({"ticker": doc["ticker"], "date_time": doc["date_time"]}, {"$set": doc}, upsert=True)
+            for doc in docs
+        ]
+        try:
+            result = await database["main_data"].bulk_write(operations, ordered=False)
+            return result.upserted_count, result.matched_count, 0
+        except BulkWriteError as e:
+            inserted = e.details.get("nUpserted", 0)
+            updated = e.details.get("nMatched", 0)
+            return inserted, updated, len(docs) - inserted - updated
+
+
+def _projection(fields: Optional[List[str]], sort_key: str) -> Optional[dict]:
+    """
+    Mongo projection for the requested fields; the sort key is always kept for pagination.
+    """
+    if not fields:
+        return None
+    projection = {field: 1 for field in fields}
+    projection[sort_key] = 1
+    return projection
+
+
+async def iter_main_data(
+    ticker: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[List[str]] = None,
+    after: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """
+    Yields 'main_data' documents of a ticker in date_time order as the cursor produces them.
+    `after` is the date_time of the last document of the previous page.
+    """
+    query = {"ticker": ticker}
+    time_range = {}
+    if start:
+        time_range["$gte"] = start
+    if end:
+        time_range["$lte"] = end
+    if after:
+        time_range["$gt"] = after
+    if time_range:
+        query["date_time"] = time_range
+
+    cursor = database["main_data"].find(query, _projection(fields, "date_time"))
+    cursor = cursor.sort("date_time", ASCENDING).batch_size(READ_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
     async for doc in cursor:
-        doc["_id"] = str(doc["_id"])  # Convert ObjectId to string
-        docs.append(doc)
-    return docs
+        if "_id" in doc:
+            doc["_id"] = str(doc["_id"])  # Convert ObjectId to string
+        yield doc
+
+
+async def load_main_data_logic(ticker: str, **filters) -> List[dict]:
+    """
+    Returns the documents matching a given ticker from 'main_data'; see iter_main_data for filters.
+    """
+    with timed("mongo_query"):
+        return [doc async for doc in iter_main_data(ticker, **filters)]
 
 
 async def store_feature_data_logic(data: FeatureData) -> str:
     """
-    Stores FeatureData into the 'feature_data' collection and returns the inserted ID.
+    Upserts FeatureData into the 'feature_data' collection on (ticker, name, start_date, end_date)
+    and returns its ID.
     """
     doc = data.model_dump()
-    result: InsertOneResult = await database["feature_data"].insert_one(doc)
-    return str(result.inserted_id)
+    doc["start_date"] = as_datetime(doc["start_date"])
+    doc["end_date"] = as_datetime(doc["end_date"])
+    key = {name: doc[name] for name, _ in FEATURE_DATA_KEY}
+    stored = await database["feature_data"].find_one_and_replace(
+        key, doc, upsert=True, projection={"_id": 1}, return_document=ReturnDocument.AFTER
+    )
+    return str(stored["_id"])
 
 
-async def load_feature_data_logic(ticker: str) -> List[dict]:
+async def iter_feature_data(
+    ticker: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    fields: Optional[List[str]] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> AsyncIterator[dict]:
     """
-    Returns all documents matching a given ticker from 'feature_data'.
+    Yields 'feature_data' documents of a ticker in insertion (_id) order.
+    `after` is the _id of the last document of the previous page.
     """
-    cursor = database["feature_data"].find({"ticker": ticker})
-    docs = []
+    query = {"ticker": ticker}
+    if start:
+        query["start_date"] = {"$gte": as_datetime(start)}
+    if end:
+        query["end_date"] = {"$lte": as_datetime(end)}
+    if after:
+        query["_id"] = {"$gt": ObjectId(after)}
+
+    cursor = database["feature_data"].find(query, _projection(fields, "_id"))
+    cursor = cursor.sort("_id", ASCENDING).batch_size(READ_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
     async for doc in cursor:
         doc["_id"] = str(doc["_id"])
-        docs.append(doc)
-    return docs
+        yield doc
+
+
+async def load_feature_data_logic(ticker: str, **filters) -> List[dict]:
+    """
+    Returns the documents matching a given ticker from 'feature_data'; see iter_feature_data for filters.
+    """
+    with timed("mongo_query"):
+        return [doc async for doc in iter_feature_data(ticker, **filters)]
 
 
 async def query_feature_data_logic(name: str, start: date, end: date) -> List[dict]:
@@ -62,12 +311,146 @@ async def query_feature_data_logic(name: str, start: date, end: date) -> List[di
     """
     query = {
         "name": name,
-        "start_date": {"$gte": start},
-        "end_date": {"$lte": end},
+        "start_date": {"$gte": as_datetime(start)},
+        "end_date": {"$lte": as_datetime(end)},
     }
     cursor = database["feature_data"].find(query)
     docs = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        docs.append(doc)
+    with timed("mongo_query"):
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            docs.append(doc)
     return docs
+
+
+
+async def store_feature_state_logic(data: FeatureState) -> None:
+    """
+    Upserts the incremental feature state of a ticker into 'feature_state'.
+    """
+    doc = data.model_dump(mode="json")
+    await database["feature_state"].replace_one({"ticker": data.ticker}, doc, upsert=True)
+
+
+async def load_feature_state_logic(ticker: str) -> Optional[dict]:
+    """
+    Returns the incremental feature state of a ticker, or None if it has none yet.
+    """
+    doc = await database["feature_state"].find_one({"ticker": ticker}, {"_id": 0})
+    return doc
+
+
+
+def resample_pipeline(ticker: str, unit: str, bin_size: int) -> List[dict]:
+    """
+    Aggregation pipeline turning a ticker's daily candles into bars of `bin_size` `unit`s
+    (open=first, high=max, low=min, close=last, volume=sum).
+    """
+    bucket = {"date": "$date_time", "unit": unit, "binSize": bin_size}
+    if unit == "week":
+        bucket["startOfWeek"] = "monday"
+    return [
+        {"$match": {"ticker": ticker}},
+        {"$sort": {"date_time": 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": bucket},
+            "open": {"$first": "$open"},
+            "high": {"$max": "$high"},
+            "low": {"$min": "$low"},
+            "close": {"$last": "$close"},
+            "volume": {"$sum": "$volume"},
+            "candles": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {
+            "_id": 0, "date_time": "$_id", "open": 1, "high": 1,
+            "low": 1, "close": 1, "volume": 1, "candles": 1,
+        }},
+    ]
+
+
+async def compute_resampled_logic(ticker: str, unit: str, bin_size: int) -> List[dict]:
+    """
+    Resamples the full history of a ticker inside MongoDB and caches the bars in 'resampled_data'.
+    """
+    cursor = database["main_data"].aggregate(resample_pipeline(ticker, unit, bin_size))
+    with timed("mongo_aggregate"):
+        bars = [bar async for bar in cursor]
+    await database["resampled_data"].replace_one(
+        {"ticker": ticker, "unit": unit, "bin_size": bin_size},
+        {"ticker": ticker, "unit": unit, "bin_size": bin_size, "bars": bars, "computed_at": datetime.utcnow()},
+        upsert=True,
+    )
+    return bars
+
+
+async def resample_main_data_logic(
+    ticker: str,
+    unit: str,
+    bin_size: int = 1,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Tuple[List[dict], bool]:
+    """
+    Returns (bars, cached) for a ticker at the given resolution, served from
+    'resampled_data' when present. Bars are always bucketed over the full
+    history, so `start`/`end` only select which bars are returned.
+    """
+    with timed("mongo_query"):
+        cached = await database["resampled_data"].find_one(
+            {"ticker": ticker, "unit": unit, "bin_size": bin_size}, {"bars": 1}
+        )
+    bars = cached["bars"] if cached else await compute_resampled_logic(ticker, unit, bin_size)
+    if start or end:
+        bars = [
+            bar for bar in bars
+            if (start is None or bar["date_time"] >= start) and (end is None or bar["date_time"] <= end)
+        ]
+    return bars, cached is not None
+
+
+async def invalidate_resampled_logic(ticker: str) -> None:
+    """
+    Drops every cached resolution of a ticker; called whenever its candles change.
+    """
+    await database["resampled_data"].delete_many({"ticker": ticker})
+
+
+async def refresh_resampled_logic(ticker: str) -> None:
+    """
+    Invalidates a ticker's cached bars and recomputes the PRECOMPUTED_RESOLUTIONS.
+    """
+    await invalidate_resampled_logic(ticker)
+    for unit, bin_size in PRECOMPUTED_RESOLUTIONS:
+        await compute_resampled_logic(ticker, unit, bin_size)
+
+
+# ticker -> scheduled refresh task / number of candle writes seen, per process
+_pending_refreshes = {}
+_candle_writes = {}
+
+
+async def candles_changed_logic(ticker: str) -> None:
+    """
+    Drops a ticker's cached bars right away (reads recompute them on demand) and
+    schedules one debounced refresh of the PRECOMPUTED_RESOLUTIONS, so ingesting
+    row by row does not re-aggregate the full history on every row.
+    """
+    _candle_writes[ticker] = _candle_writes.get(ticker, 0) + 1
+    await invalidate_resampled_logic(ticker)
+    if ticker not in _pending_refreshes:
+        _pending_refreshes[ticker] = asyncio.create_task(_refresh_later(ticker))
+
+
+async def _refresh_later(ticker: str) -> None:
+    await asyncio.sleep(RESAMPLE_REFRESH_DELAY)
+    # Writes from here on schedule their own refresh
+    _pending_refreshes.pop(ticker, None)
+    writes = _candle_writes.get(ticker)
+    try:
+        await refresh_resampled_logic(ticker)
+        if _candle_writes.get(ticker) != writes:
+            # Bars computed while candles kept arriving may already be stale
+            await invalidate_resampled_logic(ticker)
+    except Exception as e:
+        logger.error(f"Refreshing resampled bars of {ticker} failed: {str(e)}")
@@ -0,0 +1,123 @@
+"""
+Benchmark main_data query time and storage for the supported layouts.
+
+Seeds synthetic daily candles into a scratch database and, for each layout,
+times per-ticker loads and date-range queries and reports collStats sizes:
+
+  - scan:       regular collection without indexes (the old behaviour)
+  - documents:  regular collection with the unique (ticker, date_time) index
+  - timeseries: time-series collection with ticker as the metaField
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python scripts/benchmark_main_data.py --tickers 200 --days 2520
+"""
+import os
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from pymongo import MongoClient, ASCENDING
+
+LAYOUTS = ("scan", "documents", "timeseries")
+
+
+def make_candles(tickers, days):
+    start = datetime(2015, 1, 1)
+    for t in range(tickers):
+        ticker = f"T{t:04d}"
+        price = 100.0
+        for d in range(days):
+            price *= 1 + random.gauss(0, 0.01)
+            yield {
+                "ticker": ticker,
+                "date_time": start + timedelta(days=d),
+                "open": price,
+                "high": price * 1.01,
+                "low": price * 0.99,
+                "close": price,
+                "volume": float(random.randint(1_000, 1_000_000)),
+            }
+
+
+def setup(database, layout, tickers, days):
+    database.drop_collection("main_data")
+    if layout == "timeseries":
+        database.create_collection(
+            "main_data",
+            timeseries={"timeField": "date_time", "metaField": "ticker", "granularity": "hours"},
+        )
+    collection = database["main_data"]
+    if layout != "scan":
+        collection.create_index(
+            [("ticker", ASCENDING), ("date_time", ASCENDING)], unique=layout == "documents"
+        )
+
+    batch = []
+    for doc in make_candles(tickers, days):
+        batch.append(doc)
+        if len(batch) == 10_000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    return collection
+
+
+def timed(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(layout, database, tickers, days, repeats):
+    collection = setup(database, layout, tickers, days)
+    names = [f"T{t:04d}" for t in range(tickers)]
+    range_start = datetime(2015, 1, 1) + timedelta(days=days // 2)
+    range_end = range_start + timedelta(days=90)
+
+    load_ms = timed(lambda: list(collection.find({"ticker": random.choice(names)})), repeats)
+    range_ms = timed(
+        lambda: list(collection.find({
+            "ticker": random.choice(names),
+            "date_time": {"$gte": range_start, "$lt": range_end},
+        })),
+        repeats,
+    )
+    stats = database.command("collStats", "main_data")
+    return {
+        "layout": layout,
+        "load_ticker_ms": round(load_ms, 2),
+        "range_90d_ms": round(range_ms, 2),
+        "storage_mb": round(stats.get("storageSize", 0) / 2**20, 2),
+        "index_mb": round(stats.get("totalIndexSize", 0) / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=LAYOUTS)
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    database = client["asset_benchmark"]
+    try:
+        print(f"{'layout':<12}{'load ms':>10}{'range ms':>10}{'data MB':>10}{'index MB':>10}")
+        for layout in args.layouts:
+            result = run(layout, database, args.tickers, args.days, args.repeats)
+            print(
+                f"{result['layout']:<12}{result['load_ticker_ms']:>10}{result['range_90d_ms']:>10}"
+                f"{result['storage_mb']:>10}{result['index_mb']:>10}"
+            )
+    finally:
+        client.drop_database("asset_benchmark")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,38 @@
+import os
+import time
 import streamlit as st
 import requests
 import uuid
+import json
 import datetime
+from prometheus_client import Histogram, start_http_server
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"  # Replace with your FastAPI server URL
+# Client-side latency metrics are served for Prometheus on this port
+FRONTEND_METRICS_PORT = int(os.getenv("FRONTEND_METRICS_PORT", "9100"))
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+@st.cache_resource
+def client_metrics():
+    """Latency as the UI sees it; created once per process since Streamlit reruns this script on every interaction."""
+    start_http_server(FRONTEND_METRICS_PORT)
+    return {
+        "request": Histogram(
+            "frontend_request_duration_seconds", "Backend calls as seen by the UI", ["endpoint", "status"], buckets=BUCKETS
+        ),
+        "first_token": Histogram(
+            "frontend_first_token_seconds", "Time until the first streamed answer token", buckets=BUCKETS
+        ),
+    }
+
+
+def observe_request(endpoint, status, started):
+    """Record a backend call started at `started` (perf_counter); returns its duration in ms."""
+    elapsed = time.perf_counter() - started
+    client_metrics()["request"].labels(endpoint, str(status)).observe(elapsed)
+    return elapsed * 1000
 
 # Streamlit App Title
 st.title("Financial Asset Recommender Chatbot")
@@ -32,7 +60,9 @@ if st.sidebar.button("Perform Calculations"):
         }
 
         # Send the request to the API
+        started = time.perf_counter()
         response = requests.post(f"{API_BASE_URL}/perform_calculations", json=payload)
+        observe_request("/perform_calculations", response.status_code, started)
 
         # Display the response
         if response.status_code == 200:
@@ -50,6 +80,54 @@ st.header("Chat with the Financial Asset Recommender")
 user_id = st.text_input("User ID", value=str(uuid.uuid4()))
 session_id = st.text_input("Session ID", value=str(uuid.uuid4()))
 query = st.text_area("Enter your query", placeholder="Ask me anything about financial assets...")
+stream_response = st.checkbox("Stream response", value=True)
+
+
+def stream_query(payload, status, headers=None, timings=None):
+    """
+    Yield answer tokens from /v1/query/stream, reporting tool calls and server timings in `status`.
+    Client-side first_token and total milliseconds are written to `timings`.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    code = "error"
+    try:
+        with requests.post(
+            f"{API_BASE_URL}/v1/query/stream", json=payload, headers=headers, stream=True, timeout=(5, 300)
+        ) as response:
+            code = response.status_code
+            if response.status_code != 200:
+                raise RuntimeError(f"Error: {response.status_code} - {response.text}")
+            yield from stream_events(response, status, started, timings)
+    finally:
+        timings["total"] = observe_request("/v1/query/stream", code, started)
+
+
+def stream_events(response, status, started, timings):
+    """Handle the NDJSON events of an open /v1/query/stream response."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+        event = json.loads(line)
+        if event["event"] == "token":
+            if "first_token" not in timings:
+                elapsed = time.perf_counter() - started
+                client_metrics()["first_token"].observe(elapsed)
+                timings["first_token"] = elapsed * 1000
+            yield event["content"]
+        elif event["event"] == "tool_call_started":
+            status.update(label=f"Running {event['content']}", state="running")
+            status.write(f"Running `{event['content']}`")
+        elif event["event"] == "tool_call_completed":
+            status.write(event["content"])
+        elif event["event"] == "done":
+            status.update(label="Query processed successfully!", state="complete")
+            if event.get("timings"):
+                status.write("Server timings (ms):")
+                status.json(event["timings"])
+        elif event["event"] == "error":
+            status.update(label="Query failed", state="error")
+            raise RuntimeError(event.get("detail", "Error processing request"))
 
 # Button to send query to /v1/query
 if st.button("Send Query"):
@@ -63,15 +141,34 @@ if st.button("Send Query"):
                 "user_id": user_id,
                 "session_id": session_id,
             }
+            # One trace id per query; every service logs it, so GET /logs?trace_id= joins them
+            trace_id = uuid.uuid4().hex
+            headers = {"X-Trace-Id": trace_id}
 
-            # Send the request to the API
-            response = requests.post(f"{API_BASE_URL}/v1/query", json=payload)
-
-            # Display the response
-            if response.status_code == 200:
-                st.success("Query processed successfully!")
-                st.json(response.json())
+            if stream_response:
+                # Render tokens as they arrive; tool calls show up in the status box
+                status = st.status("Thinking...", expanded=False)
+                timings = {}
+                st.write_stream(stream_query(payload, status, headers, timings))
+                st.caption(
+                    f"Trace id: {trace_id} · first token {timings.get('first_token', 0):.0f} ms"
+                    f" · total {timings['total']:.0f} ms"
+                )
             else:
-                st.error(f"Error: {response.status_code} - {response.text}")
+                # Send the request to the API
+                started = time.perf_counter()
+                response = requests.post(f"{API_BASE_URL}/v1/query", json=payload, headers=headers)
+                total = observe_request("/v1/query", response.status_code, started)
+
+                # Display the response
+                if response.status_code == 200:
+                    st.success("Query processed successfully!")
+                    st.json(response.json())
+                    st.caption(f"Trace id: {trace_id} · total {total:.0f} ms")
+                    if response.headers.get("Server-Timing"):
+                        with st.expander("Server timings"):
+                            st.code(response.headers["Server-Timing"].replace(", ", "\n"))
+                else:
+                    st.error(f"Error: {response.status_code} - {response.text}")
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -5,9 +5,11 @@ from pydantic import BaseModel
 from datetime import datetime
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.instrumentation import instrument_app, timed
 load_dotenv()
 
 app = FastAPI()
+instrument_app(app, "logging")
 
 # ---- Configure your MongoDB connection here ----
 # Point to your Mongo container or local Mongo instance
@@ -24,6 +26,7 @@ class LogEntry(BaseModel):
     filename: str
     lineNo: int
     created: float
+    traceId: Optional[str] = None
 
 
 @app.post("/logs")
@@ -34,13 +37,27 @@ def create_log(entry: LogEntry):
     # Convert to dictionary
     entry_dict = entry.dict()
     # Insert into MongoDB
-    logs_collection.insert_one(entry_dict)
+    with timed("mongo_insert"):
+        logs_collection.insert_one(entry_dict)
     return {"message": "Log entry stored successfully"}
 
 
+@app.post("/logs/batch")
+def create_logs_batch(entries: List[LogEntry]):
+    """
+    Store a batch of log entries in the MongoDB collection with a single insert_many.
+    """
+    if not entries:
+        return {"message": "No log entries received", "count": 0}
+    with timed("mongo_insert"):
+        result = logs_collection.insert_many([entry.model_dump() for entry in entries], ordered=False)
+    return {"message": "Log entries stored successfully", "count": len(result.inserted_ids)}
+
+
 @app.get("/logs")
 def get_logs(
     level: Optional[str] = Query(None, description="Optional log level filter (e.g. INFO, ERROR)"),
+    trace_id: Optional[str] = Query(None, description="Optional trace id filter; joins one request across services"),
     limit: int = Query(50, description="Limit the number of returned logs"),
     skip: int = Query(0, description="Number of logs to skip for pagination"),
 ):
@@ -48,19 +65,23 @@ def get_logs(
     Retrieve logs from MongoDB.
     Optional query params:
       - level: filter logs by level
+      - trace_id: only logs written while handling one traced request
       - limit: limit the number of logs returned
       - skip: skip logs for pagination
     """
     query = {}
     if level:
         query["logLevel"] = level
+    if trace_id:
+        query["traceId"] = trace_id
 
     # Retrieve logs from DB
     cursor = logs_collection.find(query).skip(skip).limit(limit)
     results = []
-    for doc in cursor:
-        doc["_id"] = str(doc["_id"])  # convert ObjectId to string for JSON serialization
-        results.append(doc)
+    with timed("mongo_query"):
+        for doc in cursor:
+            doc["_id"] = str(doc["_id"])  # convert ObjectId to string for JSON serialization
+            results.append(doc)
 
     return {"count": len(results), "logs": results}
 